@@ -0,0 +1,7 @@
+"""Make the tools/analysis modules importable the way they import each other."""
+import os
+import sys
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         os.pardir, os.pardir, 'tools', 'analysis')
+sys.path.insert(0, os.path.abspath(TOOLS_DIR))
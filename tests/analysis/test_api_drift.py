@@ -0,0 +1,89 @@
+"""api_drift.py tokenizer, symbol extraction and reference parsing on short samples."""
+from api_drift import SKIPPED, extract_symbols, parse_references, tokenize
+
+JS_SAMPLE = '''const a = b / c / d;
+const re = /[/}]+\\//g;
+const t = `x ${ {a: `in ${y}`}.a } }`;
+// comment {
+/* block } */ const s = '}{'; f(x) / 2;
+'''
+
+MODULE_SAMPLE = '''/**
+ * @typedef {Object} BotOptions
+ */
+
+/** Creates the bot. */
+class Bot extends EventEmitter {
+  constructor(options) { super(); this.re = /[{]/; }
+  /** Connect to the server. */
+  async connect(host) { if (host) { return `${host}}`; } }
+  _internal() {}
+  static create() { return new Bot({}); }
+}
+
+function helper(a, b) { return a / b; }
+const make = (x) => x;
+const skip = 5;
+module.exports = { Bot, helper, make: make };
+module.exports.extra = 1;
+'''
+
+
+def tokens(text):
+    return [(kind, value, line) for kind, value, line in tokenize(text) if kind not in SKIPPED]
+
+
+def test_division_and_regex_literals():
+    first_two = [t for t in tokens(JS_SAMPLE) if t[2] <= 2]
+    assert [(k, v) for k, v, _ in first_two if k in ('punct', 'regex') and '/' in v] == [
+        ('punct', '/'), ('punct', '/'), ('regex', '/[/}]+\\//g')]
+    assert ('punct', '/', 5) in tokens(JS_SAMPLE)
+
+
+def test_nested_templates():
+    line_3 = [(k, v) for k, v, line in tokens(JS_SAMPLE) if line == 3]
+    assert [v for k, v in line_3 if k == 'string'] == ['x ${', 'in ${', '`', ' }`']
+    assert ('name', 'y') in line_3
+    assert line_3.count(('punct', '{')) == 1
+    assert line_3.count(('punct', '}')) == 1
+
+
+def test_braces_in_comments_and_strings_are_not_punctuation():
+    line_4_5 = [(k, v) for k, v, line in tokens(JS_SAMPLE) if line >= 4]
+    assert ('string', "'}{'") in line_4_5
+    assert not any(k == 'punct' and v in '{}' for k, v in line_4_5)
+    comments = [(v, line) for k, v, line in tokenize(JS_SAMPLE) if k == 'comment']
+    assert comments == [('// comment {', 4), ('/* block } */', 5)]
+
+
+def test_extract_symbols():
+    result = extract_symbols(MODULE_SAMPLE)
+    assert result['symbols'] == [
+        ['BotOptions', 'typedef', 1, True, None],
+        ['Bot', 'class', 6, True, None],
+        ['constructor', 'method', 7, False, 'Bot'],
+        ['connect', 'method', 9, True, 'Bot'],
+        ['_internal', 'method', 10, False, 'Bot'],
+        ['create', 'method', 11, False, 'Bot'],
+        ['helper', 'function', 14, False, None],
+        ['make', 'function', 15, False, None],
+    ]
+    assert result['exports'] == ['Bot', 'helper', 'make', 'extra']
+
+
+def test_parse_references(tmp_path):
+    page = tmp_path / 'API.md'
+    page.write_text('# API\n\n'
+                    '## Bot Class\n\n'
+                    'Call `bot.connect(host)` or `Bot.create()`.\n\n'
+                    '### `BotOptions`\n\n'
+                    '```js\n'
+                    'const bot = new Bot(options);\n'
+                    "bot.connect('x')\n"
+                    '```\n', encoding='utf-8')
+    assert parse_references(str(page)) == [
+        [3, 'Bot', 'Bot'],
+        [5, 'bot.connect(host)', 'connect'],
+        [5, 'Bot.create()', 'create'],
+        [7, 'BotOptions', 'BotOptions'],
+    ]
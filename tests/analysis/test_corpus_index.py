@@ -0,0 +1,154 @@
+"""corpus_index.py collection, matching and incremental updates."""
+import os
+import stat
+
+import pytest
+
+from corpus_index import CorpusIndex, atomic_write
+from scan_cache import ScanCache
+
+FILES = {
+    'README.md': '# Project\n',
+    'CONTRIBUTING.md': '# How to help\n',
+    'notes.txt': 'not markdown\n',
+    '.tmp-README.md': '# Half written\n',
+    'docs/Setup_Guide.md': '# Setup\n',
+    'docs/BOT.md': '# Bot API\n',
+    'docs/COMMAND_REFERENCE.md': '# Command list\n',
+    'docs/deep/Hidden.md': '# Hidden\n',
+    'src/Skipped.md': '# Skipped\n',
+    'wiki/Home.md': '# Home\n',
+    'wiki/guides/Setup-Guide.md': '# Installing\n',
+    'wiki/guides/.tmp-Draft.md': '# Draft\n',
+    'wiki/community/Contributing.md': '# Contributing\n',
+    'wiki/developer/API-Reference.md': '# Bot API\n',
+    'wiki/developer/deep/Internals.md': '# Internals\n',
+    'wiki/reference/Commands.md': '# Commands\n',
+}
+
+
+def write(root, path, text):
+    full_path = root / path
+    full_path.parent.mkdir(parents=True, exist_ok=True)
+    full_path.write_text(text, encoding='utf-8')
+    return str(full_path)
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / 'repo'
+    for path, text in FILES.items():
+        write(root, path, text)
+    return root
+
+
+def state(index):
+    return {
+        'files': [(f.path, f.type, f.heading, f.digest, f.size)
+                  for f in index.source_files + index.wiki_files],
+        'by_name': index.by_name,
+        'by_heading': index.by_heading,
+        'aliases': index.aliases,
+    }
+
+
+def test_collects_root_and_docs_one_level_and_wiki_recursively(root):
+    index = CorpusIndex(str(root))
+    assert [f.path for f in index.root_files] == ['CONTRIBUTING.md', 'README.md']
+    assert [f.path for f in index.docs_files] == [
+        'docs/BOT.md', 'docs/COMMAND_REFERENCE.md', 'docs/Setup_Guide.md']
+    assert [f.path for f in index.wiki_files] == [
+        'Home.md', 'community/Contributing.md', 'developer/API-Reference.md',
+        'developer/deep/Internals.md', 'guides/Setup-Guide.md', 'reference/Commands.md']
+    assert index.wiki['Home.md'].heading == 'Home'
+
+
+def test_find_match_by_name_heading_and_alias(root):
+    index = CorpusIndex(str(root))
+    sources = {f.path: f for f in index.source_files}
+    # Filename, ignoring case, spaces, underscores and hyphens
+    assert index.find_match(sources['docs/Setup_Guide.md']) == 'guides/Setup-Guide.md'
+    assert index.find_match(sources['CONTRIBUTING.md']) == 'community/Contributing.md'
+    # First heading
+    assert index.match_by_name(sources['docs/BOT.md']) is None
+    assert index.find_match(sources['docs/BOT.md']) == 'developer/API-Reference.md'
+    # Alias from SPECIAL_MAPPINGS when neither name nor heading matches
+    source = sources['docs/COMMAND_REFERENCE.md']
+    assert index.match_by_name(source) is None and index.match_by_heading(source) is None
+    assert index.find_match(source) == 'reference/Commands.md'
+    assert index.find_match(sources['README.md']) is None
+
+    # Aliases only point at pages that exist
+    os.unlink(root / 'wiki' / 'reference' / 'Commands.md')
+    index = CorpusIndex(str(root))
+    assert index.find_match(index.docs_files[1]) is None
+
+
+def test_classify(root):
+    index = CorpusIndex(str(root))
+    assert index.classify(str(root / 'README.md')) == ('README.md', 'root')
+    assert index.classify(str(root / 'docs' / 'A.md')) == ('docs/A.md', 'docs')
+    assert index.classify(str(root / 'wiki' / 'a' / 'B.md')) == ('a/B.md', 'wiki')
+    for path in ['notes.txt', 'docs/deep/Hidden.md', 'src/Skipped.md', 'wiki/.tmp-Page.md']:
+        assert index.classify(str(root / path)) is None
+    assert index.classify(str(root.parent / 'Outside.md')) is None
+
+
+def test_update_matches_a_fresh_scan(root):
+    index = CorpusIndex(str(root))
+    full_paths = [
+        write(root, 'README.md', '# Setup\n\nLonger now.\n'),
+        write(root, 'docs/New.md', '# New\n'),
+        write(root, 'wiki/guides/New.md', '# Fresh\n'),
+        write(root, 'wiki/Draft.txt', 'ignored\n'),
+        str(root / 'src' / 'Skipped.md'),
+    ]
+    for path in ['docs/Setup_Guide.md', 'wiki/community/Contributing.md']:
+        os.unlink(root / path)
+        full_paths.append(str(root / path))
+
+    changed_sources, changed_wiki = index.update(full_paths)
+    assert changed_sources == {'README.md', 'docs/New.md', 'docs/Setup_Guide.md'}
+    assert changed_wiki == {'guides/New.md', 'community/Contributing.md'}
+    assert state(index) == state(CorpusIndex(str(root)))
+
+
+def test_warm_cache_reads_nothing(root, tmp_path):
+    cache_path = str(tmp_path / 'cache.sqlite')
+    cold = CorpusIndex(str(root), ScanCache(cache_path))
+    assert cold.cache.misses == 11
+
+    warm = CorpusIndex(str(root), ScanCache(cache_path))
+    assert (warm.cache.hits, warm.cache.misses) == (11, 0)
+    assert state(warm) == state(cold)
+
+    # A touched file misses; an update through the index re-stores it
+    full_path = write(root, 'wiki/Home.md', '# Home page\n')
+    assert warm.update([full_path]) == (set(), {'Home.md'})
+    assert warm.cache.misses == 1
+    again = CorpusIndex(str(root), ScanCache(cache_path))
+    assert again.cache.misses == 0
+    assert again.wiki['Home.md'].heading == 'Home page'
+
+
+def test_cache_forgets_deleted_files(root, tmp_path):
+    cache_path = str(tmp_path / 'cache.sqlite')
+    CorpusIndex(str(root), ScanCache(cache_path))
+    os.unlink(root / 'wiki' / 'Home.md')
+    CorpusIndex(str(root), ScanCache(cache_path))
+    assert str(root / 'wiki' / 'Home.md') not in ScanCache(cache_path).entries
+
+
+def test_atomic_write_keeps_the_file_mode(tmp_path):
+    path = tmp_path / 'Page.md'
+    atomic_write(str(path), 'first\n')
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+
+    path.chmod(0o640)
+    atomic_write(str(path), 'second\r\n')
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+    # Written as given, with no temporary file left behind
+    assert path.read_bytes() == b'second\r\n'
+    assert os.listdir(tmp_path) == ['Page.md']
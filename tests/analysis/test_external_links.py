@@ -0,0 +1,153 @@
+"""external_links.py against an in-process http.server stand-in, fully offline."""
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+import external_links
+from external_links import LinkProber, parse_external
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Answers by path; the class attributes are replaced per server."""
+
+    protocol_version = 'HTTP/1.1'
+    hits = None
+    in_flight = None
+    peak = None
+    lock = None
+
+    def log_message(self, *args):
+        pass
+
+    def answer(self, status, headers=()):
+        # Leave before answering: the client may send its next request as soon as it reads this
+        with self.lock:
+            self.in_flight[self.headers['Host']] -= 1
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def handle_request(self):
+        host = self.headers['Host']
+        with self.lock:
+            self.hits[self.path] += 1
+            hit = self.hits[self.path]
+            self.in_flight[host] += 1
+            self.peak[host] = max(self.peak[host], self.in_flight[host])
+        self.route(hit)
+
+    def route(self, hit):
+        path = self.path
+        if path == '/ok':
+            self.answer(200)
+        elif path == '/no-head':
+            self.answer(405 if self.command == 'HEAD' else 200)
+        elif path == '/busy':
+            self.answer(429, [('Retry-After', '0')]) if hit == 1 else self.answer(200)
+        elif path == '/always-busy':
+            self.answer(429, [('Retry-After', '0')])
+        elif path == '/old':
+            self.answer(301, [('Location', '/ok')])
+        elif path.startswith('/hop/'):
+            self.answer(302, [('Location', f'http://slow.test/slow/{path[5:]}')])
+        elif path.startswith('/slow/'):
+            time.sleep(0.05)
+            self.answer(200)
+        else:
+            self.answer(404)
+
+    do_HEAD = do_GET = handle_request
+
+
+@pytest.fixture
+def server():
+    handler = type('Handler', (StandIn,), {
+        'hits': Counter(), 'in_flight': Counter(), 'peak': Counter(), 'lock': threading.Lock()})
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def resolve_to(httpd, *hosts):
+    return {host: ('127.0.0.1', httpd.server_address[1]) for host in hosts}
+
+
+def test_outcomes(server):
+    prober = LinkProber(timeout=5, resolve=resolve_to(server, 'links.test'))
+    base = 'http://links.test'
+    results = asyncio.run(prober.check_all(
+        [f'{base}/ok', f'{base}/missing', f'{base}/no-head', f'{base}/busy',
+         f'{base}/always-busy', f'{base}/old']))
+
+    assert results[f'{base}/ok'] == ('ok', 200, None)
+    assert results[f'{base}/missing'] == ('broken', 404, None)
+    # HEAD refused, GET accepted
+    assert results[f'{base}/no-head'] == ('ok', 200, None)
+    # 429 with Retry-After, then one retry
+    assert results[f'{base}/busy'] == ('ok', 200, None)
+    assert server.RequestHandlerClass.hits['/busy'] == 2
+    assert results[f'{base}/always-busy'][:2] == ('limited', 429)
+    assert results[f'{base}/old'] == ('moved', 200, f'{base}/ok')
+
+
+def test_redirects_wait_for_target_host_slot(server):
+    prober = LinkProber(per_host=2, timeout=5, resolve=resolve_to(server, 'hops.test', 'slow.test'))
+    urls = [f'http://hops.test/hop/{i}' for i in range(8)]
+    urls += [f'http://slow.test/slow/direct-{i}' for i in range(4)]
+    results = asyncio.run(prober.check_all(urls))
+
+    assert {outcome for outcome, _, _ in results.values()} == {'ok'}
+    assert server.RequestHandlerClass.peak['slow.test'] <= 2
+
+
+def test_fenced_urls_are_skipped(tmp_path):
+    page = tmp_path / 'Page.md'
+    page.write_text('See https://docs.example.dev/a.\n'
+                    '```bash\n'
+                    'curl https://fenced.example.dev/b\n'
+                    '```\n'
+                    'and <https://docs.example.dev/c>, http://localhost:3000/x\n', encoding='utf-8')
+    links = parse_external(SimpleNamespace(full_path=str(page)))
+    assert links == [[1, 'https://docs.example.dev/a'], [5, 'https://docs.example.dev/c']]
+
+
+def run_main(monkeypatch, capsys, root, cache_path, httpd):
+    port = httpd.server_address[1]
+    monkeypatch.setattr(sys, 'argv', ['external_links.py', '--root', str(root),
+                                      '--cache-path', str(cache_path),
+                                      '--resolve', f'links.test=127.0.0.1:{port}'])
+    external_links.main()
+    return capsys.readouterr().out
+
+
+def test_cached_results_are_reused_within_ttl(server, tmp_path, monkeypatch, capsys):
+    root = tmp_path / 'repo'
+    (root / 'docs').mkdir(parents=True)
+    (root / 'wiki').mkdir()
+    (root / 'docs' / 'GUIDE.md').write_text(
+        '# Guide\n\nhttp://links.test/ok and http://links.test/missing\n', encoding='utf-8')
+    (root / 'wiki' / 'Home.md').write_text('# Home\n\n[up](http://links.test/ok)\n',
+                                           encoding='utf-8')
+    cache_path = tmp_path / 'cache.sqlite'
+
+    first = run_main(monkeypatch, capsys, root, cache_path, server)
+    assert '- Probed this run: 2 (cached: 0)' in first
+    assert '| docs/GUIDE.md | 3 | http://links.test/missing | 404 |' in first
+    requests = sum(server.RequestHandlerClass.hits.values())
+
+    second = run_main(monkeypatch, capsys, root, cache_path, server)
+    assert '- Probed this run: 0 (cached: 2)' in second
+    assert sum(server.RequestHandlerClass.hits.values()) == requests
+    assert second.split('## Broken Links')[1] == first.split('## Broken Links')[1]
@@ -0,0 +1,133 @@
+"""gap_records.py sinks and final_gap_analysis.GapReport streaming and refresh."""
+import csv
+import io
+import json
+import os
+
+import pytest
+
+import gap_records
+from corpus_index import CorpusIndex
+from final_gap_analysis import GapReport, render_reports
+from gap_records import CsvSink, GapRecord, JsonLinesSink, StatusCounter, feed
+from staleness import StalenessChecker
+
+OLD = 1_600_000_000
+
+# (text, mtime) per file; wiki pages are older or newer than their sources
+FILES = {
+    'README.md': ('# Project\n', OLD + 100),
+    'docs/SETUP.md': ('# Setup\n', OLD + 100),
+    'docs/USAGE.md': ('# Usage\n', OLD + 300),
+    'docs/DEPLOYMENT.md': ('# Deploying the bot\n', OLD + 100),
+    'wiki/Home.md': ('# Home\n', OLD + 200),
+    'wiki/guides/Setup.md': ('# Setup\n', OLD + 200),
+    'wiki/guides/Usage.md': ('# Usage\n', OLD + 200),
+}
+
+
+def write(root, path, text, mtime):
+    full_path = root / path
+    full_path.parent.mkdir(parents=True, exist_ok=True)
+    full_path.write_text(text, encoding='utf-8')
+    os.utime(full_path, (mtime, mtime))
+    return str(full_path)
+
+
+@pytest.fixture
+def root(tmp_path):
+    for path, (text, mtime) in FILES.items():
+        write(tmp_path, path, text, mtime)
+    return tmp_path
+
+
+def new_report(root):
+    index = CorpusIndex(str(root))
+    return GapReport(index, StalenessChecker('mtime', index), {'README.md': 'Home.md'})
+
+
+def rows(records):
+    return [(r.file, r.status, r.wiki_match) for r in records]
+
+
+def test_stream_and_build_agree(root):
+    report = new_report(root)
+    streamed = list(report.stream())
+    assert rows(streamed) == [
+        ('README.md', 'up-to-date', 'Home.md'),
+        ('docs/DEPLOYMENT.md', 'missing', None),
+        ('docs/SETUP.md', 'up-to-date', 'guides/Setup.md'),
+        ('docs/USAGE.md', 'out-of-date', 'guides/Usage.md'),
+    ]
+    assert report.rows == {}
+
+    report.build()
+    assert [r.to_json() for r in report.records()] == [r.to_json() for r in streamed]
+
+
+def test_refresh_matches_a_fresh_build(root):
+    report = new_report(root)
+    report.build()
+    full_paths = [
+        write(root, 'wiki/guides/Usage.md', '# Usage\n', OLD + 400),
+        write(root, 'wiki/guides/Deployment.md', '# Deployment\n', OLD + 400),
+        write(root, 'docs/FAQ.md', '# FAQ\n', OLD),
+    ]
+    os.unlink(root / 'docs' / 'SETUP.md')
+    full_paths.append(str(root / 'docs' / 'SETUP.md'))
+
+    changed_sources, changed_wiki = report.index.update(full_paths)
+    # USAGE (its page changed), DEPLOYMENT (now matched) and the new FAQ
+    assert report.refresh(changed_sources, changed_wiki) == 3
+
+    fresh = new_report(root)
+    fresh.build()
+    assert [r.to_json() for r in report.records()] == [r.to_json() for r in fresh.records()]
+    assert rows(report.records()) == [
+        ('README.md', 'up-to-date', 'Home.md'),
+        ('docs/DEPLOYMENT.md', 'up-to-date', 'guides/Deployment.md'),
+        ('docs/FAQ.md', 'missing', None),
+        ('docs/USAGE.md', 'up-to-date', 'guides/Usage.md'),
+    ]
+    assert report.refresh(set(), set()) == 0
+
+
+def test_sinks(root):
+    records = list(new_report(root).stream())
+    csv_out, json_out, counts = io.StringIO(newline=''), io.StringIO(), StatusCounter()
+    feed(iter(records), [CsvSink(csv_out), JsonLinesSink(json_out), counts])
+
+    # The CSV lists gaps only, with formatted values
+    table = list(csv.DictReader(io.StringIO(csv_out.getvalue())))
+    assert [(row['file'], row['status']) for row in table] == [
+        ('docs/DEPLOYMENT.md', 'missing'), ('docs/USAGE.md', 'out-of-date')]
+    assert table[0]['wiki_mtime'] == 'N/A' and table[0]['wiki_match'] == ''
+    assert table[0]['suggested_path'] == records[1].suggested_path
+    assert table[0]['suggested_path'].endswith('Deployment.md')
+    assert table[1]['source_mtime'] == gap_records.format_mtime(OLD + 300)
+
+    # JSON lines keep every record with raw values; only gaps get suggestions
+    data = [json.loads(line) for line in json_out.getvalue().splitlines()]
+    assert [d['file'] for d in data] == [r.file for r in records]
+    assert data[3]['source_mtime'] == pytest.approx(OLD + 300)
+    assert 'suggested_path' not in data[0]
+    assert data[1]['suggested_path'] == records[1].suggested_path
+
+    assert (counts.total, counts['up-to-date'], counts['missing'], counts['diverged']) == (4, 2, 1, 0)
+
+
+def test_summary_spills_to_disk_unchanged(root, monkeypatch):
+    report = new_report(root)
+    csv_text, md_text = render_reports(report.index, report.stream(), False)
+    monkeypatch.setattr(gap_records, 'SPOOL_SIZE', 1)
+    assert render_reports(report.index, report.stream(), False) == (csv_text, md_text)
+    assert '- Files with matching wiki pages: 2\n' in md_text
+    assert '| docs/USAGE.md | docs | out-of-date | guides/Usage.md |' in md_text
+
+
+def test_similarity_column_in_content_mode(root):
+    source = new_report(root).index.docs_files[0]
+    record = GapRecord(source, 'diverged', similarity=0.5)
+    assert record.is_gap
+    assert record.csv_row(content_mode=True)[-1] == '0.500'
+    assert GapRecord(source, 'identical').csv_row(content_mode=True)[-1] == 'N/A'
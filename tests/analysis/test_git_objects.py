@@ -0,0 +1,144 @@
+"""git_objects.py against small repositories built with the git command line."""
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from git_objects import GitRepository, blob_sha, read_index
+from scan_cache import ScanCache
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+BASE_TIME = 1_700_000_000
+
+
+def git(repo, *args, when=BASE_TIME, **kwargs):
+    env = dict(os.environ, GIT_AUTHOR_NAME='Test', GIT_AUTHOR_EMAIL='test@example.com',
+               GIT_COMMITTER_NAME='Test', GIT_COMMITTER_EMAIL='test@example.com',
+               GIT_AUTHOR_DATE=f'{when} +0000', GIT_COMMITTER_DATE=f'{when} +0000',
+               GIT_CONFIG_NOSYSTEM='1', HOME=str(repo))
+    return subprocess.run(['git', *args], cwd=repo, env=env, check=True,
+                          capture_output=True, **kwargs).stdout
+
+
+def commit_files(repo, files, when):
+    for path, text in files.items():
+        full_path = repo / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(text, encoding='utf-8')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-q', '-m', f'commit at {when}', when=when)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / 'repo'
+    root.mkdir()
+    git(root, 'init', '-q', '-b', 'main')
+    # A file large enough that its later versions are stored as deltas
+    lines = [f'line {i}: some wiki text that repeats across versions\n' for i in range(200)]
+    commit_files(root, {'README.md': '# Readme\n', 'docs/GUIDE.md': ''.join(lines)}, BASE_TIME)
+    for n in range(1, 6):
+        lines[n * 10] = f'edited in version {n}\n'
+        commit_files(root, {'docs/GUIDE.md': ''.join(lines)}, BASE_TIME + n * 100)
+    commit_files(root, {'wiki/Home.md': '# Home\n'}, BASE_TIME + 1000)
+    return root
+
+
+def all_objects(repo):
+    listed = git(repo, 'rev-list', '--objects', '--all', text=True).split('\n')
+    return [line.split(' ', 1)[0] for line in listed if line]
+
+
+def assert_objects_match(repo):
+    store = GitRepository(str(repo / '.git'), str(repo)).objects
+    for sha in all_objects(repo):
+        kind, data = store.read(sha)
+        assert kind == git(repo, 'cat-file', '-t', sha, text=True).strip()
+        assert data == git(repo, 'cat-file', kind, sha)
+
+
+def test_loose_objects(repo):
+    assert_objects_match(repo)
+
+
+@pytest.mark.parametrize('offset_deltas', ['true', 'false'])
+def test_packed_objects_and_deltas(repo, offset_deltas):
+    # useDeltaBaseOffset=false writes REF_DELTA entries instead of OFS_DELTA
+    git(repo, '-c', f'repack.useDeltaBaseOffset={offset_deltas}',
+        'repack', '-adfq', '--window=10', '--depth=50')
+    git(repo, 'prune-packed')
+    packs = [str(p) for p in (repo / '.git/objects/pack').glob('*.idx')]
+    # The pack really holds deltas
+    assert 'chain length' in git(repo, 'verify-pack', '-v', *packs, text=True)
+    assert not any((repo / '.git/objects').glob('[0-9a-f][0-9a-f]/*'))
+    assert_objects_match(repo)
+
+
+@pytest.mark.parametrize('version', [2, 3, 4])
+def test_index_versions(repo, version):
+    git(repo, 'update-index', '--index-version', str(version))
+    entries = read_index(str(repo / '.git/index'))
+    staged = git(repo, 'ls-files', '-s', text=True).split('\n')
+    expected = {line.split('\t')[1]: line.split()[1] for line in staged if line}
+    assert {path: e.sha for path, e in entries.items()} == expected
+    assert entries['README.md'].size == len('# Readme\n')
+
+
+def test_blob_sha_matches_git(repo):
+    data = (repo / 'docs/GUIDE.md').read_bytes()
+    assert blob_sha(data) == git(repo, 'hash-object', 'docs/GUIDE.md', text=True).strip()
+
+
+def test_worktree_blob_uses_index_until_modified(repo):
+    path = repo / 'README.md'
+    # Age the file so its index entry is not racily clean
+    os.utime(path, ns=(BASE_TIME * 10**9, BASE_TIME * 10**9))
+    git(repo, 'update-index', '--refresh')
+    repository = GitRepository(str(repo / '.git'), str(repo))
+    sha, clean = repository.worktree_blob('README.md', str(path))
+    assert clean and sha == repository.index['README.md'].sha
+
+    path.write_text('# Changed\n', encoding='utf-8')
+    sha, clean = repository.worktree_blob('README.md', str(path))
+    assert not clean and sha == blob_sha(b'# Changed\n')
+
+
+def test_last_commit_times_and_incremental_walk(repo, tmp_path):
+    paths = ['README.md', 'docs/GUIDE.md', 'wiki/Home.md', 'docs/MISSING.md']
+    cache = ScanCache(str(tmp_path / 'cache.sqlite'))
+    repository = GitRepository(str(repo / '.git'), str(repo))
+    times = repository.last_commit_times(paths, cache)
+    assert times['README.md'][0] == BASE_TIME
+    assert times['docs/GUIDE.md'][0] == BASE_TIME + 500
+    assert times['wiki/Home.md'][0] == BASE_TIME + 1000
+    assert times['docs/MISSING.md'] is None
+
+    old_head = repository.head()
+    commit_files(repo, {'README.md': '# Readme, edited\n'}, BASE_TIME + 2000)
+    repository = GitRepository(str(repo / '.git'), str(repo))
+    times = repository.last_commit_times(paths, cache)
+    assert times['README.md'] == [BASE_TIME + 2000, blob_sha(b'# Readme, edited\n')]
+    assert times['docs/GUIDE.md'][0] == BASE_TIME + 500
+    # The walk stopped at the cached HEAD: only the new commit and its parent were read
+    assert set(repository.commits) == {repository.head(), old_head}
+
+
+def test_incremental_walk_sees_back_dated_merges(repo, tmp_path):
+    paths = ['README.md', 'docs/GUIDE.md']
+    cache = ScanCache(str(tmp_path / 'cache.sqlite'))
+    GitRepository(str(repo / '.git'), str(repo)).last_commit_times(paths, cache)
+
+    # A branch from the first commit, committed before the cached HEAD and merged after it
+    first = git(repo, 'rev-list', '--max-parents=0', 'HEAD', text=True).strip()
+    git(repo, 'checkout', '-q', '-b', 'side', first)
+    commit_files(repo, {'README.md': '# Readme from a side branch\n'}, BASE_TIME + 50)
+    git(repo, 'checkout', '-q', 'main')
+    git(repo, 'merge', '-q', '--no-ff', '-m', 'merge side', 'side', when=BASE_TIME + 2000)
+
+    repository = GitRepository(str(repo / '.git'), str(repo))
+    times = repository.last_commit_times(paths, cache)
+    assert times['README.md'] == [BASE_TIME + 50, blob_sha(b'# Readme from a side branch\n')]
+    assert times['docs/GUIDE.md'][0] == BASE_TIME + 500
+    assert times == GitRepository(str(repo / '.git'), str(repo)).last_commit_times(paths)
@@ -0,0 +1,87 @@
+"""headings.py scanner on short byte samples, fed whole and in small chunks."""
+import pytest
+
+from headings import (FRONT_MATTER_MAX_BYTES, HeadingDecodeError, HeadingScanner, heading_slugs,
+                      outline_entries, scan_bytes)
+
+
+def scan_chunked(data, size):
+    scanner = HeadingScanner('page.md')
+    for start in range(0, len(data), size):
+        scanner.feed(data[start:start + size])
+    scanner.close()
+    return scanner
+
+
+@pytest.mark.parametrize('size', [1, 3, 4096])
+def test_chunk_boundaries_do_not_matter(size):
+    data = b'intro\r\n# Title\r\n\r\n## Part one\r\ntext\n### Deep'
+    scanner = scan_chunked(data, size)
+    assert scanner.heading == 'Title'
+    assert scanner.outline == [(1, 'Title', 2), (2, 'Part one', 4), (3, 'Deep', 6)]
+    assert scanner.bytes_seen == len(data)
+
+
+def test_front_matter_is_skipped():
+    scanner = scan_bytes(b'---\ntitle: x\n# not a heading\n---\n# Title\n')
+    assert scanner.outline == [(1, 'Title', 5)]
+
+
+def test_front_matter_may_close_with_dots():
+    assert scan_bytes(b'---\n# x\n...\n# Title\n').outline == [(1, 'Title', 4)]
+
+
+def test_unclosed_front_matter_is_scanned_as_text():
+    scanner = scan_bytes(b'---\n# Title\ntext\n## Part\n')
+    assert scanner.heading == 'Title'
+    assert scanner.outline == [(1, 'Title', 2), (2, 'Part', 4)]
+
+
+def test_front_matter_buffer_is_capped():
+    filler = b'key: value\n' * (FRONT_MATTER_MAX_BYTES // 11 + 10)
+    scanner = HeadingScanner()
+    scanner.feed(b'---\n# Title\n' + filler)
+    # Released before the end of input, without waiting for close()
+    assert scanner._front_matter is None
+    scanner.feed(b'## Part\n---\n## After\n')
+    scanner.close()
+    lines = filler.count(b'\n')
+    assert scanner.outline == [(1, 'Title', 2), (2, 'Part', lines + 3), (2, 'After', lines + 5)]
+
+
+def test_front_matter_only_on_the_first_line():
+    assert scan_bytes(b'\n---\n# Title\n---\n').outline == [(1, 'Title', 3)]
+
+
+@pytest.mark.parametrize('data, expected', [
+    (b'```\n# code\n```\n# Title\n', [(1, 'Title', 4)]),
+    (b'~~~\n# code\n```\n# still code\n~~~\n# Title\n', [(1, 'Title', 6)]),
+    (b'````md\n```\n# code\n```\n````\n# Title\n', [(1, 'Title', 6)]),
+    (b'```\n# code\n``` not a close\n# still code\n```\n# Title\n', [(1, 'Title', 6)]),
+    (b'   ```\n# code\n   ```\n    ```\n# Title\n', [(1, 'Title', 5)]),
+])
+def test_fences_close_on_same_character_and_length(data, expected):
+    assert scan_bytes(data).outline == expected
+
+
+def test_heading_needs_a_space_and_at_most_six_hashes():
+    scanner = scan_bytes(b'#Tight\n####### Seven\n###### Six\n')
+    assert scanner.outline == [(6, 'Six', 3)]
+    assert scanner.heading is None
+
+
+def test_decode_errors_are_reported():
+    scanner = scan_bytes(b'# Caf\xe9\n\xff\xfe body is not decoded\n## Fine\n', 'bad.md')
+    assert scanner.outline == [(2, 'Fine', 3)]
+    assert scanner.heading is None
+    assert len(scanner.errors) == 1
+    error = scanner.errors[0]
+    assert isinstance(error, HeadingDecodeError) and isinstance(error, ValueError)
+    assert (error.path, error.line) == ('bad.md', 1)
+    assert str(error).startswith('bad.md:1: heading is not valid UTF-8')
+
+
+def test_duplicate_slugs_get_suffixes():
+    outline = scan_bytes(b'# API\n## Setup & Run\n## Setup & Run\n').outline
+    assert [e[2] for e in outline_entries(outline)] == ['api', 'setup--run', 'setup--run-1']
+    assert heading_slugs(outline) == {'api', 'setup--run', 'setup--run-1'}
@@ -0,0 +1,93 @@
+"""link_graph.py parsing, and incremental refresh against a cold rebuild."""
+import pytest
+
+from corpus_index import CorpusIndex
+from link_graph import build_graph, load_links, parse_links
+
+PAGES = {
+    'Home.md': '# Home\n\n[[Guide]] and [[Reference|API Reference]]\n',
+    'Guide.md': '# Guide\n\n## Setup\n\nSee [the API](API-Reference.md#commands).\n',
+    'API-Reference.md': '# API Reference\n\n## Commands\n\nBack to [[Guide#setup]].\n',
+    'community/Faq.md': '# FAQ\n\n[[Missing Page]] and [[Guide#nowhere]]\n',
+}
+
+
+def write(root, path, text):
+    full_path = root / 'wiki' / path
+    full_path.parent.mkdir(parents=True, exist_ok=True)
+    full_path.write_text(text, encoding='utf-8')
+    return str(full_path)
+
+
+@pytest.fixture
+def root(tmp_path):
+    for path, text in PAGES.items():
+        write(tmp_path, path, text)
+    return tmp_path
+
+
+def state(graph):
+    return {
+        'broken_links': {p: v for p, v in graph.broken_links.items() if v},
+        'broken_anchors': {p: v for p, v in graph.broken_anchors.items() if v},
+        'out_edges': {p: v for p, v in graph.out_edges.items() if v},
+        'in_edges': {p: v for p, v in graph.in_edges.items() if v},
+        'orphans': graph.orphans(),
+        'reachable': graph.reachable(),
+    }
+
+
+def test_parse_links(tmp_path):
+    page = write(tmp_path, 'Page.md', '[[Text|Target#Part]] [a](Other.md) [b](#local)\n'
+                                      '```\n[[In Code]]\n```\n'
+                                      '[dir](../../examples/) [img](pic.png) [web](https://x.dev/a.md)\n'
+                                      '![img](Shot.md) [c](sub/Deep.md#x)\n')
+    assert parse_links(page) == [[1, 'Target', 'Part'], [1, 'Other.md', ''], [1, '', 'local'],
+                                 [6, 'sub/Deep.md', 'x']]
+
+
+def test_cold_graph(root):
+    s = state(build_graph(CorpusIndex(str(root))))
+    assert s['broken_links'] == {'community/Faq.md': [(3, 'Missing Page')]}
+    assert s['broken_anchors'] == {'community/Faq.md': [(3, 'Guide#nowhere', 'Guide.md')]}
+    assert s['orphans'] == ['community/Faq.md']
+    assert s['reachable'] == {'Home.md', 'Guide.md', 'API-Reference.md'}
+
+
+def refresh(index, graph, full_paths):
+    _, changed_wiki = index.update(full_paths)
+    changed = [index.wiki[p] for p in changed_wiki if p in index.wiki]
+    return graph.refresh(index.wiki, load_links(index, changed))
+
+
+@pytest.mark.parametrize('edits, expected', [
+    # Headings change: every page linking to Guide is re-resolved
+    ({'Guide.md': '# Guide\n\n## Install\n\n## Nowhere\n'},
+     {'Guide.md', 'Home.md', 'API-Reference.md', 'community/Faq.md'}),
+    # A missing page appears: pages with broken links are re-resolved
+    ({'Missing-Page.md': '# Missing Page\n\n[[Home]]\n'},
+     {'Missing-Page.md', 'community/Faq.md'}),
+    # A linked page is removed
+    ({'API-Reference.md': None},
+     {'Guide.md', 'Home.md', 'community/Faq.md'}),
+    # A page is renamed
+    ({'API-Reference.md': None, 'reference/Reference.md': '# Reference\n\n[[Guide]]\n'},
+     {'Guide.md', 'Home.md', 'community/Faq.md', 'reference/Reference.md'}),
+    # Only the links of two pages change
+    ({'community/Faq.md': '# FAQ\n\nNo links left.\n', 'Home.md': '# Home\n\n[[FAQ]]\n'},
+     {'Home.md', 'community/Faq.md'}),
+])
+def test_refresh_matches_cold_rebuild(root, edits, expected):
+    index = CorpusIndex(str(root))
+    graph = build_graph(index)
+    full_paths = []
+    for path, text in edits.items():
+        if text is None:
+            full_path = root / 'wiki' / path
+            full_path.unlink()
+            full_paths.append(str(full_path))
+        else:
+            full_paths.append(write(root, path, text))
+
+    assert refresh(index, graph, full_paths) == expected
+    assert state(graph) == state(build_graph(CorpusIndex(str(root))))
@@ -0,0 +1,115 @@
+"""scan_cache.py identity checks, pruning and schema handling."""
+import os
+import sqlite3
+
+import pytest
+
+from scan_cache import SCHEMA_VERSION, ScanCache
+
+OUTLINE = [(1, 'Title', 1), (2, 'Part', 3)]
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'cache.sqlite')
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_hit_until_identity_changes(tmp_path, cache_path):
+    page = write(tmp_path / 'root' / 'Page.md', '# Title\n')
+    cache = ScanCache(cache_path)
+    cache.store(page, os.stat(page), 'Title', 'd1', OUTLINE)
+    cache.commit()
+
+    cache = ScanCache(cache_path)
+    assert cache.lookup(page, os.stat(page)) == ('Title', 'd1', OUTLINE)
+
+    # Same size and content, new mtime
+    st = os.stat(page)
+    os.utime(page, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert cache.lookup(page, os.stat(page)) is None
+
+    # Same size and mtime, new inode (an atomic rename over the file)
+    cache.store(page, os.stat(page), 'Title', 'd1', OUTLINE)
+    st = os.stat(page)
+    replacement = write(tmp_path / 'root' / 'tmp', '# Other\n')
+    os.utime(replacement, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(replacement, page)
+    assert os.stat(page).st_size == st.st_size
+    assert cache.lookup(page, os.stat(page)) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_prune_keeps_other_suffixes_and_depths(tmp_path, cache_path):
+    root = str(tmp_path / 'root')
+    kept = write(tmp_path / 'root' / 'Kept.md', 'a')
+    gone = write(tmp_path / 'root' / 'Gone.md', 'b')
+    nested = write(tmp_path / 'root' / 'sub' / 'Nested.md', 'c')
+    code = write(tmp_path / 'root' / 'src' / 'bot.js', 'd')
+    outside = write(tmp_path / 'other' / 'Page.md', 'e')
+    cache = ScanCache(cache_path)
+    for i, path in enumerate([kept, gone, nested, code, outside]):
+        cache.store(path, os.stat(path), None, f'd{i}', [])
+        cache.store_fingerprint(f'd{i}', '[]')
+        cache.store_derived('kind', f'd{i}', i)
+
+    # A non-recursive scan of root that only saw Kept.md
+    cache.prune(root, {kept}, recursive=False)
+    assert set(cache.entries) == {kept, nested, code, outside}
+    # A recursive scan of root that saw Kept.md only
+    cache.prune(root, {kept})
+    assert set(cache.entries) == {kept, code, outside}
+    cache.commit()
+
+    cache = ScanCache(cache_path)
+    assert set(cache.entries) == {kept, code, outside}
+    # Data derived from pruned content goes with it
+    assert cache.load_fingerprint('d1') is None and cache.load_derived('kind', 'd2') is None
+    assert cache.load_fingerprint('d3') == '[]' and cache.load_derived('kind', 'd3') == 3
+
+
+def populate(cache_path, page):
+    cache = ScanCache(cache_path)
+    cache.store(page, os.stat(page), 'Title', 'd1', OUTLINE)
+    cache.store_fingerprint('d1', '[]')
+    cache.store_derived('kind', 'd1', True)
+    cache.store_git_history('/repo/.git', 'abc', {'Page.md': [1, 'sha']})
+    cache.store_link_result('https://example.dev', 'ok', 200, None, 1.0)
+    cache.close()
+
+
+def assert_empty(cache, page):
+    assert cache.entries == {}
+    assert cache.lookup(page, os.stat(page)) is None
+    assert cache.load_fingerprint('d1') is None
+    assert cache.load_derived('kind', 'd1') is None
+    assert cache.load_git_history('/repo/.git') is None
+    assert cache.load_link_results() == {}
+
+
+def test_schema_bump_drops_every_table(tmp_path, cache_path):
+    page = write(tmp_path / 'Page.md', '# Title\n')
+    populate(cache_path, page)
+    cache = ScanCache(cache_path)
+    assert cache.load_git_history('/repo/.git') == ('abc', {'Page.md': [1, 'sha']})
+    cache.close()
+
+    conn = sqlite3.connect(cache_path)
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION - 1}')
+    conn.commit()
+    conn.close()
+    cache = ScanCache(cache_path)
+    assert_empty(cache, page)
+    version = cache.conn.execute('PRAGMA user_version').fetchone()[0]
+    assert version == SCHEMA_VERSION
+
+
+def test_rebuild_drops_every_table(tmp_path, cache_path):
+    page = write(tmp_path / 'Page.md', '# Title\n')
+    populate(cache_path, page)
+    assert_empty(ScanCache(cache_path, rebuild=True), page)
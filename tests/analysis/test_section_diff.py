@@ -0,0 +1,92 @@
+"""section_diff.py section keys, diffs and patching on short markdown samples."""
+from convert_links import FOOTER, LinkConverter
+from headings import scan_bytes
+from section_diff import SectionDiff, apply_diff, section_bounds, split_sections
+
+SOURCE = ('# Guide\n'
+          'Intro.\n'
+          '## Install\n'
+          'Run npm install.\n'
+          '## Usage\n'
+          'New usage text, see [FAQ](FAQ.md).\n'
+          '### Flags\n'
+          '- --fast\n'
+          '## Usage\n'
+          'Second usage.\n'
+          '## Added\n'
+          'Brand new.\n')
+
+WIKI = ('# Guide\n\n'
+        'Intro.\n\n'
+        '## Install\n\n'
+        'Run npm install.\n\n'
+        '## Usage\n\n'
+        'Old usage text.\n\n'
+        '### Flags\n\n'
+        '* --fast\n\n'
+        '## Usage\n\n'
+        'Second usage.\n\n'
+        '## Wiki Notes\n\n'
+        'Kept by hand.\n' + FOOTER)
+
+
+def parse(text):
+    lines = text.splitlines(keepends=True)
+    return lines, split_sections(lines, scan_bytes(text.encode('utf-8')).outline)
+
+
+def test_section_keys_follow_heading_paths():
+    outline = scan_bytes(SOURCE.encode('utf-8')).outline
+    assert section_bounds(outline, 12) == [
+        ['', 0, 0],
+        ['guide', 0, 2],
+        ['guide > install', 2, 4],
+        ['guide > usage', 4, 6],
+        ['guide > usage > flags', 6, 8],
+        ['guide > usage #2', 8, 10],
+        ['guide > added', 10, 12],
+    ]
+
+
+def test_footer_is_not_a_section():
+    lines, sections = parse(WIKI)
+    assert sections[-1].key == 'guide > wiki-notes'
+    assert ''.join(lines[sections[-1].end:]) == FOOTER.lstrip('\n')
+
+
+def test_diff_ignores_formatting_sync_normalizes():
+    _, source = parse(SOURCE)
+    _, wiki = parse(WIKI)
+    diff = SectionDiff(source, wiki)
+    # Blank lines around headings and the list marker do not count as changes
+    assert diff.changed == ['guide > usage']
+    assert diff.added == ['guide > added']
+    assert diff.removed == ['guide > wiki-notes']
+
+
+def test_apply_patches_changed_and_added_sections():
+    source_lines, source = parse(SOURCE)
+    wiki_lines, wiki = parse(WIKI)
+    diff = SectionDiff(source, wiki)
+    converter = LinkConverter({'faq': 'Faq'})
+
+    text = apply_diff(diff, source_lines, source, wiki_lines, wiki, converter)
+    assert 'Old usage text.' not in text
+    assert '## Usage\nNew usage text, see [[Faq]].\n### Flags' in text
+    # Added after the closest earlier source section the wiki has
+    assert 'Second usage.\n\n## Added\nBrand new.\n## Wiki Notes' in text
+    assert text.endswith('Kept by hand.\n' + FOOTER)
+
+    # After patching, no source section differs from or is missing in the page
+    _, sections = parse(text)
+    assert not SectionDiff(source, sections).changed
+    assert not SectionDiff(source, sections).added
+
+
+def test_prune_drops_wiki_only_sections():
+    source_lines, source = parse(SOURCE)
+    wiki_lines, wiki = parse(WIKI)
+    diff = SectionDiff(source, wiki)
+    text = apply_diff(diff, source_lines, source, wiki_lines, wiki, LinkConverter({}), prune=True)
+    assert 'Wiki Notes' not in text and 'Kept by hand.' not in text
+    assert text.endswith('Brand new.\n' + FOOTER)
@@ -0,0 +1,115 @@
+"""staleness.py modes on a tiny corpus of source/wiki pairs."""
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from convert_links import FOOTER
+from corpus_index import CorpusIndex
+from scan_cache import ScanCache
+from staleness import StalenessChecker, compute_fingerprint, normalize_line, similarity
+
+SOURCE = ('# Setup Guide\n'
+          'Read the [FAQ](../FAQ.md#why) first.\n'
+          '* one\n- two\n\n\n'
+          'Done.  \t\n')
+# The same page as sync.py writes it
+SYNCED = ('# Setup Guide\n\n'
+          'Read the [[Faq#why]] first.\n'
+          '* one\n* two\n\n'
+          'Done.\n' + FOOTER)
+EDITED = '# Setup Guide\n\nRead the [[Faq]] first.\n* one\n* two\n\nDone, for now.\n'
+
+OLD = 1_600_000_000
+
+
+def write(path, text, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    if mtime:
+        os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / 'repo'
+    write(root / 'docs' / 'SETUP.md', SOURCE, OLD + 100)
+    write(root / 'docs' / 'EDITED.md', SOURCE, OLD + 100)
+    write(root / 'wiki' / 'Setup.md', SYNCED, OLD)
+    write(root / 'wiki' / 'Edited.md', EDITED, OLD + 200)
+    return root
+
+
+def pairs(index):
+    return [(index.docs_files[i], index.wiki[name])
+            for i, name in [(1, 'Setup.md'), (0, 'Edited.md')]]
+
+
+def check_all(mode, index):
+    checker = StalenessChecker(mode, index)
+    checker.prepare(pairs(index))
+    return [checker.check(source, wiki) for source, wiki in pairs(index)], checker
+
+
+def test_link_forms_normalize_alike():
+    assert normalize_line('See [the FAQ](../guides/FAQ.md#why).  ') == 'See [[faq]].'
+    assert normalize_line('See [[Faq#why]].') == 'See [[faq]].'
+    assert normalize_line('See [[Read this|FAQ]].') == 'See [[faq]].'
+
+
+def test_synced_page_fingerprints_like_its_source(root):
+    source = compute_fingerprint(str(root / 'docs' / 'SETUP.md'))
+    assert compute_fingerprint(str(root / 'wiki' / 'Setup.md')).digest == source.digest
+    edited = compute_fingerprint(str(root / 'wiki' / 'Edited.md'))
+    assert 0 < similarity(source, edited) < 1
+
+
+def test_mtime_mode(root):
+    index = CorpusIndex(str(root))
+    results, _ = check_all('mtime', index)
+    assert results == [('out-of-date', None), ('up-to-date', None)]
+
+
+def test_content_mode_reuses_cached_fingerprints(root, tmp_path):
+    cache = ScanCache(str(tmp_path / 'cache.sqlite'))
+    index = CorpusIndex(str(root), cache)
+    results, checker = check_all('content', index)
+    assert results[0] == ('identical', 1.0)
+    assert results[1][0] == 'diverged' and 0 < results[1][1] < 1
+    # Both sources share a digest, so three files were fingerprinted
+    assert checker.store.computed == 3
+
+    index = CorpusIndex(str(root), ScanCache(str(tmp_path / 'cache.sqlite')))
+    again, checker = check_all('content', index)
+    assert again == results
+    assert checker.store.computed == 0
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+def test_git_mode_uses_blobs_and_commit_times(root):
+    def git(*args, when):
+        env = dict(os.environ, GIT_AUTHOR_NAME='Test', GIT_AUTHOR_EMAIL='test@example.com',
+                   GIT_COMMITTER_NAME='Test', GIT_COMMITTER_EMAIL='test@example.com',
+                   GIT_AUTHOR_DATE=f'{when} +0000', GIT_COMMITTER_DATE=f'{when} +0000',
+                   GIT_CONFIG_NOSYSTEM='1', HOME=str(root))
+        subprocess.run(['git', *args], cwd=root, env=env, check=True, capture_output=True)
+
+    git('init', '-q', when=OLD)
+    git('add', 'wiki', when=OLD)
+    git('commit', '-q', '-m', 'wiki', when=OLD)
+    git('add', 'docs', when=OLD + 500)
+    git('commit', '-q', '-m', 'docs', when=OLD + 500)
+    # Make the wiki copy of SETUP.md byte-identical to its source, left uncommitted
+    write(root / 'wiki' / 'Setup.md', SOURCE, OLD)
+    index = CorpusIndex(str(root))
+    results, checker = check_all('git', index)
+    assert results == [('identical', None), ('out-of-date', None)]
+    assert checker.mtime(index.docs_files[0]) == OLD + 500
+    # Uncommitted edits count from their mtime
+    assert checker.mtime(index.wiki['Setup.md']) == pytest.approx(OLD)
+
+
+def test_unknown_mode(root):
+    with pytest.raises(ValueError):
+        StalenessChecker('size', CorpusIndex(str(root)))
@@ -0,0 +1,54 @@
+"""sync.py output against the wiki_transform.py pipeline, on a tiny repository."""
+import sys
+
+import pytest
+
+import sync
+import wiki_transform
+from convert_links import FOOTER
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / 'docs').mkdir()
+    (tmp_path / 'wiki').mkdir()
+    (tmp_path / 'docs' / 'SETUP.md').write_text(
+        '#Setup Guide\nRead the [FAQ](../FAQ.md) first.\n* one\n- two\n\n\n\nDone.  \t\n',
+        encoding='utf-8')
+    (tmp_path / 'FAQ.md').write_text('# FAQ\n\n## Why?\nBecause.', encoding='utf-8')
+    (tmp_path / 'wiki' / 'Home.md').write_text('# Home\n\nWelcome.\n', encoding='utf-8')
+    return tmp_path
+
+
+def run_main(module, monkeypatch, capsys, root, *extra):
+    monkeypatch.setattr(sys, 'argv', [f'{module.__name__}.py', '--root', str(root),
+                                      '--cache-path', str(root / 'cache.sqlite'), *extra])
+    module.main()
+    return capsys.readouterr().out
+
+
+def snapshot(root):
+    return {p: p.read_bytes() for p in sorted((root / 'wiki').rglob('*.md'))}
+
+
+@pytest.mark.parametrize('staleness', ['mtime', 'content'])
+def test_sync_transform_sync_writes_nothing(root, monkeypatch, capsys, staleness):
+    first = run_main(sync, monkeypatch, capsys, root, '--staleness', staleness)
+    assert 'Synced 2 of 2 pages' in first
+    synced = snapshot(root)
+    page = next(text for path, text in synced.items() if path.name == 'Setup.md')
+    assert page.decode('utf-8').endswith('\n' + FOOTER)
+
+    run_main(wiki_transform, monkeypatch, capsys, root)
+    assert snapshot(root) == synced
+
+    third = run_main(sync, monkeypatch, capsys, root, '--staleness', staleness)
+    assert 'Synced 0 of' in third
+    assert snapshot(root) == synced
+
+
+def test_add_footer_accepts_either_home_link():
+    assert sync.add_footer('# Page\n') == '# Page\n' + FOOTER
+    assert sync.add_footer('# Page\n' + FOOTER) == '# Page\n' + FOOTER
+    converted = '# Page\n\n---\n\n[[Home]]\n'
+    assert sync.add_footer(converted) == converted
@@ -0,0 +1,83 @@
+"""watcher.py inotify events for files and wiki sub-directories."""
+import os
+import shutil
+
+import pytest
+
+from watcher import InotifyWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    (tmp_path / 'docs').mkdir()
+    (tmp_path / 'wiki' / 'guides' / 'deep').mkdir(parents=True)
+    (tmp_path / 'wiki' / 'guides' / 'Setup.md').write_text('# Setup\n', encoding='utf-8')
+    (tmp_path / 'wiki' / 'guides' / 'deep' / 'More.md').write_text('# More\n', encoding='utf-8')
+    try:
+        watcher = InotifyWatcher(str(tmp_path))
+    except (OSError, AttributeError):
+        pytest.skip('inotify is not available')
+    yield watcher
+    watcher.close()
+
+
+def read_all(watcher):
+    """Merge reads until the queue is empty; None if any read asked for a rescan."""
+    changed = set()
+    while True:
+        more = watcher.read(0.1)
+        if more is None:
+            changed = None
+        elif not more:
+            return changed
+        elif changed is not None:
+            changed |= more
+
+
+def watched(watcher, root, rel_path):
+    return os.path.join(str(root), rel_path) in watcher.dirs.values()
+
+
+def test_file_edits_are_reported(watcher, tmp_path):
+    page = tmp_path / 'wiki' / 'guides' / 'Setup.md'
+    page.write_text('# Setup, edited\n', encoding='utf-8')
+    (tmp_path / 'docs' / 'NEW.md').write_text('# New\n', encoding='utf-8')
+    assert read_all(watcher) == {str(page), str(tmp_path / 'docs' / 'NEW.md')}
+
+
+def test_directory_moved_in_reports_its_files(watcher, tmp_path):
+    outside = tmp_path / 'outside'
+    (outside / 'sub').mkdir(parents=True)
+    (outside / 'sub' / 'Page.md').write_text('# Page\n', encoding='utf-8')
+    read_all(watcher)
+    os.rename(outside, tmp_path / 'wiki' / 'moved')
+    assert read_all(watcher) == {str(tmp_path / 'wiki' / 'moved' / 'sub' / 'Page.md')}
+    assert watched(watcher, tmp_path, 'wiki/moved/sub')
+
+
+def test_directory_moved_out_asks_for_rescan(watcher, tmp_path):
+    os.rename(tmp_path / 'wiki' / 'guides', tmp_path / 'guides-old')
+    assert read_all(watcher) is None
+    assert not any('guides' in d for d in watcher.dirs.values())
+    # The moved directory no longer reports under its old path
+    (tmp_path / 'guides-old' / 'Setup.md').write_text('# Gone\n', encoding='utf-8')
+    assert read_all(watcher) == set()
+
+
+def test_directory_renamed_within_wiki_is_watched_again(watcher, tmp_path):
+    os.rename(tmp_path / 'wiki' / 'guides', tmp_path / 'wiki' / 'howto')
+    assert read_all(watcher) is None
+    assert watched(watcher, tmp_path, 'wiki/howto/deep')
+    assert not watched(watcher, tmp_path, 'wiki/guides')
+    page = tmp_path / 'wiki' / 'howto' / 'deep' / 'More.md'
+    page.write_text('# More, edited\n', encoding='utf-8')
+    assert read_all(watcher) == {str(page)}
+
+
+def test_deleted_directory_reports_its_files_and_drops_its_watches(watcher, tmp_path):
+    count = len(watcher.dirs)
+    shutil.rmtree(tmp_path / 'wiki' / 'guides')
+    # Deleted files raise their own events, so no rescan is needed
+    assert read_all(watcher) == {str(tmp_path / 'wiki' / 'guides' / 'Setup.md'),
+                                 str(tmp_path / 'wiki' / 'guides' / 'deep' / 'More.md')}
+    assert len(watcher.dirs) == count - 2
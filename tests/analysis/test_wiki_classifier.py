@@ -0,0 +1,90 @@
+"""wiki_classifier.py keyword automaton and scoring on a small config."""
+import json
+import re
+
+import pytest
+
+from wiki_classifier import KeywordAutomaton, WikiClassifier
+
+KEYWORDS = ['he', 'she', 'his', 'hers', 'api', 'rapid', 'a']
+
+
+def naive_count(keywords, text, word_start=False):
+    counts = {}
+    for i, keyword in enumerate(keywords):
+        prefix = r'(?<![^\W_])' if word_start else ''
+        hits = len(re.findall(f'{prefix}(?=({re.escape(keyword)}))', text))
+        if hits:
+            counts[i] = hits
+    return counts
+
+
+@pytest.mark.parametrize('text', ['ushers', 'she sells his hershey', 'rapid api, a rapidapi',
+                                  'aaa', '', 'x_api 2api'])
+@pytest.mark.parametrize('word_start', [False, True])
+def test_automaton_matches_naive_count(text, word_start):
+    automaton = KeywordAutomaton(KEYWORDS)
+    assert automaton.count(text, word_start) == naive_count(KEYWORDS, text, word_start)
+
+
+def test_overlapping_keywords():
+    counts = KeywordAutomaton(KEYWORDS).count('ushers')
+    assert {KEYWORDS[i]: n for i, n in counts.items()} == {'she': 1, 'he': 1, 'hers': 1}
+
+
+@pytest.fixture
+def classifier(tmp_path):
+    config = {
+        'fields': {'filename': 10, 'headings': 1, 'body': 0.5},
+        'hit_cap': 3,
+        'min_score': 20,
+        'categories': [
+            {'path': 'guides', 'keywords': {'guide': 3, 'tutorial': 3, 'setup': 2}},
+            {'path': 'reference', 'keywords': {'API': 3, 'reference': 3, 'setup': 2}},
+            {'path': '', 'keywords': {'faq': 3}},
+        ],
+    }
+    path = tmp_path / 'categories.json'
+    path.write_text(json.dumps(config), encoding='utf-8')
+    return WikiClassifier(str(path))
+
+
+def test_filename_matches_substrings(classifier):
+    assert classifier.count_filename('docs/COMMANDREFERENCE.md') == {'reference': 1}
+    assert classifier.count_filename('Quick_Setup-Guide.md') == {'setup': 1, 'guide': 1}
+    result = classifier.classify('docs/APIREFERENCE.md')
+    assert result.category == 'reference'
+    assert result.scores == {'guides': 0.0, 'reference': 60.0, '': 0.0}
+
+
+def test_text_matches_word_starts_only(classifier):
+    assert classifier.count_text('Rapid API setup, Guides') == {'api': 1, 'setup': 1, 'guide': 1}
+
+
+def test_hits_are_capped(classifier):
+    body = classifier.count_text('guide ' * 10 + 'api api')
+    assert body == {'guide': 10, 'api': 2}
+    result = classifier.classify('NOTES.md', {'body': body})
+    # 0.5 x 3 x min(10, 3) against 0.5 x 3 x 2, both below min_score
+    assert result.scores['guides'] == 4.5
+    assert result.scores['reference'] == 3.0
+    assert result.category is None
+    assert result.explain().startswith('root (best: guides, below min score) 4.5:')
+
+
+def test_ties_go_to_the_first_section(classifier):
+    result = classifier.classify('SETUP.md')
+    assert result.scores['guides'] == result.scores['reference'] == 20.0
+    assert result.category == 'guides'
+
+
+def test_empty_path_keeps_page_at_root(classifier):
+    result = classifier.classify('FAQ.md')
+    assert result.category == ''
+    assert result.explain() == "root 30: filename 'faq' x1 (30)"
+
+
+def test_no_hits(classifier):
+    result = classifier.classify('NOTES.md', {'headings': {}, 'body': {}})
+    assert result.category is None
+    assert result.explain() == 'no keywords matched'
@@ -0,0 +1,100 @@
+"""wiki_transform.py passes on short markdown samples."""
+import pytest
+
+from convert_links import FOOTER
+from wiki_transform import (PASS_NAMES, HeadingPass, ListMarkerPass, TocPass, WhitespacePass,
+                            build_passes, code_mask, run_passes)
+
+SAMPLES = [
+    '#Title\nText\n##  Sub\n   ### Deep\n```\n#code\n```\n',
+    'a  \nb \t\n\n\n\nc\n```\nx   \n\n\n```\n\n\n',
+    '- a\n* b\n  + c\n\n***\n```\n* code\n```\n',
+    '# T\n\n<!-- toc -->\n\n## A\n### B\n#### C\n## A\n',
+    '---\ntitle: x  \n---\n#Intro\n[Home](Home.md) and [Guide](guides/Quick-Start.md#setup)',
+    '# Crlf\r\ntext  \t\r\n\r\n\r\n## Part\r\n* a\r\n- b',
+    '---\n#not front matter\n',
+    '#Nested\n````md\n```\n#code\n[Home](Home.md)\n````\n#After\n',
+    'See [Home](Home.md).\n' + FOOTER,
+    ''
+]
+
+
+@pytest.fixture
+def wiki_dir(tmp_path):
+    (tmp_path / 'guides').mkdir()
+    for path in ('Home.md', 'guides/Quick-Start.md'):
+        (tmp_path / path).write_text('# Page\n', encoding='utf-8')
+    return str(tmp_path)
+
+
+def test_headings():
+    text, changes = HeadingPass().apply(SAMPLES[0])
+    assert text == '# Title\n\nText\n\n## Sub\n\n### Deep\n\n```\n#code\n```\n'
+    assert changes == 7
+
+
+def test_whitespace_keeps_hard_breaks_and_code():
+    text, _ = WhitespacePass().apply(SAMPLES[1])
+    assert text == 'a  \nb\n\nc\n```\nx   \n\n\n```\n'
+
+
+def test_list_markers_follow_the_first_one():
+    text, changes = ListMarkerPass().apply(SAMPLES[2])
+    assert text == '- a\n- b\n  - c\n\n***\n```\n* code\n```\n'
+    assert changes == 2
+
+
+def test_toc_fills_placeholder_only():
+    text, changes = TocPass(3).apply(SAMPLES[3])
+    assert changes == 1
+    assert '- [A](#a)\n  - [B](#b)\n- [A](#a-1)\n' in text
+    assert '(#c)' not in text
+    assert TocPass(3).apply(text) == (text, 0)
+    assert TocPass(3).apply(SAMPLES[0]) == (SAMPLES[0], 0)
+
+
+def test_line_endings_are_kept():
+    passes = build_passes(['headings', 'whitespace', 'lists'], None)
+    text, changes = run_passes(passes, SAMPLES[5])
+    assert text == '# Crlf\r\n\r\ntext\r\n\r\n## Part\r\n\r\n* a\r\n* b\r\n'
+    assert changes == {'headings': 2, 'whitespace': 3, 'lists': 1}
+
+
+def test_front_matter_is_skipped_only_when_closed():
+    text, _ = HeadingPass().apply(SAMPLES[4])
+    assert text.startswith('---\ntitle: x  \n---\n\n# Intro\n')
+    text, _ = HeadingPass().apply(SAMPLES[6])
+    assert text == '---\n\n# not front matter\n'
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_all_passes_are_idempotent(sample, wiki_dir):
+    passes = build_passes(PASS_NAMES, wiki_dir)
+    once, _ = run_passes(passes, sample)
+    twice, changes = run_passes(passes, once)
+    assert twice == once
+    assert changes == {}
+
+
+def test_links_pass_converts_resolvable_links(wiki_dir):
+    passes = build_passes(['links'], wiki_dir)
+    text, changes = run_passes(passes, SAMPLES[4])
+    assert text.endswith('[[Home]] and [[Quick Start#setup]]')
+    assert changes == {'links': 2}
+
+
+def test_closing_fence_must_be_as_long_as_the_opener():
+    lines = SAMPLES[7].splitlines(keepends=True)
+    assert code_mask(lines) == [False, True, True, True, True, True, False]
+    assert code_mask(['```\n', '```js\n', 'x\n', '```\n']) == [True, True, True, True]
+    text, _ = HeadingPass().apply(SAMPLES[7])
+    assert '#code\n[Home](Home.md)\n' in text
+    assert text.endswith('````\n\n# After\n')
+
+
+def test_links_pass_skips_code_blocks_and_footer(wiki_dir):
+    passes = build_passes(['links'], wiki_dir)
+    assert run_passes(passes, SAMPLES[7]) == (SAMPLES[7], {})
+    text, changes = run_passes(passes, SAMPLES[8])
+    assert text == 'See [[Home]].\n' + FOOTER
+    assert changes == {'links': 1}
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""Compare the JSDoc and exported symbols of src/**/*.js with the API reference pages.
+
+Symbols are pulled from a token stream rather than a full JavaScript parse:
+the tokenizer only understands enough syntax (comments, strings, template
+literals, regex literals, braces) to find top-level functions and classes,
+class methods, JSDoc typedefs and module.exports. *.backup copies are not
+scanned. Extracted symbols are cached per content hash, so a rerun after a
+one-file change re-extracts only that file.
+
+A symbol belongs to the API if it is exported, carries a JSDoc block, is a
+JSDoc typedef or is a public method of such a class. The report lists API
+symbols missing from either reference page, and documented signatures that
+no longer match anything in the code.
+"""
+import re
+import sys
+
+from code_index import extract_all, read_bytes, scan_files
+from corpus_index import build_parser, load_corpus
+from headings import FENCE_RE
+
+SOURCE_DIR = 'src'
+SOURCE_SUFFIXES = ('.js',)
+REFERENCE_PAGES = ('docs/API_REFERENCE.md', 'wiki/developer/API-Reference.md')
+
+TOKEN_RE = re.compile(r"""
+    (?P<space>[ \t\r\f\v\ufeff]+)
+  | (?P<newline>\n)
+  | (?P<doc>/\*\*(?!/).*?\*/)
+  | (?P<comment>/\*.*?\*/|//[^\n]*)
+  | (?P<string>'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*")
+  | (?P<name>[A-Za-z_$\u00c0-\uffff][\w$\u00c0-\uffff]*)
+  | (?P<number>\.?\d[\w.]*)
+  | (?P<punct>=>|\.\.\.|\?\.|.)
+""", re.S | re.X)
+REGEX_RE = re.compile(r'/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-z]*')
+TEMPLATE_RE = re.compile(r'(?:\\.|\$(?!\{)|[^`\\$])*(`|\$\{)', re.S)
+
+# After these a '/' starts a regex literal rather than a division
+REGEX_AFTER_PUNCT = set('(,=:[!&|?{};+-*%<>~^') | {'=>'}
+REGEX_AFTER_NAMES = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+                     'void', 'throw', 'instanceof', 'yield', 'await'}
+SKIPPED = ('space', 'newline', 'comment')
+
+NOT_METHODS = {'if', 'for', 'while', 'switch', 'catch', 'function', 'return', 'super'}
+METHOD_PREFIXES = {'{', '}', ';', 'static', 'async', 'get', 'set', '*'}
+DOC_TAG_RE = re.compile(r'@(typedef|callback)\b(?:\s*\{[^}]*\})?\s*([A-Za-z_$][\w$]*)')
+
+CODE_SPAN_RE = re.compile(r'`([^`]+)`')
+SIGNATURE_RE = re.compile(r'^(new\s+)?([A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)\s*\(.*\)\s*;?$')
+TYPE_NAME_RE = re.compile(r'^[A-Z][\w$]*$')
+CLASS_HEADING_RE = re.compile(r'^#+\s+([A-Z][\w$]*) Class\s*$')
+HEADING_RE = re.compile(r'^#{1,6}\s')
+
+
+def tokenize(text):
+    """Yield (kind, value, line) tokens of JavaScript source, comments included.
+
+    Template literal text is yielded as one 'string' token per span between
+    substitutions; the substitutions themselves are tokenized as code.
+    """
+    pos = 0
+    line = 1
+    end = len(text)
+    braces = []
+    previous = None
+
+    def template(pos, line):
+        match = TEMPLATE_RE.match(text, pos)
+        if not match:
+            # Unterminated template: the rest of the file is its text
+            return end, line + text.count('\n', pos), None
+        if match.group(1) == '${':
+            braces.append('template')
+        return match.end(), line + match.group(0).count('\n'), match.group(0)
+
+    while pos < end:
+        match = TOKEN_RE.match(text, pos)
+        kind = match.lastgroup
+        value = match.group(0)
+
+        if kind == 'punct':
+            if value == '`' or (value == '}' and braces and braces[-1] == 'template'):
+                if value == '}':
+                    braces.pop()
+                start_line = line
+                pos, line, span = template(pos + 1, line)
+                previous = ('string', span)
+                yield 'string', span, start_line
+                continue
+            if value == '{':
+                braces.append('{')
+            elif value == '}' and braces:
+                braces.pop()
+            elif value == '/' and (previous is None
+                                   or previous[0] == 'punct' and previous[1] in REGEX_AFTER_PUNCT
+                                   or previous[0] == 'name' and previous[1] in REGEX_AFTER_NAMES):
+                regex = REGEX_RE.match(text, pos)
+                if regex:
+                    kind, value = 'regex', regex.group(0)
+
+        yield kind, value, line
+        pos += len(value)
+        line += value.count('\n')
+        if kind not in SKIPPED:
+            previous = (kind, value)
+
+
+def doc_text(comment):
+    """Strip the comment markers and leading asterisks of a JSDoc block."""
+    lines = comment[3:-2].split('\n')
+    return '\n'.join(l.strip().lstrip('*').strip() for l in lines).strip()
+
+
+def matching(tokens, i):
+    """Return the index just past the bracket group that opens at tokens[i]."""
+    opening = tokens[i][1]
+    closing = {'(': ')', '[': ']', '{': '}'}[opening]
+    depth = 0
+    for j in range(i, len(tokens)):
+        value = tokens[j][1]
+        if value == opening:
+            depth += 1
+        elif value == closing:
+            depth -= 1
+            if not depth:
+                return j + 1
+    return len(tokens)
+
+
+def extract_symbols(text):
+    """Return {'symbols': [[name, kind, line, has_jsdoc, class]], 'exports': [names]}."""
+    tokens = [t for t in tokenize(text) if t[0] not in SKIPPED]
+    symbols = []
+    exports = []
+    depth = 0
+    classes = []
+    pending_class = None
+    doc = None
+
+    def value(j):
+        return tokens[j][1] if j < len(tokens) else None
+
+    def add(name, kind, line, parent=None, has_jsdoc=None):
+        nonlocal doc
+        symbols.append([name, kind, line, doc is not None if has_jsdoc is None else has_jsdoc,
+                        parent])
+        doc = None
+
+    i = 0
+    while i < len(tokens):
+        kind, tok, line = tokens[i]
+        if kind == 'doc':
+            comment = doc_text(tok)
+            tags = DOC_TAG_RE.findall(comment)
+            for _, name in tags:
+                add(name, 'typedef', line, has_jsdoc=True)
+            doc = None if tags else comment
+            i += 1
+            continue
+
+        if kind == 'punct' and tok in ('{', '}', ';'):
+            if tok == '{':
+                depth += 1
+                if pending_class:
+                    classes.append((pending_class, depth))
+                    pending_class = None
+            elif tok == '}':
+                if classes and classes[-1][1] == depth:
+                    classes.pop()
+                depth -= 1
+            doc = None
+            i += 1
+            continue
+
+        in_class = classes and classes[-1][1] == depth
+        if in_class and kind == 'name' and value(i + 1) == '(' and tok not in NOT_METHODS \
+                and (i == 0 or value(i - 1) in METHOD_PREFIXES or tokens[i - 1][0] == 'doc'):
+            add(tok, 'method', line, classes[-1][0])
+        elif depth == 0 and kind == 'name':
+            if tok == 'function':
+                j = i + 2 if value(i + 1) == '*' else i + 1
+                if j < len(tokens) and tokens[j][0] == 'name':
+                    add(tokens[j][1], 'function', line)
+                    i = j
+            elif tok == 'class' and i + 1 < len(tokens) and tokens[i + 1][0] == 'name':
+                add(tokens[i + 1][1], 'class', line)
+                pending_class = tokens[i + 1][1]
+                i += 1
+            elif tok in ('const', 'let', 'var') and value(i + 2) == '=' \
+                    and tokens[i + 1][0] == 'name':
+                name = tokens[i + 1][1]
+                j = i + 3
+                if value(j) == 'async':
+                    j += 1
+                if value(j) == 'function':
+                    add(name, 'function', line)
+                elif value(j) == 'class':
+                    add(name, 'class', line)
+                    pending_class = name
+                elif value(j) == '(' and value(matching(tokens, j)) == '=>':
+                    add(name, 'function', line)
+                elif j < len(tokens) and tokens[j][0] == 'name' and value(j + 1) == '=>':
+                    add(name, 'function', line)
+                else:
+                    doc = None
+                i += 2
+            elif tok == 'module' and value(i + 1) == '.' and value(i + 2) == 'exports':
+                if value(i + 3) == '=':
+                    if value(i + 4) == '{':
+                        close = matching(tokens, i + 4)
+                        inner = 0
+                        for j in range(i + 5, close - 1):
+                            if tokens[j][1] in ('(', '[', '{'):
+                                inner += 1
+                            elif tokens[j][1] in (')', ']', '}'):
+                                inner -= 1
+                            elif not inner and tokens[j][0] == 'name' \
+                                    and value(j - 1) in ('{', ',') and value(j + 1) in (',', '}', ':', '('):
+                                exports.append(tokens[j][1])
+                    elif i + 4 < len(tokens) and tokens[i + 4][0] == 'name':
+                        exports.append(tokens[i + 4][1])
+                elif value(i + 3) == '.' and value(i + 5) == '=':
+                    exports.append(value(i + 4))
+                i += 3
+            elif tok == 'exports' and value(i + 1) == '.' and value(i + 3) == '=' \
+                    and (i == 0 or value(i - 1) != '.'):
+                exports.append(value(i + 2))
+                i += 2
+        i += 1
+    return {'symbols': symbols, 'exports': exports}
+
+
+def extract_file(code_file):
+    return extract_symbols(read_bytes(code_file.full_path).decode('utf-8', errors='replace'))
+
+
+class ApiSymbol:
+    """A documented-worthy symbol and every file that declares it."""
+
+    __slots__ = ('name', 'kind', 'locations', 'jsdoc')
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.locations = []
+        self.jsdoc = False
+
+    @property
+    def bare_name(self):
+        return self.name.rsplit('.', 1)[-1]
+
+
+def api_symbols(files, extracted):
+    """Return ({qualified name: ApiSymbol}, set of every bare symbol name in the code)."""
+    api = {}
+    names = set()
+    for f in files:
+        data = extracted[f.digest]
+        exported = set(data['exports'])
+        public_classes = set()
+        for name, kind, line, has_jsdoc, parent in data['symbols']:
+            names.add(name)
+            if parent is None:
+                is_api = name in exported or has_jsdoc or kind == 'typedef'
+                if is_api and kind == 'class':
+                    public_classes.add(name)
+                qualified = name
+            else:
+                is_api = (parent in public_classes and not name.startswith('_')
+                          and name != 'constructor')
+                qualified = f'{parent}.{name}'
+            if not is_api:
+                continue
+            symbol = api.get(qualified)
+            if symbol is None:
+                symbol = api[qualified] = ApiSymbol(qualified, kind)
+            symbol.locations.append((f.path, line))
+            symbol.jsdoc = symbol.jsdoc or has_jsdoc
+    return api, names
+
+
+def parse_references(full_path):
+    """Return [line, text, name] for each API symbol a reference page documents.
+
+    Signatures in inline code (`start()`, `new Bot(options)`), type names in
+    headings (`ConnectionError`, "Bot Class") and constructor calls on their
+    own line in code blocks are taken as references.
+    """
+    references = []
+    fence = None
+    with open(full_path, 'rb') as f:
+        for number, raw in enumerate(f, 1):
+            fence_match = FENCE_RE.match(raw)
+            line = raw.decode('utf-8', errors='replace').strip()
+            if fence:
+                if fence_match and fence_match.group(1)[:1] == fence[:1]:
+                    fence = None
+                    continue
+                match = SIGNATURE_RE.match(line)
+                if match and match.group(1):
+                    references.append([number, line, match.group(2)])
+                continue
+            if fence_match:
+                fence = fence_match.group(1)
+                continue
+
+            heading = HEADING_RE.match(line)
+            match = CLASS_HEADING_RE.match(line)
+            if match:
+                references.append([number, match.group(1), match.group(1)])
+            for span in CODE_SPAN_RE.findall(line):
+                span = span.strip()
+                match = SIGNATURE_RE.match(span)
+                if match:
+                    references.append([number, span, match.group(2).rsplit('.', 1)[-1]])
+                elif heading and TYPE_NAME_RE.match(span):
+                    references.append([number, span, span])
+    return references
+
+
+def reference_page(index, rel_path):
+    if rel_path.startswith('wiki/'):
+        return index.wiki.get(rel_path[len('wiki/'):])
+    return next((f for f in index.source_files if f.path == rel_path), None)
+
+
+def main():
+    args = build_parser('Report drift between src/**/*.js and the API reference pages.').parse_args()
+    index = load_corpus(args)
+
+    files = scan_files(args.root, SOURCE_DIR, SOURCE_SUFFIXES, recursive=True,
+                       cache=index.cache, workers=args.workers)
+    extracted = extract_all(files, 'jsdoc', extract_file, index.cache, args.workers)
+    api, code_names = api_symbols(files, extracted)
+
+    pages = {}
+    for rel_path in REFERENCE_PAGES:
+        page = reference_page(index, rel_path)
+        if page is None:
+            print(f"warning: reference page not found: {rel_path}", file=sys.stderr)
+            continue
+        pages[rel_path] = extract_all([page], 'api-refs', lambda p: parse_references(p.full_path),
+                                      index.cache)[page.digest]
+    documented = {rel_path: {name for _, _, name in refs} for rel_path, refs in pages.items()}
+
+    undocumented = [s for s in api.values()
+                    if any(s.bare_name not in names for names in documented.values())]
+    stale = [(rel_path, line, text) for rel_path, refs in pages.items()
+             for line, text, name in refs if name not in code_names]
+
+    print("# API Reference Drift Report")
+    print()
+    print("## Summary")
+    print(f"- JavaScript files scanned: {len(files)}")
+    print(f"- API symbols in code: {len(api)} ({sum(s.jsdoc for s in api.values())} with JSDoc)")
+    for rel_path, names in documented.items():
+        print(f"- Symbols referenced by {rel_path}: {len(names)}")
+    print(f"- API symbols missing from a reference page: {len(undocumented)}")
+    print(f"- References to symbols not found in the code: {len(stale)}")
+    print()
+
+    print("## Undocumented Symbols")
+    print("| Symbol | Kind | Defined In | JSDoc | " + " | ".join(pages) + " |")
+    print("|--------|------|------------|-------|" + "|".join('-' * (len(p) + 2) for p in pages) + "|")
+    for symbol in undocumented:
+        where = ', '.join(f'{path}:{line}' for path, line in symbol.locations)
+        marks = ' | '.join('✅' if symbol.bare_name in documented[p] else '❌' for p in pages)
+        print(f"| {symbol.name} | {symbol.kind} | {where} | {'✅' if symbol.jsdoc else '❌'} | {marks} |")
+    print()
+
+    print("## Stale References")
+    print("| Page | Line | Reference |")
+    print("|------|------|-----------|")
+    for rel_path, line, text in stale:
+        print(f"| {rel_path} | {line} | `{text}` |")
+
+if __name__ == "__main__":
+    main()
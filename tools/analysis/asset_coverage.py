@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Report duplicated, unreferenced and stale images and diagram renders.
+
+Images and PlantUML sources under docs/, wiki/ and screenshots/ are listed
+with their content hashes (cached in the scan cache like code files), so
+identical copies are found by hash. For PNGs only the chunk headers are
+read: IHDR for the dimensions and PlantUML's 'plantuml' iTXt chunk for the
+embedded diagram source, seeking past the image data without decoding it.
+
+A render is stale when its embedded source no longer matches the .puml file
+of the same name. Renders without an embedded source fall back to mtimes
+(weaker, since checkouts reset them) and are stale when older than the .puml.
+
+An image is unreferenced when no markdown page links to it.
+"""
+import os
+import posixpath
+import re
+import struct
+import zlib
+
+from code_index import extract_all, read_bytes, scan_files
+from corpus_index import build_parser, content_digest, load_corpus
+
+ASSET_DIRS = ('docs', 'wiki', 'screenshots')
+IMAGE_SUFFIXES = ('.png', '.gif', '.jpg', '.jpeg', '.svg', '.webp')
+DIAGRAM_SUFFIX = '.puml'
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+GIF_SIGNATURES = (b'GIF87a', b'GIF89a')
+PNG_CHUNK = struct.Struct('>I4s')
+
+IMAGE_LINK_RE = re.compile(r'!?\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)'
+                           r'|<img\s[^>]*\bsrc=["\']([^"\']+)["\']', re.I)
+
+
+def normalize_diagram(text):
+    """Reduce PlantUML source to its first diagram, without trailing spaces.
+
+    PlantUML embeds the source in a render followed by its preprocessed copy
+    and version details, so everything after the first @enduml is dropped.
+    """
+    lines = [line.rstrip() for line in text.replace('\r\n', '\n').split('\n')]
+    end = next((i for i, line in enumerate(lines) if line.strip().startswith('@enduml')),
+               len(lines) - 1)
+    return '\n'.join(lines[:end + 1]).strip()
+
+
+def diagram_digest(text):
+    return content_digest(normalize_diagram(text).encode('utf-8'))
+
+
+def read_itxt(body):
+    """Return (keyword, text) of an iTXt chunk, or None if it is malformed."""
+    try:
+        keyword, rest = body.split(b'\0', 1)
+        compressed = rest[0]
+        _, rest = rest[2:].split(b'\0', 1)
+        _, text = rest.split(b'\0', 1)
+        if compressed:
+            text = zlib.decompress(text)
+    except (ValueError, IndexError, zlib.error):
+        return None
+    return keyword.decode('latin-1'), text.decode('utf-8', errors='replace')
+
+
+def png_info(f):
+    """Return (width, height, embedded PlantUML source or None) from PNG chunk headers."""
+    width = height = source = None
+    while True:
+        header = f.read(PNG_CHUNK.size)
+        if len(header) < PNG_CHUNK.size:
+            break
+        length, kind = PNG_CHUNK.unpack(header)
+        if kind == b'IHDR':
+            width, height = struct.unpack('>II', f.read(8))
+            f.seek(length - 8 + 4, os.SEEK_CUR)
+        elif kind == b'iTXt':
+            itxt = read_itxt(f.read(length))
+            if itxt and itxt[0] == 'plantuml':
+                source = itxt[1]
+            f.seek(4, os.SEEK_CUR)
+        elif kind == b'IEND':
+            break
+        else:
+            # Image data and every other chunk are skipped unread
+            f.seek(length + 4, os.SEEK_CUR)
+    return width, height, source
+
+
+def asset_info(asset):
+    """Return {'format', 'width', 'height', 'source'} for an image or diagram source.
+
+    'source' is the normalized digest of a diagram's PlantUML source: the
+    file itself for .puml, the embedded copy for a PlantUML PNG.
+    """
+    info = {'format': None, 'width': None, 'height': None, 'source': None}
+    if asset.path.endswith(DIAGRAM_SUFFIX):
+        info['format'] = 'puml'
+        info['source'] = diagram_digest(read_bytes(asset.full_path).decode('utf-8', errors='replace'))
+        return info
+    with open(asset.full_path, 'rb') as f:
+        signature = f.read(8)
+        if signature == PNG_SIGNATURE:
+            info['format'] = 'png'
+            width, height, source = png_info(f)
+            info['width'], info['height'] = width, height
+            if source:
+                info['source'] = diagram_digest(source)
+        elif signature[:6] in GIF_SIGNATURES:
+            info['format'] = 'gif'
+            # Logical screen width and height follow the 6-byte signature
+            screen = signature[6:8] + f.read(2)
+            if len(screen) == 4:
+                info['width'], info['height'] = struct.unpack('<HH', screen)
+        elif asset.path.endswith('.svg') and signature.lstrip().startswith((b'<', b'\xef\xbb\xbf<')):
+            info['format'] = 'svg'
+        elif signature[:3] == b'\xff\xd8\xff':
+            info['format'] = 'jpeg'
+        elif signature[:4] == b'RIFF':
+            info['format'] = 'webp'
+    return info
+
+
+def image_refs(page):
+    """Return [line, target] for every image a markdown page links or embeds."""
+    refs = []
+    with open(page.full_path, 'r', encoding='utf-8', errors='replace') as f:
+        for number, line in enumerate(f, 1):
+            for match in IMAGE_LINK_RE.finditer(line):
+                target = (match.group(1) or match.group(2)).split('#')[0].split('?')[0]
+                if target.lower().endswith(IMAGE_SUFFIXES) and '://' not in target:
+                    refs.append([number, target])
+    return refs
+
+
+def page_repo_path(page):
+    return f'wiki/{page.path}' if page.type == 'wiki' else page.path
+
+
+def resolve_ref(page_path, target):
+    """Resolve a link target against the linking page's directory."""
+    if target.startswith('/'):
+        return posixpath.normpath(target.lstrip('/'))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(page_path), target))
+
+
+def find_source(render, diagrams):
+    """Return the .puml a render was made from: same stem, closest directory first."""
+    stem = posixpath.splitext(posixpath.basename(render))[0]
+    candidates = [d for d in diagrams if posixpath.splitext(posixpath.basename(d))[0] == stem]
+    directory = posixpath.dirname(render)
+    top = render.split('/', 1)[0]
+    for rank in (lambda d: posixpath.dirname(d) == directory,
+                 lambda d: d.split('/', 1)[0] == top,
+                 lambda d: True):
+        matches = sorted(d for d in candidates if rank(d))
+        if matches:
+            return matches[0]
+    return None
+
+
+def format_size(size):
+    return f'{size / 1024:.1f} KB' if size >= 1024 else f'{size} B'
+
+
+def main():
+    args = build_parser('Report duplicated, unreferenced and stale images and diagrams.').parse_args()
+    index = load_corpus(args)
+
+    assets = []
+    for directory in ASSET_DIRS:
+        assets += scan_files(args.root, directory, IMAGE_SUFFIXES + (DIAGRAM_SUFFIX,),
+                             recursive=True, cache=index.cache, workers=args.workers)
+    info = extract_all(assets, 'asset-info', asset_info, index.cache, args.workers)
+    pages = index.source_files + index.wiki_files
+    refs = extract_all(pages, 'image-refs', image_refs, index.cache, args.workers)
+
+    images = [a for a in assets if not a.path.endswith(DIAGRAM_SUFFIX)]
+    diagrams = {a.path: a for a in assets if a.path.endswith(DIAGRAM_SUFFIX)}
+    by_path = {a.path: a for a in images}
+
+    referenced = {}
+    broken = []
+    for page in pages:
+        page_path = page_repo_path(page)
+        for line, target in refs[page.digest]:
+            path = resolve_ref(page_path, target)
+            if path in by_path:
+                referenced.setdefault(path, []).append(page_path)
+            elif not os.path.exists(os.path.join(args.root, path)):
+                broken.append((page_path, line, target))
+
+    groups = {}
+    for image in images:
+        groups.setdefault(image.digest, []).append(image)
+    duplicates = [group for group in groups.values() if len(group) > 1]
+    wasted = sum(group[0].size * (len(group) - 1) for group in duplicates)
+
+    invalid = [i for i in images if info[i.digest]['format'] is None]
+    unreferenced = [i for i in images if i.path not in referenced]
+
+    stale = []
+    for image in images:
+        if info[image.digest]['format'] != 'png':
+            continue
+        source_path = find_source(image.path, diagrams)
+        if source_path is None:
+            continue
+        source = diagrams[source_path]
+        embedded = info[image.digest]['source']
+        if embedded is not None:
+            if embedded == info[source.digest]['source']:
+                continue
+            reason = 'content differs from source'
+        elif image.mtime < source.mtime:
+            reason = 'older than source (no embedded source)'
+        else:
+            continue
+        stale.append((image, source_path, reason))
+
+    print("# Asset Coverage Report")
+    print()
+    print("## Summary")
+    print(f"- Images: {len(images)} ({format_size(sum(i.size for i in images))})")
+    print(f"- PlantUML sources: {len(diagrams)}")
+    print(f"- Duplicate image groups: {len(duplicates)} ({format_size(wasted)} in extra copies)")
+    print(f"- Stale renders: {len(stale)}")
+    print(f"- Unreferenced images: {len(unreferenced)} "
+          f"({format_size(sum(i.size for i in unreferenced))})")
+    print(f"- Invalid images: {len(invalid)}")
+    print(f"- Broken image references: {len(broken)}")
+    print()
+
+    print("## Images")
+    print("| Image | Format | Dimensions | Size | Referenced By |")
+    print("|-------|--------|------------|------|---------------|")
+    for image in images:
+        data = info[image.digest]
+        dims = f"{data['width']}×{data['height']}" if data['width'] is not None else 'N/A'
+        pages_ = ', '.join(sorted(set(referenced.get(image.path, [])))) or '-'
+        print(f"| {image.path} | {data['format'] or 'invalid'} | {dims} | "
+              f"{format_size(image.size)} | {pages_} |")
+    print()
+
+    print("## Duplicate Images")
+    print("| Size | Copies |")
+    print("|------|--------|")
+    for group in duplicates:
+        print(f"| {format_size(group[0].size)} | {', '.join(i.path for i in group)} |")
+    print()
+
+    print("## Stale Renders")
+    print("| Render | Source | Reason |")
+    print("|--------|--------|--------|")
+    for image, source_path, reason in stale:
+        print(f"| {image.path} | {source_path} | {reason} |")
+    print()
+
+    print("## Unreferenced Images")
+    for image in unreferenced:
+        print(f"- {image.path} ({format_size(image.size)})")
+    print()
+
+    print("## Invalid Images")
+    for image in invalid:
+        print(f"- {image.path} ({format_size(image.size)})")
+    print()
+
+    print("## Broken Image References")
+    print("| Page | Line | Target |")
+    print("|------|------|--------|")
+    for page_path, line, target in broken:
+        print(f"| {page_path} | {line} | {target} |")
+
+if __name__ == "__main__":
+    main()
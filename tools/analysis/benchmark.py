@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Benchmark the corpus tools against generated synthetic repositories.
+
+Generates root, docs/ and wiki/ trees that look like this repository (naming
+styles, front matter, headings, links, log-normal file sizes, wiki pages
+covering part of the docs) at the requested sizes. Each stage is then timed
+on its own: corpus scan, matching, gap report writing, link conversion (dry
+run) and gap verification. Every size is run with a cold scan cache and
+again with the warm one. Results are printed as JSON so runs can be
+compared over time.
+
+Cold runs start from an empty scan cache. The OS page cache is not dropped,
+because that needs root.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from convert_links import LinkConverter, build_page_index, process_files
+from corpus_index import (DEFAULT_WORKERS, CorpusIndex, scan_tree, suggest_wiki_name,
+                          suggest_wiki_path)
+from final_gap_analysis import GapReport, SummarySink
+from gap_records import CsvSink, feed
+from scan_cache import ScanCache
+from staleness import StalenessChecker
+from verify_gaps import load_gap_rows, verify_rows
+
+DEFAULT_SIZES = (1000, 10000)
+
+# Share of generated files per tree, close to today's repository
+ROOT_SHARE = 0.02
+DOCS_SHARE = 0.30
+# Share of docs/ files that get a wiki page with the same name
+WIKI_COVERAGE = 0.6
+# Share of covered files edited after their wiki page was written
+STALE_SHARE = 0.2
+FRONT_MATTER_SHARE = 0.3
+
+WIKI_SECTIONS = ('guides', 'reference', 'developer', 'troubleshooting', 'community')
+
+VOCABULARY = (
+    'bot discord minecraft plugin server config command event chat player '
+    'inventory combat pathfinding deploy docker install setup guide reference '
+    'api release notes status summary report test feature integration error '
+    'network database cache module build esm migration security changelog '
+    'structure architecture health monitor logging token channel permission '
+    'mining farming trading navigation world block entity'
+).split()
+
+
+def title_words(rng):
+    return rng.sample(VOCABULARY, rng.choice((1, 2, 2, 3, 3, 4)))
+
+
+def unique_name(rng, taken, style):
+    """Return a new file stem in SCREAMING_SNAKE or Title-Kebab style."""
+    words = title_words(rng)
+    if style == 'snake':
+        stem = '_'.join(w.upper() for w in words)
+    else:
+        stem = '-'.join(w.title() for w in words)
+    base = stem
+    n = 2
+    while stem.lower() in taken:
+        stem = f'{base}{"_" if style == "snake" else "-"}{n}'
+        n += 1
+    taken.add(stem.lower())
+    return stem
+
+
+def file_size(rng):
+    """Log-normal file size: median around 3 KB, long tail, at least 200 bytes."""
+    return int(min(max(rng.lognormvariate(8.0, 1.0), 200), 200_000))
+
+
+class CorpusGenerator:
+    """Write a synthetic repository with a fixed seed."""
+
+    def __init__(self, root, seed=0):
+        self.root = root
+        self.rng = random.Random(seed)
+        self.paragraphs = [self._paragraph() for _ in range(512)]
+        self.stale = []
+
+    def _paragraph(self):
+        rng = self.rng
+        return ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(20, 90))) + '.'
+
+    def plan(self, total):
+        """Return (root, docs, wiki) lists of (relative path, title)."""
+        rng = self.rng
+        root_count = max(1, int(total * ROOT_SHARE))
+        docs_count = max(1, int(total * DOCS_SHARE))
+        wiki_count = max(1, total - root_count - docs_count)
+
+        taken = set()
+        root = []
+        for _ in range(root_count):
+            stem = unique_name(rng, taken, 'snake')
+            root.append((f'{stem}.md', stem.replace('_', ' ').title()))
+        docs = []
+        for _ in range(docs_count):
+            stem = unique_name(rng, taken, 'snake')
+            docs.append((f'docs/{stem}.md', stem.replace('_', ' ').title()))
+
+        wiki = []
+        wiki_taken = set()
+        for path, title in docs + root:
+            if len(wiki) >= wiki_count or rng.random() >= WIKI_COVERAGE:
+                continue
+            # Pages created from the gap report land at the suggested path
+            basename = path.rsplit('/', 1)[-1]
+            wiki_path = suggest_wiki_path(basename, 'root' if path == basename else 'docs')
+            wiki_taken.add(suggest_wiki_name(basename).lower())
+            wiki.append((f'wiki/{wiki_path}', title))
+            if rng.random() < STALE_SHARE:
+                self.stale.append(path)
+        while len(wiki) < wiki_count:
+            stem = unique_name(rng, wiki_taken, 'kebab')
+            section = rng.choice(WIKI_SECTIONS + ('',))
+            path = f'wiki/{section}/{stem}.md' if section else f'wiki/{stem}.md'
+            wiki.append((path, stem.replace('-', ' ')))
+        return root, docs, wiki
+
+    def page(self, title, targets, wiki_links):
+        rng = self.rng
+        size = file_size(rng)
+        parts = []
+        if rng.random() < FRONT_MATTER_SHARE:
+            parts.append(f'---\ntitle: {title}\nlayout: page\n---\n')
+        parts.append(f'# {title}\n')
+        written = 0
+        while written < size:
+            if rng.random() < 0.25:
+                parts.append(f'## {" ".join(title_words(rng)).title()}\n')
+            if rng.random() < 0.1:
+                parts.append('```bash\nnpm install\nnpm start\n```\n')
+            paragraph = rng.choice(self.paragraphs)
+            if targets and rng.random() < 0.4:
+                target_path, target_title = rng.choice(targets)
+                if wiki_links and rng.random() < 0.5:
+                    link = f'[[{target_title}]]'
+                else:
+                    link = f'[{target_title}]({target_path.rsplit("/", 1)[-1]})'
+                paragraph = f'See {link} for details. {paragraph}'
+            parts.append(paragraph + '\n')
+            written += len(paragraph)
+        return '\n'.join(parts)
+
+    def generate(self, total):
+        """Write the tree and return the number of files written."""
+        root, docs, wiki = self.plan(total)
+        targets = wiki[:1000]
+        count = 0
+        for entries, wiki_links in ((root, False), (docs, False), (wiki, True)):
+            for path, title in entries:
+                full_path = os.path.join(self.root, path)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                with open(full_path, 'w', encoding='utf-8') as f:
+                    f.write(self.page(title, targets, wiki_links))
+                count += 1
+
+        # Sources edited after their wiki page show up as out-of-date gaps
+        later = time.time() + 60
+        for path in self.stale:
+            os.utime(os.path.join(self.root, path), (later, later))
+        return count
+
+
+class StageTimer:
+    """Wall and CPU time for each named stage."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, func, *args):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        result = func(*args)
+        self.stages[name] = {
+            'wall_seconds': round(time.perf_counter() - wall, 6),
+            'cpu_seconds': round(time.process_time() - cpu, 6)
+        }
+        return result
+
+
+def run_stages(root, cache_path, report_path, workers):
+    """Time every stage once against a generated tree."""
+    timer = StageTimer()
+    cache = ScanCache(cache_path)
+
+    index = timer.run('scan', CorpusIndex, root, cache, workers)
+    report = GapReport(index, StalenessChecker('mtime', index))
+    timer.run('match', lambda: [report.match(s) for s in index.source_files])
+
+    def write_report():
+        with open(report_path, 'w', newline='', encoding='utf-8') as csvfile:
+            feed(report.stream(), [CsvSink(csvfile), SummarySink(io.StringIO(), index)])
+    timer.run('report', write_report)
+
+    def convert():
+        wiki_dir = os.path.join(root, 'wiki')
+        converter = LinkConverter(build_page_index(wiki_dir))
+        paths = [full_path for _, full_path, _ in scan_tree(wiki_dir, recursive=True)]
+        for _ in process_files(converter, paths, workers, dry_run=True):
+            pass
+    timer.run('convert', convert)
+
+    timer.run('verify', lambda: verify_rows(index, load_gap_rows(report_path)))
+
+    result = {
+        'stages': timer.stages,
+        'cache_hits': cache.hits,
+        'cache_misses': cache.misses,
+        'source_files': len(index.source_files),
+        'wiki_files': len(index.wiki_files)
+    }
+    cache.close()
+    return result
+
+
+def benchmark_size(size, workdir, workers, seed, keep):
+    root = tempfile.mkdtemp(prefix=f'corpus-{size}-', dir=workdir)
+    try:
+        started = time.perf_counter()
+        files = CorpusGenerator(root, seed).generate(size)
+        generated = time.perf_counter() - started
+        print(f"Generated {files} files in {generated:.1f} s under {root}", file=sys.stderr)
+
+        cache_path = os.path.join(root, '.bench_cache.sqlite')
+        report_path = os.path.join(root, 'gap_report.csv')
+        runs = {}
+        for label in ('cold', 'warm'):
+            runs[label] = run_stages(root, cache_path, report_path, workers)
+            total = sum(s['wall_seconds'] for s in runs[label]['stages'].values())
+            print(f"  {label}: {total:.3f} s", file=sys.stderr)
+        return {
+            'files': files,
+            'bytes': sum(st.st_size for _, _, st in scan_tree(root, recursive=True)),
+            'generate_seconds': round(generated, 3),
+            'runs': runs
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the corpus tools on synthetic trees.')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated corpus sizes in files, e.g. 1000,10000,100000,1000000 '
+                             f'(default: {",".join(map(str, DEFAULT_SIZES))})')
+    parser.add_argument('--workdir', default=None,
+                        help='directory for generated trees (default: system temp directory)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'threads used by the tools (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed for corpus generation (default: 0)')
+    parser.add_argument('--keep', action='store_true',
+                        help='keep the generated trees instead of deleting them')
+    parser.add_argument('--output', default=None,
+                        help='write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'workers': args.workers,
+        'seed': args.seed,
+        'sizes': [benchmark_size(size, args.workdir, args.workers, args.seed, args.keep)
+                  for size in sizes]
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Check the command, event and configuration docs against the code.
+
+Three kinds of items are harvested:
+- chat and Discord commands (case labels and comparisons inside the
+  handle*Command functions of src/bots/*.js)
+- event handlers and emitted events (.on/.once/.emit with a literal name)
+- configuration keys (dotted key paths of config/*.json and
+  config/*.json.example, variable names of .env.example)
+
+Each file is scanned with one multi-pattern regex pass, and results are
+cached per content hash in the scan cache, so a run on an unchanged tree
+only stats files. The report lists items the reference pages do not mention
+and documented items the code no longer has; --check exits non-zero when
+there are any, for use in a commit hook or CI.
+"""
+import re
+import sys
+
+from api_drift import reference_page
+from code_index import extract_all, read_bytes, scan_files
+from corpus_index import build_parser, load_corpus
+from headings import FENCE_RE
+
+BOT_DIR = 'src/bots'
+CONFIG_DIR = 'config'
+CONFIG_SUFFIXES = ('.json', '.json.example')
+ENV_EXAMPLE = '.env.example'
+# Tool configuration kept in config/ that is not a bot setting
+IGNORED_CONFIG = ('config/jsdoc.json',)
+# Node process signals are not bot events
+IGNORED_EMITTERS = ('process',)
+
+DOC_PAGES = {
+    'commands': ('docs/COMMAND_REFERENCE.md', 'wiki/reference/Commands.md'),
+    'events': ('docs/API_REFERENCE.md', 'wiki/developer/API-Reference.md'),
+    'config': ('docs/CONFIGURATION.md', 'CONFIGURATION.md')
+}
+CATEGORY_TITLES = {'commands': 'Commands', 'events': 'Events', 'config': 'Config Keys'}
+
+CODE_RE = re.compile(r"""
+    \bfunction\s+(?P<function>[\w$]+)
+  | \bcase\s+(?P<q1>['"])(?P<case>[a-z][\w-]*)(?P=q1)\s*:
+  | \b(?:cmd|command)\s*===?\s*(?P<q2>['"])(?P<compare>[a-z][\w-]*)(?P=q2)
+  | \b(?P<emitter>[\w$]+)\.(?:on|once|emit)\(\s*(?P<q3>['"])(?P<event>[\w:-]+)(?P=q3)
+""", re.X)
+JSON_TOKEN_RE = re.compile(r'"((?:\\.|[^"\\\n])*)"\s*(:)?|([{}\[\]])|(\n)')
+ENV_RE = re.compile(r'^\s*(?:export\s+)?([A-Z][A-Z0-9_]*)=', re.M)
+
+CODE_SPAN_RE = re.compile(r'`([^`]+)`')
+COMMAND_SPAN_RE = re.compile(r'^[!/]([a-z][\w-]*)\b')
+EVENT_SPAN_RE = re.compile(r'^[a-z][\w]*(?::[\w]+)?$')
+ENV_SPAN_RE = re.compile(r'^[A-Z][A-Z0-9]*_[A-Z0-9_]+$')
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*)')
+
+
+def command_kind(function_name):
+    """Return 'discord' or 'chat' for a command handler function, else None."""
+    name = function_name.lower()
+    if 'command' not in name or not name.startswith('handle'):
+        return None
+    return 'discord' if 'discord' in name else 'chat'
+
+
+def scan_code(text):
+    """Return [[category, name, line, detail]] for one bot source file."""
+    items = []
+    handler = None
+    line = 1
+    last = 0
+    for match in CODE_RE.finditer(text):
+        line += text.count('\n', last, match.start())
+        last = match.start()
+        if match.group('function'):
+            handler = command_kind(match.group('function'))
+        elif match.group('case') or match.group('compare'):
+            if handler:
+                items.append(['commands', match.group('case') or match.group('compare'),
+                              line, handler])
+        elif match.group('emitter') not in IGNORED_EMITTERS:
+            items.append(['events', match.group('event'), line, match.group('emitter')])
+    return items
+
+
+def json_key_paths(text, start_line=1):
+    """Return [line, dotted key path, is_leaf] for every key of JSON-like text.
+
+    Tolerates comments, trailing commas and '...' placeholders as found in
+    documentation; arrays of objects contribute their keys under the
+    array's own path.
+    """
+    paths = []
+    stack = []
+    pending = None
+    line = start_line
+    for match in JSON_TOKEN_RE.finditer(text):
+        key, colon, bracket, newline = match.groups()
+        if newline:
+            line += 1
+        elif colon:
+            pending = [line, '.'.join([k for k in stack if k] + [key]), True]
+            paths.append(pending)
+        elif bracket in ('{', '['):
+            if pending:
+                pending[2] = False
+            stack.append(pending[1].rsplit('.', 1)[-1] if pending else None)
+            pending = None
+        elif bracket:
+            if stack:
+                stack.pop()
+            pending = None
+        else:
+            pending = None
+    return paths
+
+
+def scan_bot_file(code_file):
+    return scan_code(read_bytes(code_file.full_path).decode('utf-8', errors='replace'))
+
+
+def scan_config(code_file):
+    """Return [['config', key, line, is_leaf]] for a config file."""
+    text = read_bytes(code_file.full_path).decode('utf-8', errors='replace')
+    if code_file.path.endswith(ENV_EXAMPLE):
+        return [['config', m.group(1), text.count('\n', 0, m.start()) + 1, True]
+                for m in ENV_RE.finditer(text)]
+    return [['config', path, line, leaf] for line, path, leaf in json_key_paths(text)]
+
+
+def scan_page(full_path):
+    """Return [[category, name, line, is_leaf]] for the items a reference page mentions.
+
+    Commands are inline code starting with ! or /; events are code spans in
+    headings of an Events section plus .on/.once/.emit calls in code blocks;
+    config keys are the keys of JSON code blocks and NAME=value lines or
+    spans of environment variables.
+    """
+    items = []
+    fence = None
+    block = []
+    in_events = False
+    with open(full_path, 'rb') as f:
+        for number, raw in enumerate(f, 1):
+            fence_match = FENCE_RE.match(raw)
+            line = raw.decode('utf-8', errors='replace')
+            if fence:
+                if fence_match and fence_match.group(1)[:1] == fence[:1]:
+                    text = ''.join(block)
+                    start = number - len(block)
+                    for path_line, path, leaf in json_key_paths(text, start):
+                        items.append(['config', path, path_line, leaf])
+                    for m in ENV_RE.finditer(text):
+                        items.append(['config', m.group(1), start + text.count('\n', 0, m.start()), True])
+                    for m in CODE_RE.finditer(text):
+                        if m.group('event') and m.group('emitter') not in IGNORED_EMITTERS:
+                            items.append(['events', m.group('event'),
+                                          start + text.count('\n', 0, m.start()), True])
+                    fence = None
+                else:
+                    block.append(line)
+                continue
+            if fence_match:
+                fence = fence_match.group(1)
+                block = []
+                continue
+
+            heading = HEADING_RE.match(line)
+            if heading and len(heading.group(1)) <= 3:
+                in_events = 'event' in heading.group(2).lower()
+            for span in CODE_SPAN_RE.findall(line):
+                span = span.strip()
+                command = COMMAND_SPAN_RE.match(span)
+                if command:
+                    items.append(['commands', command.group(1), number, True])
+                elif heading and in_events and EVENT_SPAN_RE.match(span):
+                    items.append(['events', span, number, True])
+                elif ENV_SPAN_RE.match(span):
+                    items.append(['config', span, number, True])
+    return items
+
+
+class CodeItem:
+    """A command, event or config key and where the code defines it."""
+
+    __slots__ = ('category', 'name', 'locations', 'details', 'leaf')
+
+    def __init__(self, category, name):
+        self.category = category
+        self.name = name
+        self.locations = []
+        self.details = set()
+        self.leaf = False
+
+
+def collect_items(files, extracted):
+    """Return {category: {name: CodeItem}} in scan order."""
+    items = {category: {} for category in DOC_PAGES}
+    for f in files:
+        for category, name, line, detail in extracted[f.digest]:
+            item = items[category].get(name)
+            if item is None:
+                item = items[category][name] = CodeItem(category, name)
+            item.locations.append((f.path, line))
+            if category == 'config':
+                item.leaf = item.leaf or detail
+            else:
+                item.details.add(detail)
+    return items
+
+
+def main():
+    parser = build_parser('Report undocumented and stale commands, events and config keys.')
+    parser.add_argument('--check', action='store_true',
+                        help='exit with status 1 if anything is undocumented or stale')
+    args = parser.parse_args()
+    index = load_corpus(args)
+    cache = index.cache
+
+    bot_files = scan_files(args.root, BOT_DIR, ('.js',), cache=cache, workers=args.workers)
+    config_files = [f for f in scan_files(args.root, CONFIG_DIR, CONFIG_SUFFIXES,
+                                          cache=cache, workers=args.workers)
+                    if f.path not in IGNORED_CONFIG]
+    config_files += scan_files(args.root, '', (ENV_EXAMPLE,), cache=cache)
+
+    extracted = extract_all(bot_files, 'code-items', scan_bot_file, cache, args.workers)
+    extracted.update(extract_all(config_files, 'config-keys', scan_config, cache, args.workers))
+    items = collect_items(bot_files + config_files, extracted)
+
+    page_files = {}
+    for rel_path in sorted({p for pages in DOC_PAGES.values() for p in pages}):
+        page = reference_page(index, rel_path)
+        if page is None:
+            print(f"warning: reference page not found: {rel_path}", file=sys.stderr)
+        else:
+            page_files[rel_path] = page
+    page_items = extract_all(page_files.values(), 'doc-items',
+                             lambda p: scan_page(p.full_path), cache, args.workers)
+
+    results = {}
+    for category, rel_paths in DOC_PAGES.items():
+        pages = [p for p in rel_paths if p in page_files]
+        documented = {}
+        for rel_path in pages:
+            documented[rel_path] = [entry for entry in page_items[page_files[rel_path].digest]
+                                    if entry[0] == category]
+        mentioned = {p: {name for _, name, _, _ in entries} for p, entries in documented.items()}
+        code = items[category]
+        undocumented = [item for item in code.values()
+                        if (item.leaf or category != 'config')
+                        and any(item.name not in names for names in mentioned.values())]
+        stale = [(p, line, name) for p, entries in documented.items()
+                 for _, name, line, leaf in entries if leaf and name not in code]
+        results[category] = (pages, mentioned, undocumented, sorted(set(stale)))
+
+    print("# Code Coverage Report")
+    print()
+    print("## Summary")
+    print(f"- Bot source files scanned: {len(bot_files)}")
+    print(f"- Config files scanned: {len(config_files)}")
+    for category, (pages, mentioned, undocumented, stale) in results.items():
+        title = CATEGORY_TITLES[category].lower()
+        print(f"- {CATEGORY_TITLES[category]} in code: {len(items[category])} "
+              f"({len(undocumented)} undocumented, {len(stale)} documented {title} not in code)")
+    print()
+
+    for category, (pages, mentioned, undocumented, stale) in results.items():
+        title = CATEGORY_TITLES[category]
+        print(f"## {title}")
+        print()
+        print(f"### Undocumented {title}")
+        print("| Name | Defined In | " + " | ".join(pages) + " |")
+        print("|------|------------|" + "|".join('-' * (len(p) + 2) for p in pages) + "|")
+        for item in undocumented:
+            where = ', '.join(f'{path}:{line}' for path, line in item.locations)
+            if item.details:
+                where = f"{where} ({', '.join(sorted(item.details))})"
+            marks = ' | '.join('✅' if item.name in mentioned[p] else '❌' for p in pages)
+            print(f"| `{item.name}` | {where} | {marks} |")
+        print()
+        print(f"### Documented {title} Not in Code")
+        print("| Page | Line | Name |")
+        print("|------|------|------|")
+        for rel_path, line, name in stale:
+            print(f"| {rel_path} | {line} | `{name}` |")
+        print()
+
+    if args.check and any(r[2] or r[3] for r in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
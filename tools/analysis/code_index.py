@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Hashed listing of the repository's code, config and asset files.
+
+The checks that compare the docs against the code scan files outside the
+markdown corpus. They share the scan cache with the corpus index: a file
+whose identity (inode, size, mtime) is unchanged gets its content hash from
+the cache without being opened, and data extracted from a file is cached per
+content hash, so after a one-file change only that file is re-extracted.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from corpus_index import content_digest, scan_tree
+from instrumentation import STATS
+
+
+class CodeFile:
+    """A non-markdown file with its content hash."""
+
+    __slots__ = ('path', 'full_path', 'mtime', 'size', 'digest')
+
+    def __init__(self, path, full_path, mtime, size, digest):
+        self.path = path
+        self.full_path = full_path
+        self.mtime = mtime
+        self.size = size
+        self.digest = digest
+
+
+def read_bytes(full_path):
+    with open(full_path, 'rb') as f:
+        data = f.read()
+    STATS.file_read(len(data))
+    return data
+
+
+def hash_file(full_path):
+    try:
+        return content_digest(read_bytes(full_path))
+    except FileNotFoundError:
+        return None
+
+
+def scan_files(repo_root, directory, suffixes, recursive=False, cache=None, workers=1):
+    """Return CodeFiles under a repository directory ('' for the root), in scan order.
+
+    Only names ending in one of the suffixes are listed, so editor and
+    *.backup copies are skipped. Cache entries of deleted files with those
+    suffixes are pruned.
+    """
+    dir_path = os.path.join(repo_root, directory) if directory else repo_root
+    prefix = f'{directory}/' if directory else ''
+    with STATS.stage('code.walk'):
+        entries = list(scan_tree(dir_path, prefix, recursive, suffixes))
+    STATS.count('files_listed', len(entries))
+
+    digests = {}
+    misses = []
+    for path, full_path, st in entries:
+        cached = cache.lookup(full_path, st) if cache else None
+        if cached:
+            digests[full_path] = cached[1]
+        else:
+            misses.append(full_path)
+
+    with STATS.stage('code.hash'), ThreadPoolExecutor(max_workers=workers) as pool:
+        STATS.pool_submitted(len(misses), workers)
+        for full_path, digest in zip(misses, pool.map(hash_file, misses)):
+            digests[full_path] = digest
+
+    files = []
+    missed = set(misses)
+    for path, full_path, st in entries:
+        digest = digests[full_path]
+        if digest is None:
+            continue
+        if cache and full_path in missed:
+            cache.store(full_path, st, None, digest, [])
+        files.append(CodeFile(path, full_path, st.st_mtime, st.st_size, digest))
+
+    if cache:
+        cache.prune(dir_path, {f.full_path for f in files}, suffixes, recursive)
+        cache.commit()
+    return files
+
+
+def extract_all(files, kind, extract, cache=None, workers=1):
+    """Return {digest: extract(file)}, cached per content hash under the given kind.
+
+    extract must return JSON-serializable data. Only files whose content
+    hash has no cached result are extracted, on a thread pool.
+    """
+    results = {}
+    todo = {}
+    for f in files:
+        if f.digest in results or f.digest in todo:
+            continue
+        cached = cache.load_derived(kind, f.digest) if cache else None
+        if cached is not None:
+            results[f.digest] = cached
+        else:
+            todo[f.digest] = f
+
+    with STATS.stage(f'{kind}.extract'), ThreadPoolExecutor(max_workers=workers) as pool:
+        STATS.pool_submitted(len(todo), workers)
+        for digest, data in zip(todo, pool.map(extract, todo.values())):
+            results[digest] = data
+            if cache:
+                cache.store_derived(kind, digest, data)
+    STATS.count(f'{kind}_extracted', len(todo))
+    if cache:
+        cache.commit()
+    return results
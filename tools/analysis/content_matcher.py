@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""TF-IDF content matcher for pairing source docs with wiki pages.
+
+Every document is tokenized once into a sparse, L2-normalized TF-IDF
+vector. Wiki vectors are stored as an inverted index (term -> postings),
+so the source x wiki cosine similarity matrix is computed as one sparse
+product: each source row only touches the wiki pages it shares terms with.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from corpus_index import DEFAULT_WORKERS
+from instrumentation import STATS
+
+TOKEN_RE = re.compile(r'[a-z][a-z0-9]{2,}')
+
+STOP_WORDS = frozenset('''
+    the and for with that this from are was were will can has have not you your
+    all any but its our out use using into when then than also each which their
+    there these those been being more most such only other some what how why who
+    http https www com md
+'''.split())
+
+# Terms found in more than this share of documents carry no signal
+DEFAULT_MAX_DF = 0.5
+DEFAULT_THRESHOLD = 0.5
+
+
+def tokenize_file(full_path):
+    """Return term counts for a file, ignoring stop words."""
+    with open(full_path, 'rb') as f:
+        data = f.read()
+    STATS.file_read(len(data))
+    text = data.decode('utf-8', errors='replace').lower()
+    return Counter(t for t in TOKEN_RE.findall(text) if t not in STOP_WORDS)
+
+
+class TfidfMatcher:
+    """Sparse TF-IDF model over a source set and a wiki set."""
+
+    def __init__(self, sources, wiki_files, workers=DEFAULT_WORKERS, max_df=DEFAULT_MAX_DF):
+        self.sources = list(sources)
+        self.wiki_files = list(wiki_files)
+        docs = self.sources + self.wiki_files
+
+        with STATS.stage('tfidf.tokenize'), ThreadPoolExecutor(max_workers=workers) as pool:
+            STATS.pool_submitted(len(docs), workers)
+            counts = list(pool.map(tokenize_file, [d.full_path for d in docs]))
+
+        df = Counter()
+        for c in counts:
+            df.update(c.keys())
+        n = len(docs)
+        limit = max(1, max_df * n)
+        self.idf = {t: math.log((1 + n) / (1 + d)) + 1
+                    for t, d in df.items() if d <= limit}
+
+        vectors = [self._vectorize(c) for c in counts]
+        self.source_vectors = vectors[:len(self.sources)]
+
+        self.postings = defaultdict(list)
+        for j, vec in enumerate(vectors[len(self.sources):]):
+            for term, weight in vec.items():
+                self.postings[term].append((j, weight))
+
+    def _vectorize(self, counts):
+        vec = {t: (1 + math.log(c)) * self.idf[t] for t, c in counts.items() if t in self.idf}
+        norm = math.sqrt(sum(w * w for w in vec.values()))
+        if norm:
+            for t in vec:
+                vec[t] /= norm
+        return vec
+
+    def similarities(self, i):
+        """Cosine similarity of source i against every wiki page it shares terms with."""
+        scores = defaultdict(float)
+        for term, weight in self.source_vectors[i].items():
+            for j, wiki_weight in self.postings.get(term, ()):
+                scores[j] += weight * wiki_weight
+        return scores
+
+    def best_matches(self):
+        """Yield (source, wiki_file, score, runner_up_score) for every source.
+
+        wiki_file is None when the source shares no weighted terms with the wiki.
+        """
+        for i, source in enumerate(self.sources):
+            ranked = sorted(self.similarities(i).items(), key=lambda item: -item[1])[:2]
+            if not ranked:
+                yield source, None, 0.0, 0.0
+                continue
+            best_j, best = ranked[0]
+            runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+            yield source, self.wiki_files[best_j], best, runner_up
+
+
+def add_content_match_arguments(parser):
+    """Add the TF-IDF matching options to a tool's argument parser."""
+    parser.add_argument('--content-match', action='store_true',
+                        help='fall back to TF-IDF content similarity when name, '
+                             'heading and alias matching find nothing')
+    parser.add_argument('--match-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'minimum cosine similarity for a content match '
+                             f'(default: {DEFAULT_THRESHOLD})')
+    return parser
+
+
+def content_matches(index, threshold=DEFAULT_THRESHOLD):
+    """Return {source path: (wiki path, score)} for confident content matches."""
+    with STATS.stage('tfidf'):
+        matcher = TfidfMatcher(index.source_files, index.wiki_files, index.workers)
+        return {source.path: (wiki.path, score)
+                for source, wiki, score, _ in matcher.best_matches()
+                if wiki is not None and score >= threshold}
@@ -1,88 +1,152 @@
 #!/usr/bin/env python3
+import argparse
+import difflib
 import re
-import os
-
-def convert_relative_links(content):
-    """Convert relative markdown links to wiki-style links."""
-    
-    # Pattern to match markdown links: [text](relative/path.md)
-    pattern = r'\[([^\]]+)\]\(([^)]+\.md)\)'
-    
-    def replace_link(match):
-        text = match.group(1)
-        path = match.group(2)
-        
-        # Skip already converted wiki links and external links
-        if path.startswith('http') or path.startswith('#') or '[[' in text:
-            return match.group(0)
-        
-        # Convert relative path to wiki page name
-        # Remove ../ and ./ prefixes
-        clean_path = path.replace('../', '').replace('./', '')
-        
-        # Extract just the filename without extension
-        if '/' in clean_path:
-            filename = clean_path.split('/')[-1]
-        else:
-            filename = clean_path
-        
-        # Remove .md extension and convert to wiki format
-        wiki_name = filename.replace('.md', '')
-        
-        # Convert kebab-case and other formats to wiki format
-        wiki_name = wiki_name.replace('-', ' ').replace('_', ' ')
-        
-        # Capitalize words for wiki naming
-        wiki_name = ' '.join(word.capitalize() for word in wiki_name.split())
-        
-        # Special cases for common wiki page names
-        replacements = {
-            'Api Reference': 'API Reference',
-            'Contributing': 'Contributing',
-            'Installation': 'Installation',
-            'Home': 'Home',
-            'Readme': 'README',
-            'Command Reference': 'Command Reference',
-            'Events': 'Events',
-            'Configuration': 'Configuration'
-        }
-        
-        wiki_name = replacements.get(wiki_name, wiki_name)
-        
-        return f'[[{wiki_name}]]'
-    
-    return re.sub(pattern, replace_link, content)
-
-def process_file(filepath):
-    """Process a single file to convert links."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    new_content = convert_relative_links(content)
-    
-    if content != new_content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        return True
-    return False
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from corpus_index import DEFAULT_WORKERS, atomic_write, normalize_name, scan_tree
+from instrumentation import STATS, add_stats_arguments, enable_stats
+
+# Pattern to match markdown links: [text](relative/path.md) or [text](path.md#anchor)
+LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)#\s]+\.md)(#[^)\s]*)?\)')
+
+# Footer appended to every migrated page
+FOOTER = '\n---\n\n[🏠 Back to Home](Home.md)\n'
+FOOTER_LINES = FOOTER.strip('\n').split('\n')
+# convert_links.py turns the footer link into a wiki link; wiki_transform.py keeps it
+FOOTER_HOME_LINKS = (FOOTER_LINES[-1], '[[Home]]')
+
+
+def page_name(wiki_path):
+    """Return the wiki page name GitHub derives from a wiki file path."""
+    return Path(wiki_path).stem.replace('-', ' ')
+
+
+def footer_start(lines):
+    """Return the index where the 'Back to Home' footer begins, or len(lines)."""
+    end = len(lines)
+    while end and not lines[end - 1].strip():
+        end -= 1
+    if end >= 2 and lines[end - 1].strip() in FOOTER_HOME_LINKS and lines[end - 2].strip() == '':
+        start = end - 2
+        if start and lines[start - 1].strip() == '---':
+            start -= 1
+        return start
+    return len(lines)
+
+
+def build_page_index(wiki_dir):
+    """Map normalized page names to wiki page names, from one walk of wiki/."""
+    pages = {}
+    for rel_path, full_path, st in scan_tree(wiki_dir, recursive=True):
+        pages.setdefault(normalize_name(Path(rel_path).stem), page_name(rel_path))
+    return pages
+
+
+class LinkConverter:
+    """Rewrite relative markdown links as [[wiki links]] that resolve to real pages."""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def resolve(self, path):
+        """Return the wiki page name a relative .md path points to, or None."""
+        stem = Path(path).stem
+        return self.pages.get(normalize_name(stem))
+
+    def convert(self, content):
+        """Return (new_content, unresolved link targets)."""
+        unresolved = []
+
+        def replace_link(match):
+            text, path, anchor = match.group(1), match.group(2), match.group(3) or ''
+
+            # Skip already converted wiki links and external links
+            if path.startswith('http') or '[[' in text:
+                return match.group(0)
+
+            name = self.resolve(path)
+            if name is None:
+                unresolved.append(path + anchor)
+                return match.group(0)
+            return f'[[{name}{anchor}]]'
+
+        return LINK_RE.sub(replace_link, content), unresolved
+
+
+def convert_file(converter, filepath):
+    """Convert one file in memory; return (filepath, old, new, unresolved)."""
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    STATS.file_read(len(data))
+    content = data.decode('utf-8')
+    new_content, unresolved = converter.convert(content)
+    return filepath, content, new_content, unresolved
+
+
+def process_files(converter, filepaths, workers=DEFAULT_WORKERS, dry_run=False):
+    """Convert files in parallel, yielding results in input order.
+
+    Changed files are written with an atomic rename unless dry_run is set.
+    """
+    def work(filepath):
+        result = convert_file(converter, filepath)
+        _, content, new_content, _ = result
+        if not dry_run and content != new_content:
+            atomic_write(filepath, new_content)
+            STATS.count('files_written')
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        STATS.pool_submitted(len(filepaths), workers)
+        yield from STATS.timed_iter('convert', pool.map(work, filepaths))
+
 
 def main():
-    wiki_dir = 'wiki'
+    parser = argparse.ArgumentParser(description='Convert relative markdown links to wiki links.')
+    parser.add_argument('wiki_dir', nargs='?', default='wiki',
+                        help='wiki directory to convert (default: wiki)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='print a unified diff instead of rewriting files')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'threads used to convert files (default: {DEFAULT_WORKERS})')
+    add_stats_arguments(parser)
+    args = parser.parse_args()
+    enable_stats(args)
+
+    wiki_dir = args.wiki_dir
+    with STATS.stage('scan.walk'):
+        converter = LinkConverter(build_page_index(wiki_dir))
+        filepaths = [full_path for _, full_path, _ in scan_tree(wiki_dir, recursive=True)]
+
     changed_files = []
-    
-    for root, dirs, files in os.walk(wiki_dir):
-        for file in files:
-            if file.endswith('.md'):
-                filepath = os.path.join(root, file)
-                if process_file(filepath):
-                    changed_files.append(filepath)
-    
+    unresolved_links = []
+    for filepath, content, new_content, unresolved in process_files(
+            converter, filepaths, args.workers, args.dry_run):
+        unresolved_links.extend((filepath, target) for target in unresolved)
+        if content == new_content:
+            continue
+        changed_files.append(filepath)
+        if args.dry_run:
+            sys.stdout.writelines(difflib.unified_diff(
+                content.splitlines(keepends=True), new_content.splitlines(keepends=True),
+                fromfile=f'a/{filepath}', tofile=f'b/{filepath}'))
+
+    out = sys.stderr if args.dry_run else sys.stdout
     if changed_files:
-        print(f"Converted links in {len(changed_files)} files:")
+        verb = 'Would convert' if args.dry_run else 'Converted'
+        print(f"{verb} links in {len(changed_files)} files:", file=out)
         for file in changed_files:
-            print(f"  - {file}")
+            print(f"  - {file}", file=out)
     else:
-        print("No files needed link conversion")
+        print("No files needed link conversion", file=out)
+
+    if unresolved_links:
+        print(f"Left {len(unresolved_links)} links with no matching wiki page:", file=out)
+        for filepath, target in unresolved_links:
+            print(f"  - {filepath}: {target}", file=out)
 
 if __name__ == '__main__':
     main()
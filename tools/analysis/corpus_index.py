@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""Shared corpus index for the wiki coverage tools.
+
+Walks the repository root, docs/ and wiki/ once, stats and reads every
+markdown file a single time and builds hashed lookup tables so that matching
+a source file to its wiki page is a dictionary lookup instead of a rescan.
+"""
+import argparse
+import hashlib
+import os
+import stat
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from headings import CHUNK_SIZE, HeadingScanner
+from instrumentation import STATS, add_stats_arguments, enable_stats
+from scan_cache import DEFAULT_CACHE_PATH, ScanCache
+from wiki_classifier import default_classifier
+
+REPO_ROOT = '/root/minecraft-bot'
+
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+# Prefix of atomic_write's temporary files, which are never part of the corpus
+TEMP_PREFIX = '.tmp-'
+
+# Read once at import: os.umask can only be queried by setting it, which races with threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Known source -> wiki pairs that neither the filename nor the heading catch
+SPECIAL_MAPPINGS = {
+    'contributing.md': 'community/Contributing.md',
+    'home.md': 'Home.md',
+    'api_reference.md': 'developer/API-Reference.md',
+    'apireference.md': 'developer/API-Reference.md',
+    'command_reference.md': 'reference/Commands.md',
+    'commandreference.md': 'reference/Commands.md',
+    'commands.md': 'reference/Commands.md'
+}
+
+
+def normalize_name(name):
+    """Normalize name for comparison (case-insensitive, no spaces)."""
+    return name.lower().replace(' ', '').replace('_', '').replace('-', '')
+
+
+def suggest_wiki_name(filename):
+    """Suggest a wiki page name based on filename."""
+    # Remove extension and convert to title case
+    base = Path(filename).stem
+    # Replace underscores/hyphens with spaces, then title case
+    suggested = base.replace('_', ' ').replace('-', ' ')
+    return suggested.title().replace(' ', '-')
+
+
+def suggest_wiki_path(filename, file_type, classification=None):
+    """Suggest a wiki path in the section the page's keywords point to.
+
+    Without a classification only the filename is scored; see
+    wiki_classifier.py for the keyword sets and weights.
+    """
+    if classification is None:
+        classification = default_classifier().classify(filename)
+    name = f"{suggest_wiki_name(filename)}.md"
+    return f"{classification.category}/{name}" if classification.category else name
+
+
+def new_hasher():
+    """Return the content hasher used for change detection."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def content_digest(data):
+    """Hash file content for change detection."""
+    hasher = new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+class CorpusFile:
+    """A markdown file seen by the scan, with one stat and at most one read."""
+
+    __slots__ = ('path', 'full_path', 'type', 'mtime', 'size', 'heading',
+                 'digest', 'outline')
+
+    def __init__(self, path, full_path, file_type, mtime, size, heading,
+                 digest=None, outline=()):
+        self.path = path
+        self.full_path = full_path
+        self.type = file_type
+        self.mtime = mtime
+        self.size = size
+        self.heading = heading
+        self.digest = digest
+        self.outline = outline
+
+    @property
+    def basename(self):
+        return os.path.basename(self.path)
+
+
+def read_file(full_path):
+    """Stream a file once, hashing it and collecting its headings.
+
+    Returns None if the file disappeared after it was listed.
+    """
+    hasher = new_hasher()
+    scanner = HeadingScanner(full_path)
+    try:
+        with open(full_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE * 16), b''):
+                hasher.update(chunk)
+                scanner.feed(chunk)
+    except FileNotFoundError:
+        return None
+    scanner.close()
+    STATS.file_read(scanner.bytes_seen)
+    for error in scanner.errors:
+        print(f"warning: {error}", file=sys.stderr)
+    return scanner.heading, hasher.hexdigest(), scanner.outline
+
+
+def scan_tree(dir_path, prefix='', recursive=False, suffixes=('.md',)):
+    """Yield (rel_path, full_path, stat) for matching files, in sorted order.
+
+    Uses os.scandir so file types come from the directory listing, and takes
+    exactly one stat snapshot per file that callers reuse for size, mtime
+    and cache identity.
+    """
+    try:
+        with os.scandir(dir_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except FileNotFoundError:
+        return
+
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir():
+            subdirs.append(entry)
+        elif entry.is_file() and entry.name.endswith(suffixes) \
+                and not entry.name.startswith(TEMP_PREFIX):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            yield prefix + entry.name, entry.path, st
+
+    if recursive:
+        for entry in subdirs:
+            yield from scan_tree(entry.path, f'{prefix}{entry.name}/', True, suffixes)
+
+
+def scan_order_key(path):
+    """Sort key that reproduces scan_tree order: files before subdirectories."""
+    parts = path.split('/')
+    return [(1, d) for d in parts[:-1]] + [(0, parts[-1])]
+
+
+def atomic_write(path, text):
+    """Write text to path through a temporary file and an atomic rename.
+
+    The file keeps its permissions; a new file gets the usual 0o666 & ~umask
+    rather than mkstemp's private 0o600.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=TEMP_PREFIX, suffix=os.path.basename(path))
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def collect_corpus(repo_root, suffixes=('.md',)):
+    """Yield (rel_path, full_path, type, stat) for root, docs and wiki files.
+
+    Root and docs/ are scanned one level deep and wiki/ recursively; wiki
+    paths are relative to wiki/, the others to the repository root.
+    """
+    for path, full_path, st in scan_tree(repo_root, suffixes=suffixes):
+        yield path, full_path, 'root', st
+    for path, full_path, st in scan_tree(os.path.join(repo_root, 'docs'), 'docs/',
+                                         suffixes=suffixes):
+        yield path, full_path, 'docs', st
+    for path, full_path, st in scan_tree(os.path.join(repo_root, 'wiki'),
+                                         recursive=True, suffixes=suffixes):
+        yield path, full_path, 'wiki', st
+
+
+class CorpusIndex:
+    """Root, docs and wiki markdown files plus name/heading/alias lookups."""
+
+    def __init__(self, repo_root=REPO_ROOT, cache=None, workers=DEFAULT_WORKERS):
+        self.repo_root = repo_root
+        self.cache = cache
+        self.workers = workers
+        self.docs_path = os.path.join(repo_root, 'docs')
+        self.wiki_path = os.path.join(repo_root, 'wiki')
+
+        self.rescan()
+
+    def rescan(self):
+        """Scan the whole corpus and rebuild every lookup table."""
+        self.root_files = []
+        self.docs_files = []
+        self.wiki_files = []
+
+        self._scan()
+        with STATS.stage('scan.lookups'):
+            self._build_lookups()
+
+        if self.cache:
+            with STATS.stage('cache.prune'):
+                seen = {f.full_path for f in self.source_files + self.wiki_files}
+                self.cache.prune(self.repo_root, seen)
+                self.cache.commit()
+
+    def classify(self, full_path):
+        """Return (path, type) for a file that belongs to the corpus, else None."""
+        rel_path = os.path.relpath(full_path, self.repo_root).replace(os.sep, '/')
+        if not rel_path.endswith('.md') or rel_path.startswith('../'):
+            return None
+        if os.path.basename(rel_path).startswith(TEMP_PREFIX):
+            return None
+        parts = rel_path.split('/')
+        if len(parts) == 1:
+            return rel_path, 'root'
+        if parts[0] == 'docs' and len(parts) == 2:
+            return rel_path, 'docs'
+        if parts[0] == 'wiki':
+            return '/'.join(parts[1:]), 'wiki'
+        return None
+
+    def update(self, full_paths):
+        """Re-scan only the given files and refresh the lookup tables.
+
+        Returns (changed source paths, changed wiki paths); files that were
+        deleted are dropped from the index and reported as changed.
+        """
+        groups = {'root': self.root_files, 'docs': self.docs_files, 'wiki': self.wiki_files}
+        changed = {'root': set(), 'docs': set(), 'wiki': set()}
+
+        for full_path in full_paths:
+            entry = self.classify(full_path)
+            if not entry:
+                continue
+            path, file_type = entry
+            group = groups[file_type]
+            group[:] = [f for f in group if f.path != path]
+
+            try:
+                st = os.stat(full_path)
+            except FileNotFoundError:
+                st = None
+            if st and stat.S_ISREG(st.st_mode):
+                cached = self.cache.lookup(full_path, st) if self.cache else None
+                result = cached or read_file(full_path)
+                if result is None:
+                    continue
+                heading, digest, outline = result
+                if self.cache and not cached:
+                    self.cache.store(full_path, st, heading, digest, outline)
+                group.append(CorpusFile(path, full_path, file_type, st.st_mtime,
+                                        st.st_size, heading, digest, outline))
+                group.sort(key=lambda f: scan_order_key(f.path))
+            changed[file_type].add(path)
+
+        if self.cache:
+            self.cache.commit()
+        self._build_lookups()
+        return changed['root'] | changed['docs'], changed['wiki']
+
+    def _scan(self):
+        with STATS.stage('scan.walk'):
+            entries = list(collect_corpus(self.repo_root))
+        STATS.count('files_listed', len(entries))
+
+        # Cache lookups stay on this thread; only misses go to the pool
+        results = {}
+        misses = []
+        with STATS.stage('scan.cache_lookup'):
+            for path, full_path, file_type, st in entries:
+                cached = self.cache.lookup(full_path, st) if self.cache else None
+                if cached:
+                    results[full_path] = cached
+                else:
+                    misses.append(full_path)
+
+        with STATS.stage('scan.read'), ThreadPoolExecutor(max_workers=self.workers) as pool:
+            STATS.pool_submitted(len(misses), self.workers)
+            for full_path, result in zip(misses, pool.map(read_file, misses)):
+                results[full_path] = result
+
+        missed = set(misses)
+        groups = {'root': self.root_files, 'docs': self.docs_files, 'wiki': self.wiki_files}
+        for path, full_path, file_type, st in entries:
+            result = results[full_path]
+            if result is None:
+                continue
+            heading, digest, outline = result
+            if self.cache and full_path in missed:
+                self.cache.store(full_path, st, heading, digest, outline)
+            groups[file_type].append(CorpusFile(
+                path, full_path, file_type, st.st_mtime, st.st_size,
+                heading, digest, outline))
+
+    def _build_lookups(self):
+        self.wiki = {wf.path: wf for wf in self.wiki_files}
+
+        # Wiki lookup tables: normalized key -> wiki path (first one wins)
+        self.by_name = {}
+        self.by_heading = {}
+        self.aliases = {}
+
+        for wf in self.wiki_files:
+            self.by_name.setdefault(normalize_name(wf.basename), wf.path)
+            if wf.heading:
+                self.by_heading.setdefault(normalize_name(wf.heading), wf.path)
+
+        for name, target in SPECIAL_MAPPINGS.items():
+            if target in self.wiki:
+                self.aliases.setdefault(normalize_name(name), target)
+
+    @property
+    def source_files(self):
+        return self.root_files + self.docs_files
+
+    def match_by_name(self, source):
+        """Return the wiki path whose normalized filename matches, if any."""
+        return self.by_name.get(normalize_name(source.basename))
+
+    def match_by_heading(self, source):
+        """Return the wiki path whose first heading matches, if any."""
+        if source.heading:
+            return self.by_heading.get(normalize_name(source.heading))
+        return None
+
+    def find_match(self, source):
+        """Find the matching wiki path for a source file (name, heading, alias)."""
+        return (self.match_by_name(source)
+                or self.match_by_heading(source)
+                or self.aliases.get(normalize_name(source.basename)))
+
+
+def add_root_arguments(parser):
+    """Add the repository root and worker options to a tool's argument parser."""
+    parser.add_argument('--root', default=REPO_ROOT,
+                        help=f'repository root to scan (default: {REPO_ROOT})')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'threads used to read and hash files (default: {DEFAULT_WORKERS})')
+    return add_stats_arguments(parser)
+
+
+def add_corpus_arguments(parser):
+    """Add the shared corpus and cache options to a tool's argument parser."""
+    add_root_arguments(parser)
+    parser.add_argument('--cache-path', default=DEFAULT_CACHE_PATH,
+                        help='location of the persistent scan cache')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='scan every file without reading or writing the cache')
+    parser.add_argument('--rebuild-cache', action='store_true',
+                        help='discard the scan cache and rebuild it from scratch')
+    return parser
+
+
+def load_corpus(args):
+    """Build a CorpusIndex from parsed arguments, reporting cache usage."""
+    enable_stats(args)
+    if args.no_cache:
+        with STATS.stage('scan'):
+            return CorpusIndex(args.root, workers=args.workers)
+    # The cache stays open so later stages can store derived data in it
+    with STATS.stage('cache.open'):
+        cache = ScanCache(args.cache_path, rebuild=args.rebuild_cache)
+    STATS.track_cache(cache)
+    with STATS.stage('scan'):
+        index = CorpusIndex(args.root, cache, args.workers)
+    cache.commit()
+    print(cache.summary(), file=sys.stderr)
+    return index
+
+
+def build_parser(description):
+    """Return an argument parser with the shared corpus options."""
+    parser = argparse.ArgumentParser(description=description)
+    return add_corpus_arguments(parser)
+
+
+def parse_args(description, argv=None):
+    """Parse the standard command line shared by the corpus tools."""
+    return build_parser(description).parse_args(argv)
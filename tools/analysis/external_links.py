@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""Check the external http(s) links of the docs and wiki.
+
+URLs are collected from every corpus page outside code blocks (cached per
+content hash like the other parsed links) and probed concurrently with
+asyncio over plain stream connections: HEAD first, GET when HEAD fails,
+following redirects. At most --connections connections are open at once and
+at most --per-host requests go to one host at a time, counting redirects
+that lead there from other hosts. Each host's connections are reused
+for its queued URLs (HTTP keep-alive), and a 429 answer pauses that
+connection for the Retry-After time before one retry.
+
+Results go to the scan cache with the time they were taken. A rerun only
+probes URLs whose result is older than its TTL, which is longer for
+working links than for broken ones or network errors.
+
+For an offline run, map hosts to a local stand-in server with --resolve,
+e.g. `python -m http.server 8000` and --resolve github.com=127.0.0.1:8000.
+Mapped hosts are reached over plain HTTP whatever the URL's scheme; use a
+separate --cache-path so stand-in results do not end up in the real cache.
+tests/analysis/test_external_links.py runs the checker this way against an
+in-process http.server.
+"""
+import asyncio
+import re
+import ssl
+import sys
+import time
+from collections import defaultdict
+from urllib.parse import urljoin, urlsplit
+
+from asset_coverage import page_repo_path
+from code_index import extract_all
+from corpus_index import build_parser, load_corpus
+from headings import FENCE_RE
+from instrumentation import STATS
+
+URL_RE = re.compile(rb'https?://[^\s<>()\[\]"\'`|\\]+')
+# Sentence punctuation and emphasis markers that follow a bare URL
+TRAILING = '.,;:!?*_~'
+# Hosts that only ever appear in examples and setup instructions
+SKIPPED_HOSTS = ('localhost', '127.0.0.1', '0.0.0.0', 'example.com', 'example.org',
+                 'example.net')
+
+DEFAULT_CONNECTIONS = 32
+DEFAULT_PER_HOST = 4
+DEFAULT_TIMEOUT = 10.0
+MAX_REDIRECTS = 5
+MAX_RETRY_AFTER = 30
+USER_AGENT = 'wiki-link-checker/1.0'
+HOUR = 3600
+DEFAULT_TTLS = {'ok': 7 * 24, 'moved': 7 * 24, 'broken': 24, 'limited': 1, 'error': 1}
+
+OUTCOMES = ('ok', 'moved', 'broken', 'limited', 'error')
+
+
+def parse_external(page):
+    """Return [line, url] for every http(s) URL of a page outside code blocks."""
+    links = []
+    fence = None
+    nbytes = 0
+    with open(page.full_path, 'rb') as f:
+        for line_no, raw in enumerate(f, 1):
+            nbytes += len(raw)
+            fence_match = FENCE_RE.match(raw)
+            if fence:
+                if fence_match and fence_match.group(1)[:1] == fence[:1]:
+                    fence = None
+                continue
+            if fence_match:
+                fence = fence_match.group(1)
+                continue
+            for match in URL_RE.finditer(raw):
+                url = match.group(0).decode('utf-8', errors='replace').rstrip(TRAILING)
+                if checkable(url):
+                    links.append([line_no, url])
+    STATS.file_read(nbytes)
+    return links
+
+
+def checkable(url):
+    """Return True for URLs with a real-looking host and no placeholders."""
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return False
+    if not host or '.' not in host:
+        return False
+    if any(host == skipped or host.endswith('.' + skipped) for skipped in SKIPPED_HOSTS):
+        return False
+    return not any(ch in url for ch in '{}$')
+
+
+class Response:
+    __slots__ = ('status', 'headers', 'reusable')
+
+    def __init__(self, status, headers, reusable):
+        self.status = status
+        self.headers = headers
+        self.reusable = reusable
+
+
+class Connection:
+    """One HTTP/1.1 stream connection to a host."""
+
+    __slots__ = ('reader', 'writer')
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class LinkProber:
+    """Probes URLs over a bounded, per-host limited set of keep-alive connections."""
+
+    def __init__(self, connections=DEFAULT_CONNECTIONS, per_host=DEFAULT_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT, resolve=None):
+        self.connections = connections
+        self.per_host = per_host
+        self.timeout = timeout
+        self.resolve = resolve or {}
+        self.ssl = ssl.create_default_context()
+        self.host_slots = None
+
+    def address(self, parts):
+        """Return (host, port, use_tls) to connect to for a URL."""
+        if parts.hostname in self.resolve:
+            host, port = self.resolve[parts.hostname]
+            return host, port, False
+        tls = parts.scheme == 'https'
+        return parts.hostname, parts.port or (443 if tls else 80), tls
+
+    async def connect(self, parts):
+        host, port, tls = self.address(parts)
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=self.ssl if tls else None,
+                                    server_hostname=parts.hostname if tls else None),
+            self.timeout)
+        STATS.count('connections_opened')
+        return Connection(reader, writer)
+
+    async def send(self, conn, method, parts):
+        """Send one request and read the status line and headers of the answer."""
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        host = parts.netloc.rsplit('@', 1)[-1]
+        request = (f'{method} {target} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {USER_AGENT}\r\n'
+                   f'Accept: */*\r\nConnection: keep-alive\r\n\r\n')
+        conn.writer.write(request.encode('latin-1', errors='replace'))
+        await conn.writer.drain()
+        head = await asyncio.wait_for(conn.reader.readuntil(b'\r\n\r\n'), self.timeout)
+        STATS.count('http_requests')
+        lines = head.decode('latin-1').split('\r\n')
+        version, status = lines[0].split(' ', 2)[:2]
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        # A GET body is never read, so only an answer to HEAD leaves the stream clean
+        reusable = (method == 'HEAD' and version == 'HTTP/1.1'
+                    and headers.get('connection', '').lower() != 'close')
+        return Response(int(status), headers, reusable)
+
+    async def request(self, conns, method, url):
+        """Send a request once the host has a free slot, on a kept-alive connection if any."""
+        parts = urlsplit(url)
+        # One slot at a time, so a redirect between two busy hosts cannot deadlock
+        async with self.host_slots[parts.hostname]:
+            return await self._request(conns, method, parts)
+
+    async def _request(self, conns, method, parts):
+        key = self.address(parts)
+        conn = conns.pop(key, None)
+        if conn is not None:
+            try:
+                response = await self.send(conn, method, parts)
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                # The server closed the idle connection; retry on a fresh one
+                conn.close()
+                conn = None
+            except BaseException:
+                conn.close()
+                raise
+        if conn is None:
+            # Connections to other hosts are not kept, so a slot holds at most one
+            for other in conns.values():
+                other.close()
+            conns.clear()
+            conn = await self.connect(parts)
+            try:
+                response = await self.send(conn, method, parts)
+            except BaseException:
+                conn.close()
+                raise
+        if response.reusable:
+            conns[key] = conn
+        else:
+            conn.close()
+        return response
+
+    async def probe(self, conns, url):
+        """Return (outcome, status, detail) for one URL."""
+        moved_to = None
+        retried = False
+        hops = 0
+        while True:
+            response = await self.request(conns, 'HEAD', url)
+            if response.status >= 400 and response.status != 429:
+                # Some servers refuse or mishandle HEAD
+                response = await self.request(conns, 'GET', url)
+            if response.status == 429 and not retried:
+                retried = True
+                delay = response.headers.get('retry-after', '')
+                await asyncio.sleep(min(int(delay) if delay.isdigit() else 1, MAX_RETRY_AFTER))
+                continue
+            location = response.headers.get('location')
+            if 300 <= response.status < 400 and location and hops < MAX_REDIRECTS:
+                url = urljoin(url, location)
+                if hops == 0 and response.status in (301, 308):
+                    moved_to = url
+                hops += 1
+                continue
+            break
+
+        if response.status == 429:
+            delay = response.headers.get('retry-after')
+            return 'limited', 429, f'Retry-After: {delay}' if delay else None
+        if 200 <= response.status < 300:
+            return ('moved', response.status, moved_to) if moved_to else ('ok', response.status, None)
+        return 'broken', response.status, url if hops else None
+
+    async def check_host(self, urls, results, slots):
+        """Probe a share of one host's URLs on one connection slot."""
+        conns = {}
+        async with slots:
+            try:
+                while urls:
+                    url = urls.pop()
+                    try:
+                        results[url] = await self.probe(conns, url)
+                    except (OSError, ssl.SSLError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                            asyncio.LimitOverrunError, ValueError) as e:
+                        results[url] = ('error', None, str(e) or type(e).__name__)
+                        for conn in conns.values():
+                            conn.close()
+                        conns.clear()
+            finally:
+                for conn in conns.values():
+                    conn.close()
+
+    async def check_all(self, urls):
+        """Return {url: (outcome, status, detail)} for all URLs."""
+        by_host = defaultdict(list)
+        for url in urls:
+            by_host[urlsplit(url).hostname].append(url)
+        slots = asyncio.Semaphore(self.connections)
+        self.host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        results = {}
+        workers = []
+        for host_urls in by_host.values():
+            host_urls.reverse()
+            for _ in range(min(self.per_host, len(host_urls))):
+                workers.append(self.check_host(host_urls, results, slots))
+        STATS.pool_submitted(len(workers), self.connections)
+        await asyncio.gather(*workers)
+        return results
+
+
+def parse_resolve(values):
+    """Parse HOST=ADDR:PORT options into {host: (addr, port)}."""
+    resolve = {}
+    for value in values:
+        host, _, address = value.partition('=')
+        addr, _, port = address.rpartition(':')
+        if not host or not addr or not port.isdigit():
+            raise SystemExit(f"error: --resolve expects HOST=ADDR:PORT, got {value!r}")
+        resolve[host] = (addr, int(port))
+    return resolve
+
+
+def main():
+    parser = build_parser('Check the external links of the docs and wiki.')
+    parser.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS,
+                        help='maximum open connections (default: %(default)s)')
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST,
+                        help='maximum connections to one host (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='seconds to wait for a connection or answer (default: %(default)s)')
+    for outcome in OUTCOMES:
+        parser.add_argument(f'--ttl-{outcome}', type=float, default=DEFAULT_TTLS[outcome],
+                            metavar='HOURS',
+                            help=f"hours before a '{outcome}' result is probed again "
+                                 f"(default: %(default)s)")
+    parser.add_argument('--recheck', action='store_true',
+                        help='probe every URL, ignoring cached results')
+    parser.add_argument('--resolve', action='append', default=[], metavar='HOST=ADDR:PORT',
+                        help='send requests for HOST to ADDR:PORT over plain HTTP (repeatable)')
+    parser.add_argument('--check', action='store_true',
+                        help='exit with status 1 if any link is broken')
+    args = parser.parse_args()
+    index = load_corpus(args)
+    cache = index.cache
+
+    pages = index.source_files + index.wiki_files
+    parsed = extract_all(pages, 'external-links', parse_external, cache, args.workers)
+    uses = defaultdict(list)
+    for page in pages:
+        for line, url in parsed[page.digest]:
+            uses[url].append((page_repo_path(page), line))
+
+    now = time.time()
+    ttls = {outcome: getattr(args, f'ttl_{outcome}') * HOUR for outcome in OUTCOMES}
+    results = {}
+    if cache and not args.recheck:
+        for url, (outcome, status, detail, checked_at) in cache.load_link_results().items():
+            if url in uses and now - checked_at < ttls.get(outcome, 0):
+                results[url] = (outcome, status, detail)
+    due = sorted(url for url in uses if url not in results)
+
+    prober = LinkProber(args.connections, args.per_host, args.timeout, parse_resolve(args.resolve))
+    with STATS.stage('links.probe'):
+        probed = asyncio.run(prober.check_all(due)) if due else {}
+    STATS.count('urls_probed', len(probed))
+    results.update(probed)
+    if cache:
+        for url, (outcome, status, detail) in probed.items():
+            cache.store_link_result(url, outcome, status, detail, now)
+        cache.prune_link_results(uses)
+        cache.commit()
+
+    by_outcome = defaultdict(list)
+    for url in sorted(uses):
+        by_outcome[results[url][0]].append(url)
+
+    print("# External Link Report")
+    print()
+    print("## Summary")
+    print(f"- Pages scanned: {len(pages)}")
+    print(f"- External links: {sum(len(u) for u in uses.values())} "
+          f"({len(uses)} unique URLs on {len({urlsplit(u).hostname for u in uses})} hosts)")
+    print(f"- Probed this run: {len(probed)} (cached: {len(uses) - len(probed)})")
+    for outcome in OUTCOMES:
+        print(f"- {outcome.capitalize()}: {len(by_outcome[outcome])}")
+    print()
+
+    print("## Broken Links")
+    print("| Page | Line | URL | Status |")
+    print("|------|------|-----|--------|")
+    for url in by_outcome['broken']:
+        status = results[url][1]
+        for page, line in uses[url]:
+            print(f"| {page} | {line} | {url} | {status} |")
+    print()
+
+    print("## Permanently Redirected Links")
+    print("| Page | Line | URL | New Location |")
+    print("|------|------|-----|--------------|")
+    for url in by_outcome['moved']:
+        for page, line in uses[url]:
+            print(f"| {page} | {line} | {url} | {results[url][2]} |")
+    print()
+
+    print("## Unchecked Links")
+    print("| URL | Outcome | Detail |")
+    print("|-----|---------|--------|")
+    for outcome in ('limited', 'error'):
+        for url in by_outcome[outcome]:
+            print(f"| {url} | {outcome} | {results[url][2] or results[url][1]} |")
+
+    if args.check and by_outcome['broken']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
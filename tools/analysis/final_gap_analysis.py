@@ -1,284 +1,233 @@
 #!/usr/bin/env python3
+import contextlib
+import io
 import os
-import re
-import csv
-from datetime import datetime
-from pathlib import Path
+import sys
+import time
 
-def get_file_mtime(file_path):
-    """Get file modification time."""
-    try:
-        return os.path.getmtime(file_path)
-    except FileNotFoundError:
-        return None
+from content_matcher import add_content_match_arguments, content_matches
+from corpus_index import atomic_write, build_parser, load_corpus
+from gap_records import (GAP_STATUSES, CsvSink, JsonLinesSink, StatusCounter, check_pair,
+                         copy_spool, feed, format_mtime, format_similarity, spool)
+from instrumentation import STATS
+from staleness import StalenessChecker, add_staleness_arguments
+from watcher import DEFAULT_DEBOUNCE, watch_changes
 
-def get_first_heading(file_path):
-    """Extract first-level heading from markdown file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Find first level-1 heading (starts with single #)
-        match = re.search(r'^# (.+)$', content, re.MULTILINE)
-        if match:
-            return match.group(1).strip()
-        return None
-    except Exception:
-        return None
-
-def get_file_size(file_path):
-    """Get file size in bytes."""
-    try:
-        return os.path.getsize(file_path)
-    except FileNotFoundError:
-        return 0
-
-def normalize_name(name):
-    """Normalize name for comparison (case-insensitive, no spaces)."""
-    return name.lower().replace(' ', '').replace('_', '').replace('-', '')
-
-def suggest_wiki_name(filename):
-    """Suggest a wiki page name based on filename."""
-    # Remove extension and convert to title case
-    base = Path(filename).stem
-    # Replace underscores/hyphens with spaces, then title case
-    suggested = base.replace('_', ' ').replace('-', ' ')
-    return suggested.title().replace(' ', '-')
-
-def suggest_wiki_path(filename, file_type):
-    """Suggest a wiki path based on content type."""
-    base = Path(filename).stem.lower()
-    
-    # Categorize by content type
-    if any(word in base for word in ['install', 'setup', 'deploy']):
-        return f"guides/{suggest_wiki_name(filename)}.md"
-    elif any(word in base for word in ['api', 'reference', 'command']):
-        return f"reference/{suggest_wiki_name(filename)}.md"
-    elif any(word in base for word in ['troubleshoot', 'issue', 'problem']):
-        return f"troubleshooting/{suggest_wiki_name(filename)}.md"
-    elif any(word in base for word in ['contribute', 'develop']):
-        return f"community/{suggest_wiki_name(filename)}.md"
-    elif any(word in base for word in ['architecture', 'design', 'structure']):
-        return f"developer/{suggest_wiki_name(filename)}.md"
-    else:
-        return f"{suggest_wiki_name(filename)}.md"
-
-def find_matches(source_file, source_path, wiki_files, wiki_path):
-    """Find matching wiki files for a source file."""
-    basename = os.path.basename(source_file)
-    normalized_name = normalize_name(basename)
-    heading = get_first_heading(source_path)
-    
-    # Check exact filename matches first
-    for wiki_file in wiki_files:
-        wiki_basename = os.path.basename(wiki_file)
-        if normalize_name(wiki_basename) == normalized_name:
-            return wiki_file
-    
-    # Check by first heading
-    if heading:
-        normalized_heading = normalize_name(heading)
-        for wiki_file in wiki_files:
-            wiki_full_path = os.path.join(wiki_path, wiki_file)
-            wiki_heading = get_first_heading(wiki_full_path)
-            if wiki_heading and normalize_name(wiki_heading) == normalized_heading:
-                return wiki_file
-    
-    # Special cases for common mappings
-    special_mappings = {
-        'contributing.md': 'community/Contributing.md',
-        'home.md': 'Home.md',
-        'api_reference.md': 'developer/API-Reference.md',
-        'apireference.md': 'developer/API-Reference.md',
-        'command_reference.md': 'reference/Commands.md',
-        'commandreference.md': 'reference/Commands.md',
-        'commands.md': 'reference/Commands.md'
-    }
-    
-    if normalized_name in special_mappings:
-        target = special_mappings[normalized_name]
-        if target in wiki_files:
-            return target
-    
-    return None
+CSV_REPORT = 'final_wiki_coverage_gap_report.csv'
+MD_REPORT = 'final_wiki_coverage_gap_report.md'
 
-def main():
-    # Get all root-level .md files
-    root_files = []
-    for f in os.listdir('/root/minecraft-bot'):
-        if f.endswith('.md'):
-            root_files.append(f)
-    
-    # Get all docs/ .md files
-    docs_files = []
-    docs_path = '/root/minecraft-bot/docs'
-    if os.path.exists(docs_path):
-        for f in os.listdir(docs_path):
-            if f.endswith('.md'):
-                docs_files.append(f'docs/{f}')
-    
-    # Get all wiki .md files
-    wiki_files = []
-    wiki_path = '/root/minecraft-bot/wiki'
-    if os.path.exists(wiki_path):
-        for root, dirs, files in os.walk(wiki_path):
-            for f in files:
-                if f.endswith('.md'):
-                    rel_path = os.path.relpath(os.path.join(root, f), wiki_path)
-                    wiki_files.append(rel_path)
-    
-    # Analyze gaps
-    gaps = []
-    matches = []
-    
-    # Check root files
-    for root_file in root_files:
-        full_path = f'/root/minecraft-bot/{root_file}'
-        mtime = get_file_mtime(full_path)
-        size = get_file_size(full_path)
-        heading = get_first_heading(full_path)
-        
-        wiki_match = find_matches(root_file, full_path, wiki_files, wiki_path)
-        
-        if wiki_match:
-            wiki_full_path = os.path.join(wiki_path, wiki_match)
-            wiki_mtime = get_file_mtime(wiki_full_path)
-            wiki_size = get_file_size(wiki_full_path)
-            
-            if mtime > wiki_mtime:
-                gaps.append({
-                    'file': root_file,
-                    'type': 'root',
-                    'status': 'out-of-date',
-                    'wiki_match': wiki_match,
-                    'suggested_name': suggest_wiki_name(root_file),
-                    'suggested_path': suggest_wiki_path(root_file, 'root'),
-                    'source_mtime': datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'wiki_mtime': datetime.fromtimestamp(wiki_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'source_size': size,
-                    'wiki_size': wiki_size,
-                    'first_heading': heading or 'N/A'
-                })
-            else:
-                matches.append({
-                    'file': root_file,
-                    'type': 'root',
-                    'status': 'up-to-date',
-                    'wiki_match': wiki_match,
-                    'source_mtime': datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'wiki_mtime': datetime.fromtimestamp(wiki_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'source_size': size,
-                    'wiki_size': wiki_size,
-                    'first_heading': heading or 'N/A'
-                })
+
+class SummarySink:
+    """Markdown summary report: totals first, then the matched and gap tables.
+
+    Table rows are spooled as records arrive so the totals can be printed
+    above them without holding the rows in memory.
+    """
+
+    def __init__(self, out, index, content_mode=False):
+        self.out = out
+        self.index = index
+        self.content_mode = content_mode
+        self.counts = StatusCounter()
+        self.matched = spool()
+        self.gaps = spool()
+
+    def write(self, record):
+        self.counts.write(record)
+        if not record.is_gap:
+            self.matched.write(f"| {record.file} | {record.type} | {record.wiki_match} | {format_mtime(record.source_mtime)} | {format_mtime(record.wiki_mtime)} |\n")
+        elif self.content_mode:
+            self.gaps.write(f"| {record.file} | {record.type} | {record.status} | {record.wiki_match or 'N/A'} | {record.suggested_path} | {format_similarity(record.similarity)} |\n")
         else:
-            gaps.append({
-                'file': root_file,
-                'type': 'root',
-                'status': 'missing',
-                'wiki_match': None,
-                'suggested_name': suggest_wiki_name(root_file),
-                'suggested_path': suggest_wiki_path(root_file, 'root'),
-                'source_mtime': datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                'wiki_mtime': 'N/A',
-                'source_size': size,
-                'wiki_size': 0,
-                'first_heading': heading or 'N/A'
-            })
-    
-    # Check docs files
-    for docs_file in docs_files:
-        full_path = f'/root/minecraft-bot/{docs_file}'
-        mtime = get_file_mtime(full_path)
-        size = get_file_size(full_path)
-        heading = get_first_heading(full_path)
-        
-        wiki_match = find_matches(docs_file, full_path, wiki_files, wiki_path)
-        
-        if wiki_match:
-            wiki_full_path = os.path.join(wiki_path, wiki_match)
-            wiki_mtime = get_file_mtime(wiki_full_path)
-            wiki_size = get_file_size(wiki_full_path)
-            
-            if mtime > wiki_mtime:
-                gaps.append({
-                    'file': docs_file,
-                    'type': 'docs',
-                    'status': 'out-of-date',
-                    'wiki_match': wiki_match,
-                    'suggested_name': suggest_wiki_name(os.path.basename(docs_file)),
-                    'suggested_path': suggest_wiki_path(os.path.basename(docs_file), 'docs'),
-                    'source_mtime': datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'wiki_mtime': datetime.fromtimestamp(wiki_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'source_size': size,
-                    'wiki_size': wiki_size,
-                    'first_heading': heading or 'N/A'
-                })
-            else:
-                matches.append({
-                    'file': docs_file,
-                    'type': 'docs',
-                    'status': 'up-to-date',
-                    'wiki_match': wiki_match,
-                    'source_mtime': datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'wiki_mtime': datetime.fromtimestamp(wiki_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'source_size': size,
-                    'wiki_size': wiki_size,
-                    'first_heading': heading or 'N/A'
-                })
+            wiki_mtime = 'N/A' if record.wiki_mtime is None else format_mtime(record.wiki_mtime)
+            self.gaps.write(f"| {record.file} | {record.type} | {record.status} | {record.wiki_match or 'N/A'} | {record.suggested_path} | {format_mtime(record.source_mtime)} | {wiki_mtime} |\n")
+
+    def close(self):
+        out = self.out
+        counts = self.counts
+        matched = counts.total - sum(counts[status] for status in GAP_STATUSES)
+        out.write("# Final Wiki Coverage Gap Analysis Report\n")
+        out.write("\n")
+        out.write("## Summary\n")
+        out.write(f"- Total root-level .md files: {len(self.index.root_files)}\n")
+        out.write(f"- Total docs/ .md files: {len(self.index.docs_files)}\n")
+        out.write(f"- Total wiki .md files: {len(self.index.wiki_files)}\n")
+        out.write(f"- Files with matching wiki pages: {matched}\n")
+        out.write(f"- Missing files: {counts['missing']}\n")
+        if self.content_mode:
+            out.write(f"- Diverged files: {counts['diverged']}\n")
         else:
-            gaps.append({
-                'file': docs_file,
-                'type': 'docs',
-                'status': 'missing',
-                'wiki_match': None,
-                'suggested_name': suggest_wiki_name(os.path.basename(docs_file)),
-                'suggested_path': suggest_wiki_path(os.path.basename(docs_file), 'docs'),
-                'source_mtime': datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                'wiki_mtime': 'N/A',
-                'source_size': size,
-                'wiki_size': 0,
-                'first_heading': heading or 'N/A'
-            })
-    
-    # Write comprehensive CSV report
-    with open('final_wiki_coverage_gap_report.csv', 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['file', 'type', 'status', 'wiki_match', 'suggested_name', 
-                     'suggested_path', 'source_mtime', 'wiki_mtime', 'source_size', 
-                     'wiki_size', 'first_heading']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        writer.writeheader()
-        for gap in gaps:
-            writer.writerow(gap)
-    
-    # Generate summary report
-    print("# Final Wiki Coverage Gap Analysis Report")
-    print()
-    print("## Summary")
-    print(f"- Total root-level .md files: {len(root_files)}")
-    print(f"- Total docs/ .md files: {len(docs_files)}")
-    print(f"- Total wiki .md files: {len(wiki_files)}")
-    print(f"- Files with matching wiki pages: {len(matches)}")
-    print(f"- Missing files: {len([g for g in gaps if g['status'] == 'missing'])}")
-    print(f"- Out-of-date files: {len([g for g in gaps if g['status'] == 'out-of-date'])}")
-    print()
-    
-    print("## Matched Files (Up-to-date)")
-    print("| File | Type | Wiki Match | Source Modified | Wiki Modified |")
-    print("|------|------|------------|-----------------|---------------|")
-    for match in matches:
-        print(f"| {match['file']} | {match['type']} | {match['wiki_match']} | {match['source_mtime']} | {match['wiki_mtime']} |")
-    
-    print()
-    print("## Gap Files (Missing or Out-of-date)")
-    print("| File | Type | Status | Wiki Match | Suggested Path | Source Modified | Wiki Modified |")
-    print("|------|------|--------|------------|----------------|-----------------|---------------|")
-    for gap in gaps:
-        print(f"| {gap['file']} | {gap['type']} | {gap['status']} | {gap['wiki_match'] or 'N/A'} | {gap['suggested_path']} | {gap['source_mtime']} | {gap['wiki_mtime']} |")
-    
+            out.write(f"- Out-of-date files: {counts['out-of-date']}\n")
+        out.write("\n")
+
+        out.write("## Matched Files (Up-to-date)\n")
+        out.write("| File | Type | Wiki Match | Source Modified | Wiki Modified |\n")
+        out.write("|------|------|------------|-----------------|---------------|\n")
+        copy_spool(self.matched, out)
+
+        out.write("\n")
+        out.write("## Gap Files (Missing or Out-of-date)\n")
+        if self.content_mode:
+            out.write("| File | Type | Status | Wiki Match | Suggested Path | Similarity |\n")
+            out.write("|------|------|--------|------------|----------------|------------|\n")
+        else:
+            out.write("| File | Type | Status | Wiki Match | Suggested Path | Source Modified | Wiki Modified |\n")
+            out.write("|------|------|--------|------------|----------------|-----------------|---------------|\n")
+        copy_spool(self.gaps, out)
+
+
+class GapReport:
+    """Gap records keyed by source path, so changes only rebuild affected rows."""
+
+    def __init__(self, index, checker, fallback=None):
+        self.index = index
+        self.checker = checker
+        self.fallback = fallback or {}
+        self.pairs = {}
+        self.rows = {}
+
+    def match(self, source):
+        return self.index.find_match(source) or self.fallback.get(source.path)
+
+    def check(self, source, wiki_match):
+        wiki = self.index.wiki[wiki_match] if wiki_match else None
+        return check_pair(self.checker, source, wiki, wiki_match)
+
+    def prepare(self):
+        """Let the staleness checker batch its work over every matched pair."""
+        with STATS.stage('staleness.prepare'):
+            self.checker.prepare((source, self.index.wiki[m]) for source in self.index.source_files
+                                 for m in (self.match(source),) if m)
+
+    def stream(self):
+        """Yield a record per source file in corpus order, without keeping them."""
+        self.prepare()
+        for source in self.index.source_files:
+            yield self.check(source, self.match(source))
+
+    def build(self):
+        self.prepare()
+        for source in self.index.source_files:
+            wiki_match = self.match(source)
+            self.pairs[source.path] = wiki_match
+            self.rows[source.path] = self.check(source, wiki_match)
+
+    def refresh(self, changed_sources, changed_wiki):
+        """Rebuild rows whose source, match or matched wiki page changed."""
+        sources = {s.path: s for s in self.index.source_files}
+        for path in list(self.rows):
+            if path not in sources:
+                del self.rows[path]
+                del self.pairs[path]
+
+        updated = 0
+        for path, source in sources.items():
+            wiki_match = self.match(source)
+            if (path in changed_sources or wiki_match in changed_wiki
+                    or path not in self.rows or self.pairs[path] != wiki_match):
+                self.pairs[path] = wiki_match
+                self.rows[path] = self.check(source, wiki_match)
+                updated += 1
+        return updated
+
+    def records(self):
+        """Yield the stored records in corpus order."""
+        for source in self.index.source_files:
+            yield self.rows[source.path]
+
+
+def render_reports(index, records, content_mode):
+    """Render (csv_text, markdown_text) from one pass over the records."""
+    csv_out = io.StringIO(newline='')
+    md_out = io.StringIO()
+    feed(records, [CsvSink(csv_out, content_mode), SummarySink(md_out, index, content_mode)])
+    return csv_out.getvalue(), md_out.getvalue()
+
+
+def watch(report, args, content_mode):
+    """Keep the CSV and markdown reports current as files change."""
+    def write_reports():
+        csv_text, md_text = render_reports(report.index, report.records(), content_mode)
+        atomic_write(CSV_REPORT, csv_text)
+        atomic_write(MD_REPORT, md_text)
+
+    # Run from a corpus directory, the reports' own writes must not trigger updates
+    outputs = {os.path.abspath(CSV_REPORT), os.path.abspath(MD_REPORT)}
+
+    report.build()
+    write_reports()
+    print(f"Watching {args.root} for changes (Ctrl+C to stop)", file=sys.stderr)
+
+    try:
+        for changed in watch_changes(args.root, args.debounce, args.poll_interval,
+                                     force_polling=args.poll):
+            started = time.perf_counter()
+            if changed is None:
+                report.index.rescan()
+                report.rows.clear()
+                report.pairs.clear()
+                report.build()
+                updated = len(report.rows)
+            else:
+                changed = [p for p in changed if os.path.abspath(p) not in outputs]
+                changed_sources, changed_wiki = report.index.update(changed)
+                if not changed_sources and not changed_wiki:
+                    continue
+                updated = report.refresh(changed_sources, changed_wiki)
+            with STATS.stage('watch.write'):
+                write_reports()
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"Updated {updated} rows in {elapsed:.1f} ms", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = build_parser('Write the final wiki coverage gap report.')
+    add_staleness_arguments(parser)
+    add_content_match_arguments(parser)
+    parser.add_argument('--watch', action='store_true',
+                        help=f'keep {CSV_REPORT} and {MD_REPORT} updated as files change')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help=f'seconds of quiet before a burst of changes is applied '
+                             f'(default: {DEFAULT_DEBOUNCE})')
+    parser.add_argument('--poll', action='store_true',
+                        help='use polling instead of inotify in --watch mode')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help='seconds between polls when inotify is unavailable (default: 1.0)')
+    parser.add_argument('--jsonl', metavar='PATH',
+                        help='also write every record as JSON Lines to PATH')
+    args = parser.parse_args()
+    if args.watch and args.content_match:
+        parser.error('--content-match cannot be combined with --watch')
+    if args.watch and args.jsonl:
+        parser.error('--jsonl cannot be combined with --watch')
+
+    index = load_corpus(args)
+    checker = StalenessChecker(args.staleness, index)
+    content_mode = args.staleness == 'content'
+
+    fallback = {}
+    if args.content_match:
+        matched = content_matches(index, args.match_threshold)
+        fallback = {path: wiki_path for path, (wiki_path, _) in matched.items()}
+
+    report = GapReport(index, checker, fallback)
+    if args.watch:
+        watch(report, args, content_mode)
+        return
+
+    # Stream records into the CSV, the summary report and optional JSON Lines
+    with contextlib.ExitStack() as stack:
+        csvfile = stack.enter_context(open(CSV_REPORT, 'w', newline='', encoding='utf-8'))
+        sinks = [CsvSink(csvfile, content_mode), SummarySink(sys.stdout, index, content_mode)]
+        if args.jsonl:
+            jsonfile = stack.enter_context(open(args.jsonl, 'w', encoding='utf-8'))
+            sinks.append(JsonLinesSink(jsonfile))
+        feed(report.stream(), sinks)
+
     print()
-    print(f"Generated final CSV report: final_wiki_coverage_gap_report.csv")
+    print(f"Generated final CSV report: {CSV_REPORT}")
 
 if __name__ == "__main__":
     main()
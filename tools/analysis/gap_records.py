@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Compact gap records and streaming report sinks.
+
+Analyzers produce GapRecord objects from a generator and feed them to one or
+more sinks. Records keep raw values (epoch mtimes, float similarity); only
+sinks that print them format timestamps, and each sink writes rows as they
+arrive. Sinks whose output needs totals before the tables (the markdown
+summary) spool their tables to temporary files, so memory stays flat however
+many records flow through.
+"""
+import csv
+import json
+import shutil
+import tempfile
+from datetime import datetime
+
+from corpus_index import suggest_wiki_name, suggest_wiki_path
+from instrumentation import STATS, TimedSink
+from staleness import STALE_STATUSES
+from wiki_classifier import default_classifier
+
+GAP_STATUSES = ('missing',) + STALE_STATUSES
+
+CSV_FIELDS = ['file', 'type', 'status', 'wiki_match', 'suggested_name',
+              'suggested_path', 'source_mtime', 'wiki_mtime', 'source_size',
+              'wiki_size', 'first_heading']
+
+# Spooled tables stay in memory up to this size before moving to disk
+SPOOL_SIZE = 1024 * 1024
+
+
+def format_mtime(mtime):
+    """Format a modification time for the report."""
+    return datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def format_similarity(ratio):
+    """Format a content similarity ratio for the report."""
+    return 'N/A' if ratio is None else f'{ratio:.3f}'
+
+
+class GapRecord:
+    """One source file's coverage status, holding raw unformatted values."""
+
+    __slots__ = ('file', 'basename', 'type', 'status', 'wiki_match', 'source_mtime',
+                 'wiki_mtime', 'source_size', 'wiki_size', 'first_heading', 'similarity',
+                 'classification')
+
+    def __init__(self, source, status, wiki=None, wiki_match=None, similarity=None):
+        self.file = source.path
+        self.basename = source.basename
+        self.type = source.type
+        self.status = status
+        self.wiki_match = wiki_match
+        self.source_mtime = source.mtime
+        self.wiki_mtime = wiki.mtime if wiki else None
+        self.source_size = source.size
+        self.wiki_size = wiki.size if wiki else 0
+        self.first_heading = source.heading
+        self.similarity = similarity
+        self.classification = None
+
+    @property
+    def is_gap(self):
+        return self.status in GAP_STATUSES
+
+    @property
+    def suggested_name(self):
+        return suggest_wiki_name(self.basename)
+
+    @property
+    def suggested_path(self):
+        return suggest_wiki_path(self.basename, self.type, self.classification)
+
+    def csv_row(self, content_mode=False):
+        """Return the formatted CSV row for a gap record."""
+        row = [self.file, self.type, self.status, self.wiki_match or '',
+               self.suggested_name, self.suggested_path,
+               format_mtime(self.source_mtime),
+               'N/A' if self.wiki_mtime is None else format_mtime(self.wiki_mtime),
+               self.source_size, self.wiki_size, self.first_heading or 'N/A']
+        if content_mode:
+            row.append(format_similarity(self.similarity))
+        return row
+
+    def to_json(self):
+        """Return the record as a JSON object with raw values."""
+        data = {name: getattr(self, name) for name in self.__slots__
+                if name not in ('basename', 'classification')}
+        if self.is_gap:
+            data['suggested_name'] = self.suggested_name
+            data['suggested_path'] = self.suggested_path
+        return json.dumps(data, ensure_ascii=False)
+
+
+def check_pair(checker, source, wiki, wiki_match):
+    """Return the GapRecord for a source file and its (possibly absent) wiki match."""
+    if wiki is None:
+        record = GapRecord(source, 'missing')
+    else:
+        status, ratio = checker.check(source, wiki)
+        record = GapRecord(source, status, wiki, wiki_match, ratio)
+    if record.is_gap:
+        # Gaps get a suggested path, chosen from headings and body as well
+        record.classification = default_classifier().classify_page(source, checker.index.cache)
+    if checker.git:
+        # Report commit times rather than checkout mtimes
+        record.source_mtime = checker.mtime(source)
+        if wiki:
+            record.wiki_mtime = checker.mtime(wiki)
+    return record
+
+
+class CsvSink:
+    """Write gap records as CSV rows."""
+
+    def __init__(self, out, content_mode=False):
+        self.writer = csv.writer(out)
+        self.content_mode = content_mode
+        header = list(CSV_FIELDS)
+        if content_mode:
+            header.append('similarity')
+        self.writer.writerow(header)
+
+    def write(self, record):
+        if record.is_gap:
+            self.writer.writerow(record.csv_row(self.content_mode))
+
+    def close(self):
+        pass
+
+
+class JsonLinesSink:
+    """Write every record, gap or not, as one JSON object per line."""
+
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, record):
+        self.out.write(record.to_json())
+        self.out.write('\n')
+
+    def close(self):
+        pass
+
+
+def spool():
+    return tempfile.SpooledTemporaryFile(SPOOL_SIZE, mode='w+', encoding='utf-8', newline='')
+
+
+class StatusCounter:
+    """Count records per status; counts[status] is 0 for unseen statuses."""
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+
+    def write(self, record):
+        self.counts[record.status] = self.counts.get(record.status, 0) + 1
+        self.total += 1
+
+    def __getitem__(self, status):
+        return self.counts.get(status, 0)
+
+    def close(self):
+        pass
+
+
+def copy_spool(source, out):
+    source.seek(0)
+    shutil.copyfileobj(source, out)
+    source.close()
+
+
+def feed(records, sinks):
+    """Send each record to every sink as it is produced, then close the sinks."""
+    if STATS.enabled:
+        records = STATS.timed_iter('records', records)
+        sinks = [TimedSink(sink) for sink in sinks]
+    for record in records:
+        for sink in sinks:
+            sink.write(record)
+    for sink in sinks:
+        sink.close()
@@ -0,0 +1,629 @@
+#!/usr/bin/env python3
+"""Read blob hashes and commit times straight from a repository's .git directory.
+
+Nothing runs git in a subprocess. The binary .git/index gives every tracked
+file's blob SHA-1 along with the stat data git recorded for it, so a file
+whose size and mtime still match its entry gets its blob SHA without being
+read; other files are hashed the way git hashes blobs. Refs are resolved
+through loose refs and packed-refs, and commits and trees are read from loose
+objects or pack files, resolving deltas.
+
+The last-commit time of each path comes from a newest-first walk of history
+from HEAD. The walk's result is stored in the scan cache under the HEAD
+commit: a rerun on the same HEAD reads no objects at all, and after new
+commits only the commits not reachable from the cached HEAD are walked.
+"""
+import bisect
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import zlib
+
+from instrumentation import STATS
+
+OBJECT_TYPES = {1: 'commit', 2: 'tree', 3: 'blob', 4: 'tag'}
+OFS_DELTA = 6
+REF_DELTA = 7
+
+INDEX_ENTRY = struct.Struct('>10I20sH')
+INDEX_EXTENDED = 0x4000
+INDEX_STAGE_MASK = 0x3000
+INDEX_NAME_MASK = 0xfff
+
+# Resolved delta bases kept per pack; long delta chains share their bases
+DELTA_BASE_CACHE = 256
+
+
+class GitError(Exception):
+    """A repository that cannot be read (corrupt object, unsupported format)."""
+
+
+class IndexEntry:
+    """A tracked file's blob SHA-1 and the stat data git recorded for it."""
+
+    __slots__ = ('sha', 'size', 'mtime_ns')
+
+    def __init__(self, sha, size, mtime_ns):
+        self.sha = sha
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def matches(self, st):
+        """True if the file still has the size and mtime of the index entry."""
+        return st.st_size & 0xffffffff == self.size and st.st_mtime_ns == self.mtime_ns
+
+
+def read_varint(data, pos):
+    """Decode a little-endian base-128 varint (pack headers, delta sizes)."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def read_offset(data, pos):
+    """Decode git's offset varint (OFS_DELTA distances, index v4 prefix lengths)."""
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, pos
+
+
+def read_index(path):
+    """Parse .git/index (versions 2-4) into {path: IndexEntry} for stage-0 entries."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    STATS.file_read(len(data))
+    signature, version, count = struct.unpack_from('>4sII', data)
+    if signature != b'DIRC' or version not in (2, 3, 4):
+        raise GitError(f"Unsupported git index format in {path}")
+
+    entries = {}
+    pos = 12
+    name = b''
+    for _ in range(count):
+        fields = INDEX_ENTRY.unpack_from(data, pos)
+        mtime_ns = fields[2] * 1_000_000_000 + fields[3]
+        sha, flags = fields[10], fields[11]
+        start = pos
+        pos += INDEX_ENTRY.size
+        if version >= 3 and flags & INDEX_EXTENDED:
+            pos += 2
+        if version == 4:
+            strip, pos = read_offset(data, pos)
+            end = data.index(b'\0', pos)
+            name = name[:len(name) - strip] + data[pos:end]
+            pos = end + 1
+        else:
+            length = flags & INDEX_NAME_MASK
+            end = data.index(b'\0', pos) if length == INDEX_NAME_MASK else pos + length
+            name = data[pos:end]
+            # Entries are NUL-padded to a multiple of eight bytes
+            pos = start + ((end - start + 8) & ~7)
+        if not flags & INDEX_STAGE_MASK:
+            entries[name.decode('utf-8', errors='surrogateescape')] = IndexEntry(
+                sha.hex(), fields[9], mtime_ns)
+    return entries
+
+
+def apply_delta(base, delta):
+    """Rebuild an object from its base and a git delta."""
+    _, pos = read_varint(delta, 0)
+    size, pos = read_varint(delta, pos)
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = length = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    length |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (length or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise GitError("Invalid delta opcode")
+    if len(out) != size:
+        raise GitError("Delta produced an object of the wrong size")
+    return bytes(out)
+
+
+def inflate(data, pos, size):
+    """Decompress one zlib stream starting at data[pos] (a pack mmap)."""
+    decompressor = zlib.decompressobj()
+    step = max(4096, size + 64)
+    parts = []
+    while not decompressor.eof:
+        chunk = data[pos:pos + step]
+        if not chunk:
+            raise GitError("Truncated pack object")
+        parts.append(decompressor.decompress(chunk))
+        pos += step
+    return b''.join(parts)
+
+
+class PackFile:
+    """A pack and its version 2 .idx, mapped lazily on first lookup."""
+
+    def __init__(self, idx_path, store):
+        self.idx_path = idx_path
+        self.pack_path = idx_path[:-len('.idx')] + '.pack'
+        self.store = store
+        self.names = None
+        self.offsets = None
+        self.data = None
+        self.bases = {}
+
+    def _load(self):
+        with open(self.idx_path, 'rb') as f:
+            idx = f.read()
+        STATS.file_read(len(idx))
+        if idx[:4] != b'\xfftOc' or struct.unpack_from('>I', idx, 4)[0] != 2:
+            raise GitError(f"Unsupported pack index: {self.idx_path}")
+        count = struct.unpack_from('>I', idx, 8 + 255 * 4)[0]
+        names_at = 8 + 256 * 4
+        offsets_at = names_at + count * 24
+        large_at = offsets_at + count * 4
+        self.names = [idx[names_at + i * 20:names_at + i * 20 + 20] for i in range(count)]
+        offsets = list(struct.unpack_from(f'>{count}I', idx, offsets_at))
+        for i, offset in enumerate(offsets):
+            if offset & 0x80000000:
+                large = (offset & 0x7fffffff) * 8 + large_at
+                offsets[i] = struct.unpack_from('>Q', idx, large)[0]
+        self.offsets = offsets
+        with open(self.pack_path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def find(self, sha):
+        """Return the pack offset of a binary SHA-1, or None."""
+        if self.names is None:
+            self._load()
+        i = bisect.bisect_left(self.names, sha)
+        if i < len(self.names) and self.names[i] == sha:
+            return self.offsets[i]
+        return None
+
+    def read_at(self, offset):
+        """Return (type, data) of the object at a pack offset, resolving deltas."""
+        cached = self.bases.get(offset)
+        if cached:
+            return cached
+        data = self.data
+        byte = data[offset]
+        kind = (byte >> 4) & 7
+        size = byte & 0x0f
+        shift = 4
+        pos = offset + 1
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+
+        if kind == OFS_DELTA:
+            distance, pos = read_offset(data, pos)
+            base_kind, base = self.read_at(offset - distance)
+            result = base_kind, apply_delta(base, inflate(data, pos, size))
+        elif kind == REF_DELTA:
+            base_kind, base = self.store.read(data[pos:pos + 20].hex())
+            result = base_kind, apply_delta(base, inflate(data, pos + 20, size))
+        elif kind in OBJECT_TYPES:
+            result = OBJECT_TYPES[kind], inflate(data, pos, size)
+        else:
+            raise GitError(f"Unknown pack object type {kind} in {self.pack_path}")
+
+        if len(self.bases) >= DELTA_BASE_CACHE:
+            self.bases.clear()
+        self.bases[offset] = result
+        return result
+
+
+class ObjectStore:
+    """Loose and packed objects of one repository."""
+
+    def __init__(self, objects_dir):
+        self.objects_dir = objects_dir
+        pack_dir = os.path.join(objects_dir, 'pack')
+        try:
+            names = sorted(os.listdir(pack_dir))
+        except FileNotFoundError:
+            names = []
+        self.packs = [PackFile(os.path.join(pack_dir, n), self) for n in names if n.endswith('.idx')]
+
+    def read(self, sha):
+        """Return (type, data) for a hex object id."""
+        STATS.count('git_objects_read')
+        path = os.path.join(self.objects_dir, sha[:2], sha[2:])
+        try:
+            with open(path, 'rb') as f:
+                raw = zlib.decompress(f.read())
+        except FileNotFoundError:
+            pass
+        else:
+            header, _, body = raw.partition(b'\0')
+            return header.split(b' ', 1)[0].decode('ascii'), body
+
+        binary = bytes.fromhex(sha)
+        for pack in self.packs:
+            offset = pack.find(binary)
+            if offset is not None:
+                return pack.read_at(offset)
+        raise GitError(f"Object {sha} not found in {self.objects_dir}")
+
+
+class Commit:
+    """The parts of a commit object the history walk needs."""
+
+    __slots__ = ('tree', 'parents', 'time')
+
+    def __init__(self, tree, parents, time):
+        self.tree = tree
+        self.parents = parents
+        self.time = time
+
+
+def parse_commit(data):
+    tree = None
+    parents = []
+    time = 0
+    for line in data.split(b'\n'):
+        if not line:
+            break
+        key, _, value = line.partition(b' ')
+        if key == b'tree':
+            tree = value.decode('ascii')
+        elif key == b'parent':
+            parents.append(value.decode('ascii'))
+        elif key == b'committer':
+            # "Name <email> 1700000000 +0100"
+            time = int(value.rsplit(b' ', 2)[1])
+    return Commit(tree, parents, time)
+
+
+def parse_tree(data):
+    """Return {name: sha} for the entries of a tree object."""
+    entries = {}
+    pos = 0
+    end = len(data)
+    while pos < end:
+        space = data.index(b' ', pos)
+        nul = data.index(b'\0', space)
+        name = data[space + 1:nul].decode('utf-8', errors='surrogateescape')
+        entries[name] = data[nul + 1:nul + 21].hex()
+        pos = nul + 21
+    return entries
+
+
+def blob_sha(data):
+    """Hash file content the way git hashes a blob."""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def find_git_dir(path):
+    """Return (git dir, worktree) of the repository containing path, or None."""
+    path = os.path.abspath(path)
+    while True:
+        dot_git = os.path.join(path, '.git')
+        if os.path.isdir(dot_git):
+            return dot_git, path
+        if os.path.isfile(dot_git):
+            # Submodules and linked worktrees: "gitdir: <path>"
+            with open(dot_git, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+            if content.startswith('gitdir:'):
+                return os.path.join(path, content[len('gitdir:'):].strip()), path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+class GitRepository:
+    """Index, refs and object reader for one repository, with memoized trees."""
+
+    def __init__(self, git_dir, worktree):
+        self.git_dir = os.path.normpath(git_dir)
+        self.worktree = worktree
+        # Linked worktrees keep objects and shared refs in the common directory
+        self.common_dir = self.git_dir
+        commondir = os.path.join(self.git_dir, 'commondir')
+        if os.path.isfile(commondir):
+            with open(commondir, 'r', encoding='utf-8') as f:
+                self.common_dir = os.path.normpath(os.path.join(self.git_dir, f.read().strip()))
+        self.objects = ObjectStore(os.path.join(self.common_dir, 'objects'))
+        self._index = None
+        self._index_mtime_ns = None
+        self.commits = {}
+        self.trees = {}
+
+    @property
+    def index(self):
+        if self._index is None:
+            path = os.path.join(self.git_dir, 'index')
+            with STATS.stage('git.index'):
+                try:
+                    self._index_mtime_ns = os.stat(path).st_mtime_ns
+                    self._index = read_index(path)
+                except FileNotFoundError:
+                    self._index = {}
+        return self._index
+
+    def relative_path(self, full_path):
+        return os.path.relpath(full_path, self.worktree).replace(os.sep, '/')
+
+    def resolve_ref(self, ref):
+        """Return the commit id a ref points to, following symbolic refs."""
+        for _ in range(10):
+            for base in (self.git_dir, self.common_dir):
+                path = os.path.join(base, ref)
+                if os.path.isfile(path):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        value = f.read().strip()
+                    break
+            else:
+                return self._packed_ref(ref)
+            if not value.startswith('ref:'):
+                return value
+            ref = value[len('ref:'):].strip()
+        raise GitError(f"Symbolic ref loop at {ref}")
+
+    def _packed_ref(self, ref):
+        try:
+            with open(os.path.join(self.common_dir, 'packed-refs'), 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith(('#', '^')):
+                        continue
+                    sha, _, name = line.strip().partition(' ')
+                    if name == ref:
+                        return sha
+        except FileNotFoundError:
+            pass
+        return None
+
+    def head(self):
+        """Return the HEAD commit id, or None on an unborn branch."""
+        return self.resolve_ref('HEAD')
+
+    def commit(self, sha):
+        commit = self.commits.get(sha)
+        if commit is None:
+            kind, data = self.objects.read(sha)
+            if kind != 'commit':
+                raise GitError(f"Expected a commit, found a {kind}: {sha}")
+            commit = self.commits[sha] = parse_commit(data)
+        return commit
+
+    def tree(self, sha):
+        entries = self.trees.get(sha)
+        if entries is None:
+            kind, data = self.objects.read(sha)
+            if kind != 'tree':
+                raise GitError(f"Expected a tree, found a {kind}: {sha}")
+            entries = self.trees[sha] = parse_tree(data)
+        return entries
+
+    def path_sha(self, tree, path):
+        """Return the object id at a slash-separated path in a tree, or None."""
+        for part in path.split('/'):
+            if tree is None:
+                return None
+            tree = self.tree(tree).get(part)
+        return tree
+
+    def worktree_blob(self, rel_path, full_path):
+        """Return (blob SHA, tracked and unmodified) for a file in the worktree.
+
+        The index SHA is used when the file's stat data still matches its
+        entry and the entry is not racily clean (written in the same instant
+        as the index itself); otherwise the file is read and hashed.
+        """
+        entry = self.index.get(rel_path)
+        st = os.stat(full_path)
+        if entry and entry.matches(st) and entry.mtime_ns < self._index_mtime_ns:
+            return entry.sha, True
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        STATS.file_read(len(data))
+        STATS.count('git_blobs_hashed')
+        sha = blob_sha(data)
+        return sha, entry is not None and entry.sha == sha
+
+    def changed_paths(self, commit, pending):
+        """Pending paths whose object in this commit differs from every parent's."""
+        if not commit.parents:
+            return [p for p in pending if self.path_sha(commit.tree, p)]
+        parents = [self.commit(p).tree for p in commit.parents]
+        if commit.tree in parents:
+            return []
+        changed = []
+        for path in pending:
+            sha = self.path_sha(commit.tree, path)
+            if all(self.path_sha(tree, path) != sha for tree in parents):
+                changed.append(path)
+        return changed
+
+    def walk(self, head, paths, since=None):
+        """Return {path: commit time} of the newest commit changing each path.
+
+        Commits are visited newest first. With since (an older HEAD), the walk
+        is two-coloured: commits reachable from since are marked as such and
+        not visited, so commits merged in from older branches still are.
+        """
+        found = {}
+        pending = set(paths)
+        # sha -> reachable from since, for every commit queued so far
+        old = {head: False}
+        queued = {head}
+        heap = [(-self.commit(head).time, head)]
+        if since:
+            old[since] = True
+            queued.add(since)
+            heapq.heappush(heap, (-self.commit(since).time, since))
+        # Walking stops once only commits reachable from since are queued
+        new_queued = 1
+        while heap and pending and new_queued:
+            _, sha = heapq.heappop(heap)
+            queued.discard(sha)
+            commit = self.commit(sha)
+            if old[sha]:
+                for parent in commit.parents:
+                    if parent in queued and not old[parent]:
+                        new_queued -= 1
+                    elif parent not in old:
+                        queued.add(parent)
+                        heapq.heappush(heap, (-self.commit(parent).time, parent))
+                    old[parent] = True
+                continue
+            new_queued -= 1
+            STATS.count('git_commits_walked')
+            for path in self.changed_paths(commit, pending):
+                found[path] = commit.time
+                pending.discard(path)
+            for parent in commit.parents:
+                if parent not in old:
+                    old[parent] = False
+                    queued.add(parent)
+                    new_queued += 1
+                    heapq.heappush(heap, (-self.commit(parent).time, parent))
+        return found
+
+    def last_commit_times(self, paths, cache=None):
+        """Return {path: [last commit time, blob SHA at HEAD]} (None if not at HEAD)."""
+        head = self.head()
+        if head is None:
+            return dict.fromkeys(paths)
+        cached = cache.load_git_history(self.git_dir) if cache else None
+        cached_head, times = cached if cached else (None, {})
+        since = cached_head if cached_head and cached_head != head else None
+        if since:
+            try:
+                self.commit(since)
+            except GitError:
+                # History was rewritten and the old HEAD is gone
+                since, times = None, {}
+        if since:
+            todo = set(paths) | set(times)
+        else:
+            todo = {p for p in paths if p not in times}
+        if not todo and cached_head == head:
+            return {p: times[p] for p in paths}
+
+        with STATS.stage('git.history'):
+            tree = self.commit(head).tree
+            present = {}
+            for path in todo:
+                sha = self.path_sha(tree, path)
+                if sha:
+                    present[path] = sha
+                else:
+                    times[path] = None
+            found = self.walk(head, present, since)
+            # Paths the cache never saw, or saw with another blob, need the full history
+            unknown = [p for p in present if p not in found
+                       and not (times.get(p) and times[p][1] == present[p])]
+            if since and unknown:
+                found.update(self.walk(head, unknown))
+            for path, sha in present.items():
+                if path in found:
+                    times[path] = [found[path], sha]
+                elif not times.get(path):
+                    times[path] = None
+        if cache:
+            cache.store_git_history(self.git_dir, head, times)
+            cache.commit()
+        return {p: times[p] for p in paths}
+
+
+class GitFileState:
+    """A file's blob SHA and the time its content was last changed."""
+
+    __slots__ = ('blob', 'time', 'committed')
+
+    def __init__(self, blob, time, committed):
+        self.blob = blob
+        self.time = time
+        self.committed = committed
+
+
+class GitWorkspace:
+    """Blob SHAs and last-commit times for corpus files, in whatever repository holds them.
+
+    Files outside any repository, untracked or modified since their last
+    commit fall back to their mtime; their blob SHA is computed from content.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.repos = {}
+        self.directories = {}
+        self.states = {}
+
+    def repository(self, full_path):
+        directory = os.path.dirname(os.path.abspath(full_path))
+        if directory not in self.directories:
+            found = find_git_dir(directory)
+            repo = None
+            if found:
+                git_dir, worktree = found
+                repo = self.repos.get(git_dir)
+                if repo is None:
+                    repo = self.repos[git_dir] = GitRepository(git_dir, worktree)
+            self.directories[directory] = repo
+        return self.directories[directory]
+
+    def key(self, corpus_file):
+        return corpus_file.full_path, corpus_file.digest, corpus_file.mtime
+
+    def prefetch(self, files):
+        """Look up every file not known yet, with one history walk per repository."""
+        groups = {}
+        for f in files:
+            if self.key(f) not in self.states:
+                groups.setdefault(self.repository(f.full_path), []).append(f)
+        for repo, group in groups.items():
+            if repo is None:
+                for f in group:
+                    self.states[self.key(f)] = GitFileState(
+                        self._hash(f.full_path), f.mtime, False)
+                continue
+            paths = {f: repo.relative_path(f.full_path) for f in group}
+            times = repo.last_commit_times(sorted(set(paths.values())), self.cache)
+            for f, path in paths.items():
+                blob, clean = repo.worktree_blob(path, f.full_path)
+                history = times.get(path)
+                # Staged or modified content is newer than the last commit
+                if clean and history and history[1] == blob:
+                    self.states[self.key(f)] = GitFileState(blob, history[0], True)
+                else:
+                    self.states[self.key(f)] = GitFileState(blob, f.mtime, False)
+
+    def _hash(self, full_path):
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        STATS.file_read(len(data))
+        STATS.count('git_blobs_hashed')
+        return blob_sha(data)
+
+    def get(self, corpus_file):
+        key = self.key(corpus_file)
+        if key not in self.states:
+            self.prefetch([corpus_file])
+        return self.states[key]
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Streaming, byte-level markdown heading extraction.
+
+Files are fed in chunks and split into lines as bytes. YAML front matter and
+fenced code blocks are skipped, and only heading lines are decoded. A leading
+'---' that is never closed, or not within FRONT_MATTER_MAX_BYTES, is a
+thematic break rather than front matter, so the lines after it are scanned as
+normal text; at most that much is held back while deciding.
+
+Every caller needs the whole file: corpus_index.read_file hashes it in the
+same pass and keeps the full outline for anchors, navigation and section
+diffs. There is therefore no first-heading-only mode that stops reading early.
+"""
+import re
+
+CHUNK_SIZE = 4096
+
+HEADING_RE = re.compile(rb'^(#{1,6}) (.+)$')
+FENCE_RE = re.compile(rb'^ {0,3}(`{3,}|~{3,})')
+FRONT_MATTER_OPEN = b'---'
+FRONT_MATTER_CLOSE = (b'---', b'...')
+FRONT_MATTER_MAX_BYTES = 16 * 1024
+
+SLUG_STRIP_RE = re.compile(r'[^\w\- ]')
+
+
+def slugify(text):
+    """Return the GitHub-style anchor slug for a heading."""
+    return SLUG_STRIP_RE.sub('', text.strip().lower()).replace(' ', '-')
+
+
+def outline_entries(outline):
+    """Return (level, text, slug, line) for an outline, with GitHub's -N slug suffixes."""
+    entries = []
+    seen = {}
+    for level, text, line in outline:
+        slug = slugify(text)
+        count = seen.get(slug, 0)
+        seen[slug] = count + 1
+        entries.append((level, text, slug if count == 0 else f'{slug}-{count}', line))
+    return entries
+
+
+def heading_slugs(outline):
+    """Return the set of anchor slugs for an outline."""
+    return {slug for _, _, slug, _ in outline_entries(outline)}
+
+
+class HeadingDecodeError(ValueError):
+    """A heading line that is not valid UTF-8."""
+
+    def __init__(self, path, line, reason):
+        super().__init__(f"{path or '<stream>'}:{line}: heading is not valid UTF-8 ({reason})")
+        self.path = path
+        self.line = line
+
+
+class HeadingScanner:
+    """Incremental scanner that collects ATX headings from fed byte chunks."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.heading = None
+        self.outline = []
+        self.errors = []
+        self.bytes_seen = 0
+        self.finished = False
+        self._pending = b''
+        self._line_no = 0
+        # Lines held back while front matter is open, None outside it
+        self._front_matter = None
+        self._front_matter_bytes = 0
+        self._fence = None
+
+    def feed(self, chunk):
+        """Consume a chunk of bytes."""
+        self.bytes_seen += len(chunk)
+        lines = (self._pending + chunk).split(b'\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._scan_line(line)
+
+    def close(self):
+        """Flush the final unterminated line."""
+        if not self.finished and self._pending:
+            self._scan_line(self._pending)
+        self._pending = b''
+        if self._front_matter is not None:
+            self._release_front_matter()
+        self.finished = True
+
+    def _release_front_matter(self):
+        """Scan held lines as text from line 2 on: the '---' did not open front matter."""
+        lines, self._front_matter = self._front_matter, None
+        self._line_no = 1
+        for line in lines:
+            self._scan_line(line)
+
+    def _scan_line(self, line):
+        self._line_no += 1
+        line = line.rstrip(b'\r')
+
+        if self._line_no == 1 and line.rstrip() == FRONT_MATTER_OPEN:
+            self._front_matter = []
+            return
+        if self._front_matter is not None:
+            if line.rstrip() in FRONT_MATTER_CLOSE:
+                self._front_matter = None
+                return
+            self._front_matter.append(line)
+            self._front_matter_bytes += len(line) + 1
+            if self._front_matter_bytes > FRONT_MATTER_MAX_BYTES:
+                self._release_front_matter()
+            return
+
+        fence = FENCE_RE.match(line)
+        if self._fence:
+            # A closing fence uses the same character, at least as long, and nothing else
+            if (fence and fence.group(1)[:1] == self._fence[:1]
+                    and len(fence.group(1)) >= len(self._fence)
+                    and not line[fence.end():].strip()):
+                self._fence = None
+            return
+        if fence:
+            self._fence = fence.group(1)
+            return
+
+        match = HEADING_RE.match(line)
+        if not match:
+            return
+        level = len(match.group(1))
+        try:
+            text = match.group(2).decode('utf-8').strip()
+        except UnicodeDecodeError as e:
+            self.errors.append(HeadingDecodeError(self.path, self._line_no, e.reason))
+            return
+        self.outline.append((level, text, self._line_no))
+        if level == 1 and self.heading is None:
+            self.heading = text
+
+
+def scan_bytes(data, path=None):
+    """Scan an in-memory document and return its HeadingScanner."""
+    scanner = HeadingScanner(path)
+    scanner.feed(data)
+    scanner.close()
+    return scanner
+
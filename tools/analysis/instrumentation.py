@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Opt-in per-stage instrumentation for the corpus tools.
+
+Tools time their stages with `with STATS.stage('name'):` and count work with
+STATS.count(). Both return immediately while instrumentation is disabled (the
+default), so the hooks can stay in hot paths. The --stats option turns it on
+and prints a table or JSON summary to stderr at exit, and --stats-prom writes
+a Prometheus text-format file for node_exporter's textfile collector.
+
+CPU time is process-wide, so it includes the worker threads of a stage.
+"""
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+STATS_FORMATS = ('table', 'json')
+
+# A cache hit saves at least an open, a read and a close
+SYSCALLS_PER_CACHE_HIT = 3
+
+
+class Stats:
+    """Stage timings, counters and gauges for one tool run."""
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self.caches = []
+        self.started = None
+
+    def enable(self):
+        self.enabled = True
+        self.started = time.perf_counter()
+
+    def stage(self, name):
+        """Context manager adding the enclosed wall and CPU time to a stage."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def _add(self, name, wall, cpu):
+        with self.lock:
+            entry = self.stages.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += wall
+            entry[2] += cpu
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def file_read(self, nbytes):
+        """Record one opened file and the bytes read from it."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters['files_opened'] = self.counters.get('files_opened', 0) + 1
+            self.counters['bytes_read'] = self.counters.get('bytes_read', 0) + nbytes
+
+    def peak(self, name, value):
+        """Keep the highest value seen for a gauge (e.g. a queue depth)."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.gauges[name] = max(self.gauges.get(name, 0), value)
+
+    def pool_submitted(self, tasks, workers):
+        """Record the backlog a thread pool holds when tasks are submitted at once."""
+        self.peak('pool_queue_depth_peak', max(0, tasks - workers))
+        self.count('pool_tasks', tasks)
+
+    def track_cache(self, cache):
+        """Report the hit and miss counts of a ScanCache at exit."""
+        if self.enabled:
+            self.caches.append(cache)
+
+    def timed_iter(self, name, iterable):
+        """Yield from iterable, charging the time spent producing items to a stage."""
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self._add(name, time.perf_counter() - wall, time.process_time() - cpu)
+                return
+            self._add(name, time.perf_counter() - wall, time.process_time() - cpu)
+            yield item
+
+    def snapshot(self):
+        """Return all measurements as a JSON-serializable dict."""
+        counters = dict(self.counters)
+        hits = sum(c.hits for c in self.caches)
+        if self.caches:
+            counters['cache_hits'] = hits
+            counters['cache_misses'] = sum(c.misses for c in self.caches)
+            counters['syscalls_avoided'] = hits * SYSCALLS_PER_CACHE_HIT
+        counters.update(self.gauges)
+        return {
+            'tool': tool_name(),
+            'total_wall_seconds': round(time.perf_counter() - self.started, 6),
+            'stages': {name: {'calls': calls, 'wall_seconds': round(wall, 6),
+                              'cpu_seconds': round(cpu, 6)}
+                       for name, (calls, wall, cpu) in self.stages.items()},
+            'counters': counters
+        }
+
+
+STATS = Stats()
+
+
+def tool_name():
+    return os.path.splitext(os.path.basename(sys.argv[0]))[0] or 'python'
+
+
+class TimedSink:
+    """Wrap a report sink so its writes are charged to a 'sink.<Class>' stage."""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.name = f'sink.{type(sink).__name__}'
+
+    def write(self, record):
+        with STATS.stage(self.name):
+            self.sink.write(record)
+
+    def close(self):
+        with STATS.stage(self.name):
+            self.sink.close()
+
+
+def format_table(snapshot):
+    lines = [f"Stats for {snapshot['tool']} ({snapshot['total_wall_seconds']:.3f} s total)",
+             f"{'Stage':<28} {'Calls':>8} {'Wall (s)':>10} {'CPU (s)':>10}"]
+    for name, stage in snapshot['stages'].items():
+        lines.append(f"{name:<28} {stage['calls']:>8} {stage['wall_seconds']:>10.4f} "
+                     f"{stage['cpu_seconds']:>10.4f}")
+    lines.append(f"{'Counter':<28} {'Value':>8}")
+    for name, value in sorted(snapshot['counters'].items()):
+        lines.append(f"{name:<28} {value:>8}")
+    return '\n'.join(lines) + '\n'
+
+
+def format_prometheus(snapshot):
+    """Render a snapshot in the Prometheus text exposition format."""
+    tool = snapshot['tool']
+    lines = []
+
+    def metric(name, help_text, samples):
+        lines.append(f'# HELP corpus_tool_{name} {help_text}')
+        lines.append(f'# TYPE corpus_tool_{name} gauge')
+        for labels, value in samples:
+            label_text = ','.join(f'{k}="{v}"' for k, v in (('tool', tool),) + labels)
+            lines.append(f'corpus_tool_{name}{{{label_text}}} {value}')
+
+    stages = snapshot['stages']
+    metric('run_seconds', 'Wall-clock time of the whole run.',
+           [((), snapshot['total_wall_seconds'])])
+    metric('stage_wall_seconds', 'Wall-clock time spent per stage.',
+           [((('stage', n),), s['wall_seconds']) for n, s in stages.items()])
+    metric('stage_cpu_seconds', 'Process CPU time spent per stage.',
+           [((('stage', n),), s['cpu_seconds']) for n, s in stages.items()])
+    metric('stage_calls', 'Times each stage was entered.',
+           [((('stage', n),), s['calls']) for n, s in stages.items()])
+    for name, value in sorted(snapshot['counters'].items()):
+        metric(name, f'{name.replace("_", " ").capitalize()}.', [((), value)])
+    return '\n'.join(lines) + '\n'
+
+
+def add_stats_arguments(parser):
+    """Add the --stats options to a tool's argument parser."""
+    parser.add_argument('--stats', nargs='?', const='table', choices=STATS_FORMATS,
+                        help='print per-stage timings and counters to stderr at exit '
+                             '(table or json; default: table)')
+    parser.add_argument('--stats-prom', metavar='PATH',
+                        help='write the stats as a Prometheus textfile to PATH')
+    return parser
+
+
+def enable_stats(args):
+    """Turn instrumentation on if the parsed arguments ask for it."""
+    if STATS.enabled or not (getattr(args, 'stats', None) or getattr(args, 'stats_prom', None)):
+        return
+    STATS.enable()
+    atexit.register(_report, args.stats, args.stats_prom)
+
+
+def _report(fmt, prom_path):
+    snapshot = STATS.snapshot()
+    if fmt == 'json':
+        print(json.dumps(snapshot, indent=2), file=sys.stderr)
+    elif fmt:
+        sys.stderr.write(format_table(snapshot))
+    if prom_path:
+        from corpus_index import atomic_write
+        atomic_write(prom_path, format_prometheus(snapshot))
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Wiki link graph with broken-link, anchor, orphan and reachability checks.
+
+Every wiki page is parsed once for [[wiki links]] and relative markdown
+links. Parsed links are cached in the scan cache by content hash, so after
+an edit only that page is re-parsed; resolving links against the page and
+heading-slug indexes is pure dictionary work. With --watch the graph is kept
+in memory and an edited page only has its own edges re-resolved, plus the
+pages whose links it may have broken or fixed (see LinkGraph.refresh).
+
+Links to directories (e.g. ../../examples/) point into the repository, not
+at wiki pages, and are not checked.
+"""
+import re
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from corpus_index import build_parser, load_corpus, normalize_name
+from headings import FENCE_RE, heading_slugs
+from instrumentation import STATS
+from watcher import DEFAULT_DEBOUNCE, watch_changes
+
+WIKI_LINK_RE = re.compile(r'\[\[([^\]]+)\]\]')
+MD_LINK_RE = re.compile(r'(?<!!)\[[^\]]*\]\(([^)\s]+)(?:\s+"[^"]*")?\)')
+EXTERNAL_PREFIXES = ('http://', 'https://', 'mailto:', 'ftp://')
+
+# Pages that act as navigation roots for reachability
+ENTRY_PAGES = ('Home.md', '_Sidebar.md')
+# Special GitHub wiki pages that are never linked to directly
+SPECIAL_PAGES = ('Home.md', '_Sidebar.md', '_Footer.md')
+
+
+def parse_links(full_path):
+    """Return [line, target, anchor] for every internal link in a page.
+
+    target is the page part of the link ('' for same-page anchors) and
+    anchor is the fragment without '#' ('' when absent).
+    """
+    links = []
+    fence = None
+    nbytes = 0
+    with open(full_path, 'rb') as f:
+        for line_no, raw in enumerate(f, 1):
+            nbytes += len(raw)
+            fence_match = FENCE_RE.match(raw)
+            if fence:
+                if fence_match and fence_match.group(1)[:1] == fence[:1]:
+                    fence = None
+                continue
+            if fence_match:
+                fence = fence_match.group(1)
+                continue
+
+            line = raw.decode('utf-8', errors='replace')
+            for match in WIKI_LINK_RE.finditer(line):
+                # [[Text|Page]] links to Page
+                target = match.group(1).split('|')[-1].strip()
+                page, _, anchor = target.partition('#')
+                links.append([line_no, page.strip(), anchor.strip()])
+            for match in MD_LINK_RE.finditer(line):
+                target = match.group(1)
+                if target.startswith(EXTERNAL_PREFIXES) or target.startswith('<'):
+                    continue
+                page, _, anchor = target.partition('#')
+                suffix = Path(page).suffix.lower()
+                if (suffix and suffix != '.md') or page.endswith('/'):
+                    continue
+                links.append([line_no, page, anchor])
+    STATS.file_read(nbytes)
+    return links
+
+
+class LinkGraph:
+    """Resolved page-to-page edges plus broken links and anchors.
+
+    Edges are stored per source page, so update_page() replaces only the
+    edges of the page that changed.
+    """
+
+    def __init__(self, pages):
+        # pages: wiki path -> CorpusFile
+        self.pages = pages
+        self.by_name = {}
+        for path in pages:
+            self.by_name.setdefault(normalize_name(Path(path).stem), path)
+        self.slugs = {path: heading_slugs(f.outline) for path, f in pages.items()}
+        self.links = {}
+        self.out_edges = {}
+        self.in_edges = defaultdict(set)
+        self.broken_links = {}
+        self.broken_anchors = {}
+
+    def resolve(self, source, target):
+        """Return the wiki path a link target names, or None."""
+        if not target:
+            return source
+        return self.by_name.get(normalize_name(Path(target).stem if target.endswith('.md') else target))
+
+    def update_page(self, path, links):
+        """Replace the outgoing edges of one page."""
+        self.links[path] = links
+        for target in self.out_edges.get(path, ()):
+            self.in_edges[target].discard(path)
+
+        edges = set()
+        broken = []
+        broken_anchors = []
+        for line, target, anchor in links:
+            resolved = self.resolve(path, target)
+            if resolved is None:
+                broken.append((line, target + (f'#{anchor}' if anchor else '')))
+                continue
+            if anchor and anchor.lower() not in self.slugs[resolved]:
+                broken_anchors.append((line, f'{target}#{anchor}', resolved))
+            if resolved != path:
+                edges.add(resolved)
+
+        self.out_edges[path] = edges
+        for target in edges:
+            self.in_edges[target].add(path)
+        self.broken_links[path] = broken
+        self.broken_anchors[path] = broken_anchors
+
+    def refresh(self, pages, changed_links):
+        """Apply edited pages given {wiki path: links} for changed pages.
+
+        Only the changed pages are re-resolved, plus pages whose links could
+        resolve differently: pages linking to a page whose headings changed,
+        and, when pages were added or removed, pages with broken links or
+        links to a removed page.
+        """
+        removed = self.pages.keys() - pages.keys()
+        added = pages.keys() - self.pages.keys()
+        self.pages = pages
+        affected = set(changed_links)
+
+        for path in removed:
+            affected |= self.in_edges.pop(path, set())
+            for target in self.out_edges.pop(path, ()):
+                self.in_edges[target].discard(path)
+            del self.links[path], self.slugs[path]
+            self.broken_links.pop(path, None)
+            self.broken_anchors.pop(path, None)
+        if removed or added:
+            self.by_name = {}
+            for path in pages:
+                self.by_name.setdefault(normalize_name(Path(path).stem), path)
+            affected |= {p for p, broken in self.broken_links.items() if broken}
+
+        for path in changed_links:
+            slugs = heading_slugs(pages[path].outline)
+            if slugs != self.slugs.get(path):
+                self.slugs[path] = slugs
+                affected |= self.in_edges.get(path, set())
+
+        for path in affected - removed:
+            self.update_page(path, changed_links.get(path, self.links.get(path, [])))
+        return affected - removed
+
+    def orphans(self):
+        """Pages nothing else links to (special pages excluded)."""
+        return sorted(p for p in self.pages
+                      if not self.in_edges.get(p) and p not in SPECIAL_PAGES)
+
+    def reachable(self):
+        """Pages reachable from Home.md and _Sidebar.md."""
+        queue = deque(p for p in ENTRY_PAGES if p in self.pages)
+        seen = set(queue)
+        while queue:
+            for target in self.out_edges.get(queue.popleft(), ()):
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(target)
+        return seen
+
+
+def load_links(index, pages=None):
+    """Return {wiki path: links} for pages (default: all), parsing only pages not in the cache."""
+    cache = index.cache
+    links = {}
+    todo = []
+    for page in index.wiki_files if pages is None else pages:
+        cached = cache.load_derived('links', page.digest) if cache else None
+        if cached is not None:
+            links[page.path] = cached
+        else:
+            todo.append(page)
+
+    with STATS.stage('links.parse'), ThreadPoolExecutor(max_workers=index.workers) as pool:
+        STATS.pool_submitted(len(todo), index.workers)
+        for page, parsed in zip(todo, pool.map(parse_links, [p.full_path for p in todo])):
+            links[page.path] = parsed
+            if cache:
+                cache.store_derived('links', page.digest, parsed)
+    if cache:
+        cache.commit()
+    return links
+
+
+def build_graph(index):
+    links = load_links(index)
+    with STATS.stage('links.resolve'):
+        graph = LinkGraph(index.wiki)
+        for path, page_links in links.items():
+            graph.update_page(path, page_links)
+    return graph
+
+
+def print_report(index, graph):
+    broken = [(p, line, t) for p, items in sorted(graph.broken_links.items()) for line, t in items]
+    anchors = [(p, line, t, r) for p, items in sorted(graph.broken_anchors.items())
+               for line, t, r in items]
+    orphans = graph.orphans()
+    reachable = graph.reachable()
+    unreachable = sorted(p for p in index.wiki if p not in reachable)
+
+    print("# Wiki Link Graph Report")
+    print()
+    print("## Summary")
+    print(f"- Wiki pages: {len(index.wiki)}")
+    print(f"- Links between pages: {sum(len(e) for e in graph.out_edges.values())}")
+    print(f"- Broken links: {len(broken)}")
+    print(f"- Broken anchors: {len(anchors)}")
+    print(f"- Orphan pages: {len(orphans)}")
+    print(f"- Reachable from {' and '.join(ENTRY_PAGES)}: {len(reachable)}")
+    print()
+
+    print("## Broken Links")
+    print("| Page | Line | Target |")
+    print("|------|------|--------|")
+    for page, line, target in broken:
+        print(f"| {page} | {line} | {target} |")
+    print()
+
+    print("## Broken Anchors")
+    print("| Page | Line | Target | Resolved Page |")
+    print("|------|------|--------|---------------|")
+    for page, line, target, resolved in anchors:
+        print(f"| {page} | {line} | {target} | {resolved} |")
+    print()
+
+    print("## Orphan Pages")
+    for page in orphans:
+        print(f"- {page}")
+    print()
+
+    print("## Unreachable Pages")
+    for page in unreachable:
+        print(f"- {page}")
+
+
+def main():
+    parser = build_parser('Report broken links, broken anchors and orphan wiki pages.')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep the graph in memory and print a new report as pages change')
+    args = parser.parse_args()
+    index = load_corpus(args)
+    graph = build_graph(index)
+    print_report(index, graph)
+    if not args.watch:
+        return
+
+    print(f"Watching {args.root} for changes (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        for paths in watch_changes(args.root, DEFAULT_DEBOUNCE):
+            started = time.perf_counter()
+            if paths is None:
+                index.rescan()
+                graph = build_graph(index)
+                updated = len(index.wiki)
+            else:
+                _, changed_wiki = index.update(paths)
+                if not changed_wiki:
+                    continue
+                changed = [index.wiki[p] for p in changed_wiki if p in index.wiki]
+                with STATS.stage('links.refresh'):
+                    updated = len(graph.refresh(index.wiki, load_links(index, changed)))
+            print()
+            print_report(index, graph)
+            sys.stdout.flush()
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"Re-resolved {updated} pages in {elapsed:.1f} ms", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
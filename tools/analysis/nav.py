@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Generate wiki/_Sidebar.md, wiki/Table-of-Contents.md and docs/DOCUMENTATION_INDEX.md.
+
+The navigation is rendered from the outline index: every heading of every
+page (level, text, GitHub slug, line) as collected by the corpus scan, so
+unchanged pages come straight from the scan cache without being re-read.
+Each page's rendered fragment is kept per outline hash, so with --watch only
+pages whose outline changed are re-rendered. A navigation file is written
+only when its rendered text differs from what is on disk.
+
+Only the text between the generated-content markers is replaced; anything a
+maintainer adds outside them is kept. A file without markers gets the
+generated block inserted under its title, with its existing text left
+below. wiki/Documentation-Index.md is the wiki copy of
+docs/DOCUMENTATION_INDEX.md and is refreshed by sync.py.
+"""
+import json
+import os
+import sys
+import time
+
+from convert_links import page_name
+from corpus_index import atomic_write, build_parser, content_digest, load_corpus
+from headings import outline_entries
+from instrumentation import STATS
+from watcher import DEFAULT_DEBOUNCE, watch_changes
+
+BEGIN_MARKER = '<!-- BEGIN GENERATED NAVIGATION (tools/analysis/nav.py) -->'
+END_MARKER = '<!-- END GENERATED NAVIGATION -->'
+
+SIDEBAR = 'wiki/_Sidebar.md'
+TABLE_OF_CONTENTS = 'wiki/Table-of-Contents.md'
+DOCUMENTATION_INDEX = 'docs/DOCUMENTATION_INDEX.md'
+
+# Wiki directory -> sidebar section title, in sidebar order
+WIKI_SECTIONS = {
+    'guides': '🎯 Guides',
+    'developer': '👨‍💻 Developer',
+    'reference': '📚 Reference',
+    'troubleshooting': '🔧 Troubleshooting',
+    'community': '🤝 Community',
+    '': '📄 More Pages'
+}
+DEFAULT_DEPTH = 3
+
+
+def outline_hash(corpus_file):
+    return content_digest(json.dumps([corpus_file.path, corpus_file.outline]).encode('utf-8'))
+
+
+def wiki_section(path):
+    directory = path.rsplit('/', 1)[0] if '/' in path else ''
+    return directory if directory in WIKI_SECTIONS else ''
+
+
+def is_listed(path):
+    """Special pages (_Sidebar, _Footer) and the table of contents itself are never listed."""
+    return not os.path.basename(path).startswith('_') and f'wiki/{path}' != TABLE_OF_CONTENTS
+
+
+def link_text(text):
+    """Make heading text safe to use as link text."""
+    return text.replace('|', '/').replace('[', '(').replace(']', ')')
+
+
+class PageFragments:
+    """Rendered navigation lines for one page, valid for one outline hash."""
+
+    __slots__ = ('hash', 'sidebar', 'toc', 'index')
+
+    def __init__(self, corpus_file, depth):
+        self.hash = outline_hash(corpus_file)
+        self.sidebar = []
+        self.toc = []
+        self.index = []
+        entries = outline_entries(corpus_file.outline)
+        title = corpus_file.heading or page_name(corpus_file.path)
+
+        if corpus_file.type == 'wiki':
+            name = page_name(corpus_file.path)
+            self.sidebar.append(f'- [[{name}]]')
+            self.toc.append(f'- [[{name}]] - {title}' if title != name else f'- [[{name}]]')
+            for level, text, slug, line in entries:
+                if 1 < level <= depth:
+                    self.toc.append(f'{"  " * (level - 1)}- [[{link_text(text)}|{name}#{slug}]]')
+        else:
+            link = corpus_file.basename
+            self.index.append(f'- [{link_text(title)}]({link})')
+            for level, text, slug, line in entries:
+                if 1 < level <= depth:
+                    self.index.append(f'{"  " * (level - 1)}- [{link_text(text)}]({link}#{slug})')
+
+
+class NavGenerator:
+    """Renders the navigation files, reusing fragments of unchanged pages."""
+
+    def __init__(self, index, depth=DEFAULT_DEPTH):
+        self.index = index
+        self.depth = depth
+        self.fragments = {}
+        self.rendered = 0
+
+    def fragment(self, corpus_file):
+        key = (corpus_file.type, corpus_file.path)
+        cached = self.fragments.get(key)
+        if cached is None or cached.hash != outline_hash(corpus_file):
+            cached = self.fragments[key] = PageFragments(corpus_file, self.depth)
+            self.rendered += 1
+        return cached
+
+    def render_sidebar(self):
+        groups = {section: [] for section in WIKI_SECTIONS}
+        for wf in self.index.wiki_files:
+            if is_listed(wf.path) and wf.path != 'Home.md':
+                groups[wiki_section(wf.path)].extend(self.fragment(wf).sidebar)
+        lines = ['## 🏠 [[Home]]']
+        for section, title in WIKI_SECTIONS.items():
+            if groups[section]:
+                lines += ['', f'## {title}', ''] + groups[section]
+        return lines
+
+    def render_toc(self):
+        groups = {section: [] for section in WIKI_SECTIONS}
+        for wf in self.index.wiki_files:
+            if is_listed(wf.path):
+                groups[wiki_section(wf.path)].extend(self.fragment(wf).toc)
+        lines = []
+        for section, title in WIKI_SECTIONS.items():
+            if groups[section]:
+                lines += [f'## {title}', ''] + groups[section] + ['']
+        return lines[:-1]
+
+    def render_index(self):
+        lines = []
+        for df in self.index.docs_files:
+            if df.path != DOCUMENTATION_INDEX:
+                lines.extend(self.fragment(df).index)
+        return lines
+
+    def outputs(self):
+        """Return {relative path: (default title, generated lines)}."""
+        return {
+            SIDEBAR: ('# 📚 Iron-Anarchy Bot Wiki', self.render_sidebar()),
+            TABLE_OF_CONTENTS: ('# 📖 Table of Contents', self.render_toc()),
+            DOCUMENTATION_INDEX: ('# 📚 Documentation Index', self.render_index())
+        }
+
+
+def splice(current, title, lines):
+    """Replace the generated region of a file, keeping hand-written text around it."""
+    block = '\n'.join([BEGIN_MARKER, ''] + lines + ['', END_MARKER])
+    if current is not None:
+        start = current.find(BEGIN_MARKER)
+        end = current.find(END_MARKER, start)
+        if start != -1 and end != -1:
+            return current[:start] + block + current[end + len(END_MARKER):]
+    if not current or not current.strip():
+        return f'{title}\n\n{block}\n'
+    # First generation: insert the block under the page title and keep the rest
+    if current.startswith('# '):
+        head, _, body = current.partition('\n')
+        body = body.lstrip('\r\n')
+        return f'{head}\n\n{block}\n\n{body}' if body else f'{head}\n\n{block}\n'
+    return f'{block}\n\n{current}'
+
+
+def read_text(path):
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_navigation(generator, repo_root, dry_run=False):
+    """Render every navigation file; return the paths whose content changed."""
+    changed = []
+    with STATS.stage('nav.render'):
+        outputs = generator.outputs()
+    for rel_path, (title, lines) in outputs.items():
+        full_path = os.path.join(repo_root, rel_path)
+        current = read_text(full_path)
+        text = splice(current, title, lines)
+        if text == current:
+            continue
+        changed.append(rel_path)
+        if not dry_run:
+            atomic_write(full_path, text)
+    return changed
+
+
+def main():
+    parser = build_parser('Generate the wiki sidebar, table of contents and docs index.')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH,
+                        help=f'deepest heading level listed under each page (default: {DEFAULT_DEPTH})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report which files would change without writing them')
+    parser.add_argument('--watch', action='store_true',
+                        help='regenerate the navigation as pages change')
+    args = parser.parse_args()
+
+    index = load_corpus(args)
+    generator = NavGenerator(index, args.depth)
+    verb = 'Would update' if args.dry_run else 'Updated'
+
+    changed = write_navigation(generator, args.root, args.dry_run)
+    for path in changed:
+        print(f"{verb} {path}")
+    if not changed:
+        print("Navigation is up to date")
+    if not args.watch:
+        return
+
+    print(f"Watching {args.root} for changes (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        for paths in watch_changes(args.root, DEFAULT_DEBOUNCE):
+            started = time.perf_counter()
+            generator.rendered = 0
+            if paths is None:
+                index.rescan()
+            else:
+                changed_sources, changed_wiki = index.update(paths)
+                if not changed_sources and not changed_wiki:
+                    continue
+            changed = write_navigation(generator, args.root, args.dry_run)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"Re-rendered {generator.rendered} pages, {verb.lower()} "
+                  f"{len(changed)} files in {elapsed:.1f} ms", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Paragraph-level near-duplicate report across root, docs/ and wiki/.
+
+Covers the markdown files the gap analyzers scan plus their .backup, .old
+and .pre-esm-update copies. Identical paragraphs are grouped by hash first;
+the remaining unique paragraphs get MinHash signatures that are bucketed
+with locality-sensitive hashing, so only paragraphs sharing a bucket are
+ever compared and the search stays sub-quadratic.
+"""
+import argparse
+import hashlib
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from corpus_index import add_root_arguments, collect_corpus
+from instrumentation import STATS, enable_stats
+
+MARKDOWN_COPY_SUFFIXES = ('.md', '.md.backup', '.md.old', '.md.pre-esm-update')
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_MIN_CHARS = 80
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _permutations():
+    """Deterministic (a, b) pairs for the universal hash family."""
+    perms = []
+    for i in range(NUM_PERM):
+        seed = hashlib.blake2b(f'minhash-{i}'.encode(), digest_size=16).digest()
+        a = int.from_bytes(seed[:8], 'big') % MERSENNE_PRIME or 1
+        b = int.from_bytes(seed[8:], 'big') % MERSENNE_PRIME
+        perms.append((a, b))
+    return perms
+
+
+PERMUTATIONS = _permutations()
+
+
+class Paragraph:
+    """A paragraph occurrence: where it is and what it normalizes to."""
+
+    __slots__ = ('path', 'line', 'size', 'key', 'words')
+
+    def __init__(self, path, line, size, key, words):
+        self.path = path
+        self.line = line
+        self.size = size
+        self.key = key
+        self.words = words
+
+
+def read_paragraphs(path, full_path, min_chars=DEFAULT_MIN_CHARS):
+    """Split a file into blank-line separated paragraphs of at least min_chars."""
+    paragraphs = []
+    block = []
+    start = 0
+
+    def flush():
+        raw = '\n'.join(block)
+        if len(raw.strip()) >= min_chars:
+            words = WORD_RE.findall(raw.lower())
+            key = hashlib.blake2b(' '.join(words).encode('utf-8'), digest_size=16).digest()
+            paragraphs.append(Paragraph(path, start, len(raw.encode('utf-8')), key, words))
+        block.clear()
+
+    nbytes = 0
+    with open(full_path, 'rb') as f:
+        for line_no, raw in enumerate(f, 1):
+            nbytes += len(raw)
+            line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+            if line.strip():
+                if not block:
+                    start = line_no
+                block.append(line)
+            elif block:
+                flush()
+    if block:
+        flush()
+    STATS.file_read(nbytes)
+    return paragraphs
+
+
+def shingles(words):
+    """Hash word n-grams of a paragraph to 64-bit integers."""
+    if len(words) < SHINGLE_SIZE:
+        grams = [' '.join(words)]
+    else:
+        grams = [' '.join(words[i:i + SHINGLE_SIZE])
+                 for i in range(len(words) - SHINGLE_SIZE + 1)]
+    return {int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest(), 'big')
+            for g in grams}
+
+
+def minhash(words):
+    """Return the MinHash signature of a paragraph."""
+    values = shingles(words)
+    return tuple(min((a * x + b) % MERSENNE_PRIME for x in values) for a, b in PERMUTATIONS)
+
+
+def estimated_jaccard(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        parent = self.parent.setdefault(x, x)
+        if parent != x:
+            parent = self.parent[x] = self.find(parent)
+        return parent
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def find_duplicates(paragraphs, threshold=DEFAULT_THRESHOLD):
+    """Group paragraphs into clusters of exact or near duplicates.
+
+    Returns a list of clusters, each a list of Paragraph occurrences.
+    """
+    # Exact duplicates collapse onto one representative signature
+    by_key = defaultdict(list)
+    for p in paragraphs:
+        by_key[p.key].append(p)
+    keys = list(by_key)
+    signatures = {key: minhash(by_key[key][0].words) for key in keys}
+
+    buckets = defaultdict(list)
+    for key in keys:
+        sig = signatures[key]
+        for band in range(BANDS):
+            buckets[(band, sig[band * ROWS:(band + 1) * ROWS])].append(key)
+
+    groups = _UnionFind()
+    checked = set()
+    for members in buckets.values():
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if estimated_jaccard(signatures[a], signatures[b]) >= threshold:
+                    groups.union(a, b)
+
+    clusters = defaultdict(list)
+    for key in keys:
+        clusters[groups.find(key)].extend(by_key[key])
+    return [c for c in clusters.values() if len(c) > 1]
+
+
+def reclaimable_bytes(cluster):
+    """Bytes saved by keeping only the largest copy in a cluster."""
+    return sum(p.size for p in cluster) - max(p.size for p in cluster)
+
+
+def collect_paragraphs(repo_root, workers, min_chars=DEFAULT_MIN_CHARS):
+    """Read paragraphs from every corpus file, including backup copies."""
+    entries = []
+    with STATS.stage('scan.walk'):
+        for path, full_path, file_type, st in collect_corpus(repo_root, MARKDOWN_COPY_SUFFIXES):
+            entries.append((path if file_type != 'wiki' else f'wiki/{path}', full_path))
+    with STATS.stage('paragraphs'), ThreadPoolExecutor(max_workers=workers) as pool:
+        STATS.pool_submitted(len(entries), workers)
+        results = pool.map(lambda e: read_paragraphs(e[0], e[1], min_chars), entries)
+        return len(entries), [p for file_paragraphs in results for p in file_paragraphs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report near-duplicate paragraphs.')
+    add_root_arguments(parser)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'minimum estimated Jaccard similarity (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--min-chars', type=int, default=DEFAULT_MIN_CHARS,
+                        help=f'ignore paragraphs shorter than this (default: {DEFAULT_MIN_CHARS})')
+    parser.add_argument('--limit', type=int, default=50,
+                        help='number of clusters to list (default: 50)')
+    args = parser.parse_args()
+    enable_stats(args)
+
+    file_count, paragraphs = collect_paragraphs(args.root, args.workers, args.min_chars)
+    with STATS.stage('minhash'):
+        clusters = find_duplicates(paragraphs, args.threshold)
+        clusters.sort(key=reclaimable_bytes, reverse=True)
+
+    pair_bytes = defaultdict(int)
+    for cluster in clusters:
+        files = sorted({p.path for p in cluster})
+        saved = reclaimable_bytes(cluster)
+        for i, a in enumerate(files):
+            for b in files[i + 1:]:
+                pair_bytes[(a, b)] += saved
+
+    print("# Near-Duplicate Paragraph Report")
+    print()
+    print("## Summary")
+    print(f"- Files scanned: {file_count}")
+    print(f"- Paragraphs scanned: {len(paragraphs)}")
+    print(f"- Duplicate clusters: {len(clusters)}")
+    print(f"- Reclaimable bytes: {sum(reclaimable_bytes(c) for c in clusters)}")
+    print()
+
+    print("## File Pairs")
+    print("| File | Duplicate Of | Shared Bytes |")
+    print("|------|--------------|--------------|")
+    for (a, b), saved in sorted(pair_bytes.items(), key=lambda item: -item[1])[:args.limit]:
+        print(f"| {a} | {b} | {saved} |")
+    print()
+
+    print("## Duplicated Paragraphs")
+    for cluster in clusters[:args.limit]:
+        first = cluster[0]
+        preview = ' '.join(first.words[:12])
+        print(f"- {len(cluster)} copies, {reclaimable_bytes(cluster)} bytes reclaimable: \"{preview}\"")
+        for p in sorted(cluster, key=lambda p: (p.path, p.line)):
+            print(f"  - {p.path}:{p.line} ({p.size} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""Check the PlantUML architecture diagrams against src/ and each other.
+
+Every .puml file under docs/architecture and wiki/architecture is parsed
+into a graph of entities (components, classes, participants) and edges.
+The structural diagrams are compared with the code: the .js files of
+src/bots, src/utils and index.js, the classes they declare and what they
+require (including index.js's path.join(__dirname, ...) bot path). Entity
+labels are matched by file name, class name, package name or directory;
+an unmatched entity with a close code name is reported as renamed.
+
+Dependency edges between entities that resolve to files or packages are
+checked against the require graph in both directions. The two diagram
+copies are compared by parsed graph, so formatting-only differences do not
+count. Parsed diagrams and require lists are cached per content hash.
+"""
+import difflib
+import os
+import re
+import sys
+
+from api_drift import SKIPPED, extract_file, tokenize
+from code_index import extract_all, read_bytes, scan_files
+from corpus_index import build_parser, load_corpus
+
+DIAGRAM_DIRS = ('docs/architecture', 'wiki/architecture')
+STRUCTURE_DIAGRAMS = ('class-diagram.puml', 'dependency-graph.puml', 'project-structure.puml')
+CODE_DIRS = ('src/bots', 'src/utils')
+ENTRY_POINT = 'index.js'
+NODE_BUILTINS = {'assert', 'child_process', 'crypto', 'events', 'fs', 'http', 'https', 'net',
+                 'os', 'path', 'readline', 'stream', 'url', 'util', 'zlib'}
+
+PACKAGE_RE = re.compile(r'^(?:package|namespace|folder|node|frame|cloud|rectangle|together)\s+'
+                        r'(?:"([^"]*)"|(\S+))(?:\s+as\s+\S+)?(?:\s*<<[^>]*>>)?\s*\{\s*$')
+CLASS_RE = re.compile(r'^(abstract\s+class|abstract|class|interface|enum)\s+'
+                      r'(?:"([^"]+)"|([\w.$]+))(?:\s+as\s+([\w.]+))?[^{]*?(\{)?\s*$')
+COMPONENT_RE = re.compile(r'^\[([^\]]+)\](?:\s+as\s+([\w.]+))?\s*$')
+DECLARATION_RE = re.compile(r'^(participant|actor|boundary|control|entity|database|collections'
+                            r'|queue|component|artifact|file|usecase|agent|storage)\s+'
+                            r'(?:"([^"]+)"|\[([^\]]+)\]|(\S+))(?:\s+as\s+([\w.]+))?')
+ENDPOINT = r'(\[[^\]]+\]|"[^"]+"|[\w.$]+)'
+ARROW = (r'([<|o*{}x#+^]*(?:-+|\.{2,})(?:\[[^\]]*\])?(?:(?:up|down|left|right)(?:-+|\.+))?'
+         r'[-.]*[>|o*{}x#+^]*)')
+EDGE_RE = re.compile(rf'^{ENDPOINT}\s*(?:"[^"]*"\s*)?{ARROW}\s*(?:"[^"]*"\s*)?{ENDPOINT}\s*(?::.*)?$')
+SKIP_PREFIXES = ("'", '!', '@', 'skinparam', 'title', 'hide', 'show', 'left to right',
+                 'top to bottom', 'legend', 'caption', 'header', 'footer')
+
+
+def strip_endpoint(text):
+    return text.strip('[]"').strip()
+
+
+def parse_puml(text):
+    """Return {'entities': [[id, label, kind, package, line]], 'edges': [[from, arrow, to, line]]}.
+
+    Entities used by an edge without a declaration are added as implicit
+    'component' ([bracketed]) or 'participant' entities.
+    """
+    entities = {}
+    edges = []
+    packages = []
+    stack = []
+    in_note = False
+
+    def declare(entity_id, label, kind, line):
+        if entity_id not in entities:
+            entities[entity_id] = [entity_id, label, kind, packages[-1] if packages else None, line]
+
+    for number, raw in enumerate(text.split('\n'), 1):
+        line = raw.strip()
+        if in_note:
+            in_note = not re.match(r'^end\s*note\b', line)
+            continue
+        if not line or line.startswith(SKIP_PREFIXES):
+            continue
+        if line.startswith('note') and ':' not in line:
+            in_note = True
+            continue
+        if stack and stack[-1] == 'body':
+            if line.startswith('}'):
+                stack.pop()
+            continue
+        if line == '}':
+            if stack and stack.pop() == 'package':
+                packages.pop()
+            continue
+
+        match = PACKAGE_RE.match(line)
+        if match:
+            packages.append(match.group(1) if match.group(1) is not None else match.group(2))
+            stack.append('package')
+            continue
+        match = CLASS_RE.match(line)
+        if match:
+            kind = match.group(1).split()[-1] if match.group(1) != 'abstract' else 'class'
+            label = match.group(2) or match.group(3)
+            declare(match.group(4) or label, label, kind, number)
+            if match.group(5) and not line.endswith('}'):
+                stack.append('body')
+            continue
+        match = COMPONENT_RE.match(line)
+        if match:
+            label = match.group(1).strip()
+            declare(match.group(2) or label, label, 'component', number)
+            continue
+        match = EDGE_RE.match(line)
+        if match and re.search(r'--|\.\.|->|<-', match.group(2)):
+            ends = []
+            for endpoint in (match.group(1), match.group(3)):
+                name = strip_endpoint(endpoint)
+                declare(name, name, 'component' if endpoint.startswith('[') else 'participant',
+                        number)
+                ends.append(name)
+            edges.append([ends[0], match.group(2), ends[1], number])
+            continue
+        match = DECLARATION_RE.match(line)
+        if match:
+            label = match.group(2) or match.group(3) or match.group(4)
+            declare(match.group(5) or label, label, match.group(1), number)
+    return {'entities': list(entities.values()), 'edges': edges}
+
+
+def diagram_graph(parsed):
+    """Return (entities, edges) as comparable sets keyed on labels, not aliases or lines."""
+    labels = {e[0]: e[1] for e in parsed['entities']}
+    entities = {(e[1], e[2], e[3]) for e in parsed['entities']}
+    edges = {(labels.get(a, a), arrow, labels.get(b, b)) for a, arrow, b, _ in parsed['edges']}
+    return entities, edges
+
+
+def unquote(token):
+    return token[1:-1] if token[:1] in '\'"`' else token
+
+
+def scan_requires(code_file):
+    """Return [target, line] for each literal require() and path.join(__dirname, ...) to a .js file."""
+    tokens = [t for t in tokenize(read_bytes(code_file.full_path).decode('utf-8', errors='replace'))
+              if t[0] not in SKIPPED and t[0] != 'doc']
+    requires = []
+    for i, (kind, value, line) in enumerate(tokens):
+        if kind != 'name':
+            continue
+        window = [t[1] for t in tokens[i:i + 4]]
+        if value == 'require' and window[1:2] == ['('] and len(tokens) > i + 3 \
+                and tokens[i + 2][0] == 'string' and window[3] == ')':
+            requires.append([unquote(window[2]), line])
+        elif value == 'path' and window[1:4] == ['.', 'join', '('] and len(tokens) > i + 5 \
+                and tokens[i + 4][1] == '__dirname':
+            parts = []
+            j = i + 5
+            while j + 1 < len(tokens) and tokens[j][1] == ',' and tokens[j + 1][0] == 'string':
+                parts.append(unquote(tokens[j + 1][1]))
+                j += 2
+            if parts and parts[-1].endswith('.js') and j < len(tokens) and tokens[j][1] == ')':
+                requires.append(['./' + '/'.join(parts), line])
+    return requires
+
+
+def normalize(name):
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+class CodeGraph:
+    """Files, classes, packages and require edges of the checked code."""
+
+    __slots__ = ('root', 'files', 'classes', 'packages', 'configs', 'edges')
+
+    def __init__(self, root):
+        self.root = root
+        self.files = {}
+        self.classes = {}
+        self.packages = set()
+        self.configs = set()
+        self.edges = {}
+
+    def add_requires(self, code_file, requires):
+        self.files[code_file.path] = code_file
+        for target, line in requires:
+            if target.startswith(('.', '/')):
+                path = os.path.normpath(os.path.join(os.path.dirname(code_file.path), target))
+                path = path.replace(os.sep, '/')
+                if path.endswith('.json'):
+                    self.configs.add(path)
+                elif not path.endswith('.js'):
+                    path += '.js'
+            elif target.split('/')[0] in NODE_BUILTINS:
+                continue
+            else:
+                path = target
+                self.packages.add(path)
+            self.edges.setdefault((code_file.path, path), line)
+
+    def resolve(self, label, kind):
+        """Return the set of code nodes an entity label stands for (empty if none)."""
+        if kind in ('class', 'interface', 'enum'):
+            return {f'class:{label}'} if label in self.classes else set()
+        if label.endswith('/'):
+            found = any(os.path.isdir(os.path.join(self.root, d, label))
+                        for d in ('', 'src'))
+            return {f'dir:{label}'} if found else set()
+        if label in self.packages:
+            return {label}
+        if label.endswith('.js'):
+            return {p for p in self.files if os.path.basename(p) == label}
+        configs = {p for p in self.configs if os.path.basename(p) == label}
+        if configs:
+            return configs
+        for candidate in (label, f'config/{label}', f'{label}.example'):
+            if os.path.isfile(os.path.join(self.root, candidate)):
+                return {f'file:{candidate}'}
+        compact = label.replace(' ', '')
+        if compact in self.classes:
+            return {f'class:{compact}'}
+        return set()
+
+    def names(self):
+        """Return {normalized name: display name} of everything the code defines."""
+        names = {normalize(os.path.basename(p)): os.path.basename(p) for p in self.files}
+        names.update((normalize(c), c) for c in self.classes)
+        names.update((normalize(p), p) for p in self.packages)
+        return names
+
+
+def check_diagram(parsed, graph, code_names):
+    """Return (resolved {entity id: nodes}, missing [(entity, rename)], stale edges, undocumented edges)."""
+    resolved = {}
+    missing = []
+    for entity_id, label, kind, package, line in parsed['entities']:
+        nodes = graph.resolve(label, kind)
+        resolved[entity_id] = nodes
+        if not nodes and kind in ('component', 'class', 'interface', 'enum'):
+            close = difflib.get_close_matches(normalize(label), list(code_names), n=1, cutoff=0.8)
+            missing.append(((label, kind, line), code_names[close[0]] if close else None))
+
+    def checked(nodes):
+        return nodes and not any(n.startswith(('class:', 'dir:', 'file:')) for n in nodes)
+
+    # Only the requires of our own files are known, not those of packages
+    stale = []
+    drawn = set()
+    for a, arrow, b, line in parsed['edges']:
+        if not (checked(resolved[a]) and checked(resolved[b])
+                and all(n in graph.files for n in resolved[a])):
+            continue
+        pairs = {(x, y) for x in resolved[a] for y in resolved[b]}
+        drawn |= pairs
+        if not pairs & graph.edges.keys():
+            stale.append((line, a, b))
+
+    shown = {n for nodes in resolved.values() if checked(nodes) for n in nodes}
+    undocumented = sorted((a, b) for a, b in graph.edges
+                          if a in shown and b in shown and (a, b) not in drawn)
+    return resolved, missing, stale, undocumented
+
+
+def main():
+    parser = build_parser('Report drift between the PlantUML architecture diagrams and src/.')
+    parser.add_argument('--check', action='store_true',
+                        help='exit with status 1 if the diagrams drift from the code or each other')
+    args = parser.parse_args()
+    index = load_corpus(args)
+    cache = index.cache
+
+    diagrams = []
+    for directory in DIAGRAM_DIRS:
+        diagrams += scan_files(args.root, directory, ('.puml',), cache=cache, workers=args.workers)
+    parsed = extract_all(diagrams, 'puml-graph',
+                         lambda f: parse_puml(read_bytes(f.full_path).decode('utf-8', errors='replace')),
+                         cache, args.workers)
+
+    code_files = []
+    for directory in CODE_DIRS:
+        code_files += scan_files(args.root, directory, ('.js',), cache=cache, workers=args.workers)
+    code_files += scan_files(args.root, '', (ENTRY_POINT,), cache=cache)
+    requires = extract_all(code_files, 'requires', scan_requires, cache, args.workers)
+    symbols = extract_all(code_files, 'jsdoc', extract_file, cache, args.workers)
+
+    graph = CodeGraph(args.root)
+    for f in code_files:
+        graph.add_requires(f, requires[f.digest])
+        for name, kind, line, _, _ in symbols[f.digest]['symbols']:
+            if kind == 'class':
+                graph.classes.setdefault(name, (f.path, line))
+    code_names = graph.names()
+
+    # Copies of a diagram with the same content are checked once
+    checked = {}
+    for f in diagrams:
+        if os.path.basename(f.path) in STRUCTURE_DIAGRAMS:
+            checked.setdefault(f.digest, []).append(f.path)
+    results = {d: check_diagram(parsed[d], graph, code_names) for d in checked}
+
+    documented = set()
+    for resolved, _, _, _ in results.values():
+        for nodes in resolved.values():
+            documented |= nodes
+    undocumented_files = [p for p in graph.files if p not in documented]
+    undocumented_classes = [c for c in graph.classes if f'class:{c}' not in documented]
+    undocumented_packages = sorted(p for p in graph.packages if p not in documented)
+
+    copies = {}
+    for f in diagrams:
+        copies.setdefault(os.path.basename(f.path), {})[os.path.dirname(f.path)] = f
+    agreement = []
+    for name in sorted(copies):
+        found = [copies[name].get(d) for d in DIAGRAM_DIRS]
+        if not all(found):
+            status = 'only in ' + ', '.join(d for d, f in zip(DIAGRAM_DIRS, found) if f)
+        elif len({f.digest for f in found}) == 1:
+            status = 'identical'
+        else:
+            graphs = [diagram_graph(parsed[f.digest]) for f in found]
+            if all(g == graphs[0] for g in graphs):
+                status = 'same graph, formatting differs'
+            else:
+                entities = len(graphs[0][0] ^ graphs[1][0])
+                edges = len(graphs[0][1] ^ graphs[1][1])
+                status = f'differs ({entities} entities, {edges} edges)'
+        agreement.append((name, status))
+    disagreeing = [a for a in agreement if a[1] not in ('identical', 'same graph, formatting differs')]
+
+    missing_count = sum(len(r[1]) for r in results.values())
+    stale_count = sum(len(r[2]) for r in results.values())
+    undocumented_edge_count = sum(len(r[3]) for r in results.values())
+
+    print("# Architecture Diagram Drift Report")
+    print()
+    print("## Summary")
+    print(f"- Diagrams parsed: {len(diagrams)}")
+    print(f"- Code files checked: {len(code_files)} ({len(graph.classes)} classes, "
+          f"{len(graph.packages)} packages required)")
+    print(f"- Diagram entities missing from the code: {missing_count} "
+          f"({sum(1 for r in results.values() for _, rename in r[1] if rename)} possibly renamed)")
+    print(f"- Diagram edges not in the require graph: {stale_count}")
+    print(f"- Require edges between diagram entities not drawn: {undocumented_edge_count}")
+    print(f"- Undocumented code: {len(undocumented_files)} files, {len(undocumented_classes)} classes, "
+          f"{len(undocumented_packages)} packages")
+    print(f"- Diagram copies that disagree: {len(disagreeing)}")
+    print()
+
+    print("## Diagram Copies")
+    print(f"| Diagram | {' vs '.join(DIAGRAM_DIRS)} |")
+    print("|---------|" + '-' * (len(' vs '.join(DIAGRAM_DIRS)) + 2) + "|")
+    for name, status in agreement:
+        print(f"| {name} | {status} |")
+    print()
+
+    for digest, paths in checked.items():
+        resolved, missing, stale, undocumented = results[digest]
+        print(f"## {', '.join(paths)}")
+        print()
+        print("### Missing or Renamed Entities")
+        print("| Line | Entity | Kind | Closest Code Name |")
+        print("|------|--------|------|-------------------|")
+        for (label, kind, line), rename in missing:
+            print(f"| {line} | {label} | {kind} | {rename or '-'} |")
+        print()
+        print("### Edges Not in Code")
+        print("| Line | From | To |")
+        print("|------|------|----|")
+        for line, a, b in stale:
+            print(f"| {line} | {a} | {b} |")
+        print()
+        print("### Require Edges Not Drawn")
+        print("| From | To | Line |")
+        print("|------|----|------|")
+        for a, b in undocumented:
+            print(f"| {a} | {b} | {graph.edges[(a, b)]} |")
+        print()
+
+    print("## Undocumented Code")
+    for path in undocumented_files:
+        print(f"- {path}")
+    for name in undocumented_classes:
+        path, line = graph.classes[name]
+        print(f"- class {name} ({path}:{line})")
+    for name in undocumented_packages:
+        print(f"- package {name}")
+
+    if args.check and (missing_count or stale_count or undocumented_edge_count or disagreeing
+                       or undocumented_files or undocumented_classes or undocumented_packages):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Persistent scan cache for the corpus index.
+
+Each scanned file is stored with its identity (path, inode, size, mtime_ns)
+and the data extracted from it: first heading, content hash and outline.
+A warm run only opens files whose identity no longer matches the cache.
+Derived per-content data (such as staleness fingerprints) is keyed on the
+content hash, so it survives renames and touch-only changes. The git
+staleness mode keeps its last-commit times per repository under the HEAD
+commit they were computed for. External link checks are kept per URL with
+the time they were made, so callers can re-probe only expired results.
+"""
+import json
+import os
+import sqlite3
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  '.corpus_cache.sqlite')
+
+SCHEMA_VERSION = 13
+
+
+class ScanCache:
+    """SQLite-backed store of per-file scan results keyed on file identity."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, rebuild=False):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self._init_schema(rebuild)
+        # One query up front instead of one round trip per file
+        self.entries = {row[0]: row[1:] for row in self.conn.execute(
+            'SELECT path, inode, size, mtime_ns, heading, digest, outline FROM files')}
+
+    def _init_schema(self, rebuild):
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if rebuild or version != SCHEMA_VERSION:
+            self.conn.execute('DROP TABLE IF EXISTS files')
+            self.conn.execute('DROP TABLE IF EXISTS fingerprints')
+            self.conn.execute('DROP TABLE IF EXISTS derived')
+            self.conn.execute('DROP TABLE IF EXISTS git_history')
+            self.conn.execute('DROP TABLE IF EXISTS link_results')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY,'
+            ' inode INTEGER NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' heading TEXT,'
+            ' digest TEXT NOT NULL,'
+            ' outline TEXT NOT NULL)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS fingerprints ('
+            ' digest TEXT PRIMARY KEY,'
+            ' fingerprint TEXT NOT NULL)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS derived ('
+            ' kind TEXT NOT NULL,'
+            ' digest TEXT NOT NULL,'
+            ' data TEXT NOT NULL,'
+            ' PRIMARY KEY (kind, digest))')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS git_history ('
+            ' git_dir TEXT PRIMARY KEY,'
+            ' head TEXT NOT NULL,'
+            ' times TEXT NOT NULL)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS link_results ('
+            ' url TEXT PRIMARY KEY,'
+            ' outcome TEXT NOT NULL,'
+            ' status INTEGER,'
+            ' detail TEXT,'
+            ' checked_at REAL NOT NULL)')
+        self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.conn.commit()
+
+    def lookup(self, path, st):
+        """Return (heading, digest, outline) if the file identity is unchanged."""
+        row = self.entries.get(path)
+        if row and row[:3] == (st.st_ino, st.st_size, st.st_mtime_ns):
+            self.hits += 1
+            return row[3], row[4], [tuple(h) for h in json.loads(row[5])]
+        self.misses += 1
+        return None
+
+    def store(self, path, st, heading, digest, outline):
+        """Record the scan result for a file under its current identity."""
+        row = (st.st_ino, st.st_size, st.st_mtime_ns, heading, digest, json.dumps(outline))
+        self.entries[path] = row
+        self.conn.execute(
+            'INSERT OR REPLACE INTO files'
+            ' (path, inode, size, mtime_ns, heading, digest, outline)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?)', (path,) + row)
+
+    def prune(self, root, seen_paths, suffixes=('.md',), recursive=True):
+        """Drop entries under root for files the latest scan did not see.
+
+        Only entries with the scanned suffixes are considered, so the corpus
+        scan and the code scans (code_index.py) do not prune each other.
+        """
+        prefix = os.path.join(root, '')
+        stale = [(p,) for p in self.entries
+                 if p.startswith(prefix) and p.endswith(suffixes) and p not in seen_paths
+                 and (recursive or os.sep not in p[len(prefix):])]
+        for (p,) in stale:
+            del self.entries[p]
+        self.conn.executemany('DELETE FROM files WHERE path = ?', stale)
+        self.conn.execute(
+            'DELETE FROM fingerprints WHERE digest NOT IN (SELECT digest FROM files)')
+        self.conn.execute(
+            'DELETE FROM derived WHERE digest NOT IN (SELECT digest FROM files)')
+
+    def load_fingerprint(self, digest):
+        """Return the stored fingerprint for a content hash, if any."""
+        row = self.conn.execute(
+            'SELECT fingerprint FROM fingerprints WHERE digest = ?', (digest,)).fetchone()
+        return row[0] if row else None
+
+    def store_fingerprint(self, digest, fingerprint):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO fingerprints (digest, fingerprint) VALUES (?, ?)',
+            (digest, fingerprint))
+
+    def load_derived(self, kind, digest):
+        """Return data of the given kind derived from a content hash, if stored."""
+        row = self.conn.execute(
+            'SELECT data FROM derived WHERE kind = ? AND digest = ?', (kind, digest)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def store_derived(self, kind, digest, data):
+        """Store JSON-serializable data derived from a content hash."""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO derived (kind, digest, data) VALUES (?, ?, ?)',
+            (kind, digest, json.dumps(data)))
+
+    def load_git_history(self, git_dir):
+        """Return (HEAD commit, {path: [commit time, blob]}) stored for a repository."""
+        row = self.conn.execute(
+            'SELECT head, times FROM git_history WHERE git_dir = ?', (git_dir,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def store_git_history(self, git_dir, head, times):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO git_history (git_dir, head, times) VALUES (?, ?, ?)',
+            (git_dir, head, json.dumps(times)))
+
+    def load_link_results(self):
+        """Return {url: (outcome, status, detail, checked_at)} of every stored link check."""
+        return {row[0]: row[1:] for row in self.conn.execute(
+            'SELECT url, outcome, status, detail, checked_at FROM link_results')}
+
+    def store_link_result(self, url, outcome, status, detail, checked_at):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO link_results (url, outcome, status, detail, checked_at)'
+            ' VALUES (?, ?, ?, ?, ?)', (url, outcome, status, detail, checked_at))
+
+    def prune_link_results(self, urls):
+        """Drop results for URLs no page links to any more."""
+        stale = [(u,) for (u,) in self.conn.execute('SELECT url FROM link_results') if u not in urls]
+        self.conn.executemany('DELETE FROM link_results WHERE url = ?', stale)
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def summary(self):
+        return f"Scan cache: {self.hits} hits, {self.misses} misses ({self.path})"
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Section-level diff and patch between source docs and their wiki pages.
+
+Both files are split into sections keyed by heading path (the slugs of the
+heading and its parents, e.g. "command-reference > basic-commands"). Each
+section's normalized content is hashed, and the hashes are cached per content
+hash in the scan cache, so a rerun compares hashes instead of diffing texts.
+
+With --apply, only changed sections (and sections added to the source) are
+written into the wiki page. Sections that exist only in the wiki are kept
+unless --prune is given, so wiki-only edits survive an update.
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from convert_links import LinkConverter, footer_start
+from corpus_index import atomic_write, build_parser, load_corpus, new_hasher
+from headings import slugify
+from instrumentation import STATS
+from staleness import normalize_line
+from sync import page_index
+from wiki_transform import LIST_ITEM_RE, normalize_page
+
+PATH_SEPARATOR = ' > '
+
+
+class Section:
+    """A heading-delimited span of lines [start, end) and its content hash."""
+
+    __slots__ = ('key', 'start', 'end', 'hash')
+
+    def __init__(self, key, start, end, hash):
+        self.key = key
+        self.start = start
+        self.end = end
+        self.hash = hash
+
+    def to_json(self):
+        return [self.key, self.start, self.end, self.hash]
+
+
+def section_bounds(outline, line_count):
+    """Return (key, start, end) for the preamble and every heading in an outline."""
+    bounds = []
+    stack = []
+    seen = {}
+    starts = [line - 1 for _, _, line in outline]
+
+    bounds.append(['', 0, starts[0] if starts else line_count])
+    for i, (level, text, line) in enumerate(outline):
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, slugify(text).strip('-')))
+        key = PATH_SEPARATOR.join(slug for _, slug in stack)
+        count = seen.get(key, 0)
+        seen[key] = count + 1
+        if count:
+            key = f'{key} #{count + 1}'
+        end = starts[i + 1] if i + 1 < len(starts) else line_count
+        bounds.append([key, line - 1, end])
+    return bounds
+
+
+def hash_lines(lines):
+    """Hash a section's normalized, non-blank lines.
+
+    The section goes through the passes sync.py applies, and list markers are
+    ignored since the lists pass follows each page's first marker.
+    """
+    hasher = new_hasher()
+    for line in normalize_page(''.join(lines)).split('\n'):
+        line = LIST_ITEM_RE.sub(r'\1-\3', normalize_line(line))
+        if line:
+            hasher.update(line.encode('utf-8'))
+            hasher.update(b'\n')
+    return hasher.hexdigest()
+
+
+def read_lines(full_path):
+    """Return a file's lines with their endings, split on '\\n' like the heading scanner."""
+    with open(full_path, 'rb') as f:
+        data = f.read()
+    STATS.file_read(len(data))
+    text = data.decode('utf-8', errors='replace')
+    lines = [line + '\n' for line in text.split('\n')]
+    lines[-1] = lines[-1][:-1]
+    return lines if lines[-1] else lines[:-1]
+
+
+def split_sections(lines, outline):
+    """Split a document into hashed Sections, leaving the footer out."""
+    body_end = footer_start(lines)
+    outline = [h for h in outline if h[2] <= body_end]
+    sections = []
+    for key, start, end in section_bounds(outline, body_end):
+        sections.append(Section(key, start, end, hash_lines(lines[start:end])))
+    return sections
+
+
+class SectionStore:
+    """Section lists per content hash, from memory, the scan cache or a fresh read."""
+
+    def __init__(self, cache=None, workers=1):
+        self.cache = cache
+        self.workers = workers
+        self.memo = {}
+
+    def prefetch(self, files):
+        todo = {}
+        for f in files:
+            if f.digest in self.memo or f.digest in todo:
+                continue
+            stored = self.cache.load_derived('sections', f.digest) if self.cache else None
+            if stored is not None:
+                self.memo[f.digest] = [Section(*s) for s in stored]
+            else:
+                todo[f.digest] = f
+        if not todo:
+            return
+
+        def work(f):
+            return split_sections(read_lines(f.full_path), f.outline)
+
+        with STATS.stage('sections.hash'), ThreadPoolExecutor(max_workers=self.workers) as pool:
+            STATS.pool_submitted(len(todo), self.workers)
+            for digest, sections in zip(todo, pool.map(work, todo.values())):
+                self.memo[digest] = sections
+                if self.cache:
+                    self.cache.store_derived('sections', digest, [s.to_json() for s in sections])
+        if self.cache:
+            self.cache.commit()
+
+    def get(self, corpus_file):
+        if corpus_file.digest not in self.memo:
+            self.prefetch([corpus_file])
+        return self.memo[corpus_file.digest]
+
+
+class SectionDiff:
+    """Keys of sections added to, removed from or changed in the source."""
+
+    __slots__ = ('added', 'removed', 'changed')
+
+    def __init__(self, source_sections, wiki_sections):
+        wiki = {s.key: s.hash for s in wiki_sections}
+        source = {s.key: s.hash for s in source_sections}
+        self.added = [s.key for s in source_sections if s.key not in wiki]
+        self.removed = [s.key for s in wiki_sections if s.key not in source]
+        self.changed = [s.key for s in source_sections
+                        if s.key in wiki and wiki[s.key] != s.hash]
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+
+def apply_diff(diff, source_lines, source_sections, wiki_lines, wiki_sections,
+               converter, prune=False):
+    """Return the wiki text with changed and added source sections applied."""
+    source_by_key = {s.key: s for s in source_sections}
+    wiki_keys = {s.key for s in wiki_sections}
+    changed = set(diff.changed)
+    added = set(diff.added)
+    removed = set(diff.removed) if prune else set()
+
+    # Each added section goes after the closest earlier source section the wiki has
+    inserts = {}
+    anchor = ''
+    for s in source_sections:
+        if s.key in wiki_keys:
+            anchor = s.key
+        elif s.key in added:
+            inserts.setdefault(anchor, []).append(s)
+
+    def source_text(section):
+        text = ''.join(source_lines[section.start:section.end])
+        return converter.convert(text)[0]
+
+    def ensure_break(parts):
+        # Sections cut at the footer may lack a trailing newline
+        if parts and not parts[-1].endswith('\n'):
+            parts.append('\n')
+
+    parts = []
+    for w in wiki_sections:
+        if w.key in changed:
+            parts.append(source_text(source_by_key[w.key]))
+        elif w.key not in removed:
+            parts.append(''.join(wiki_lines[w.start:w.end]))
+        for added in inserts.get(w.key, ()):
+            ensure_break(parts)
+            parts.append(source_text(added))
+    ensure_break(parts)
+    footer = wiki_lines[wiki_sections[-1].end:] if wiki_sections else []
+    # The footer's '---' right under a text line would turn it into a heading
+    if footer and parts and not ''.join(parts[-2:]).endswith('\n\n'):
+        parts.append('\n')
+    parts.extend(footer)
+    return ''.join(parts)
+
+
+def matched_pairs(index, only=None):
+    """Yield (source, wiki) for matched pairs whose content differs."""
+    for source in index.source_files:
+        if only and source.path not in only:
+            continue
+        wiki_match = index.find_match(source)
+        if wiki_match and index.wiki[wiki_match].digest != source.digest:
+            yield source, index.wiki[wiki_match]
+
+
+def main():
+    parser = build_parser('Diff source docs against their wiki pages section by section.')
+    parser.add_argument('sources', nargs='*',
+                        help='source files to compare, e.g. docs/COMMAND_REFERENCE.md '
+                             '(default: every matched source)')
+    parser.add_argument('--apply', action='store_true',
+                        help='write changed and added sections into the wiki pages')
+    parser.add_argument('--prune', action='store_true',
+                        help='with --apply, also drop sections that only exist in the wiki')
+    args = parser.parse_args()
+
+    index = load_corpus(args)
+    pairs = list(matched_pairs(index, set(args.sources)))
+    store = SectionStore(index.cache, args.workers)
+    store.prefetch([f for pair in pairs for f in pair])
+    converter = LinkConverter(page_index(index, [])) if args.apply else None
+
+    print("# Section Diff Report")
+    print()
+    patched = 0
+    for source, wiki in pairs:
+        source_sections = store.get(source)
+        wiki_sections = store.get(wiki)
+        diff = SectionDiff(source_sections, wiki_sections)
+        if not diff:
+            continue
+
+        print(f"## {source.path} → wiki/{wiki.path}")
+        for label, keys in (('changed', diff.changed), ('added', diff.added),
+                            ('wiki only', diff.removed)):
+            for key in keys:
+                print(f"- {label}: {key or '(preamble)'}")
+        print()
+
+        if args.apply and (diff.changed or diff.added or (args.prune and diff.removed)):
+            text = apply_diff(diff, read_lines(source.full_path), source_sections,
+                              read_lines(wiki.full_path), wiki_sections, converter, args.prune)
+            atomic_write(wiki.full_path, text)
+            patched += 1
+
+    if args.apply:
+        print(f"Patched {patched} wiki pages", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
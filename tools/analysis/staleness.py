@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Staleness detection for matched source/wiki pairs.
+
+The default 'mtime' mode keeps the original rule (source newer than wiki
+means out-of-date). The 'content' mode compares normalized content instead,
+which survives checkouts, cache restores and Docker COPY resetting mtimes.
+Content is split into paragraphs and each paragraph is hashed with BLAKE2,
+so a pair can be reported as identical or diverged with a similarity ratio.
+The 'git' mode reads blob SHAs and last-commit times from .git (see
+git_objects.py): pairs with the same blob are identical, otherwise the side
+committed last wins, and uncommitted edits count from their mtime.
+"""
+import json
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from convert_links import FOOTER_LINES, LINK_RE as MD_LINK_RE
+from corpus_index import DEFAULT_WORKERS, new_hasher, normalize_name
+from git_objects import GitWorkspace
+from instrumentation import STATS
+from wiki_transform import normalize_page
+
+STALENESS_MODES = ('mtime', 'content', 'git')
+STALE_STATUSES = ('out-of-date', 'diverged')
+
+# [[Page]], [[Page#anchor]] or [[Text|Page]]; group 1 is the page
+WIKI_LINK_RE = re.compile(r'\[\[(?:[^\]|]*\|)?([^\]|#]+)(?:#[^\]|]*)?\]\]')
+
+
+def _canonical_md_link(match):
+    path = match.group(2)
+    if path.startswith('http') or '[[' in match.group(1):
+        return match.group(0)
+    stem = path.rsplit('/', 1)[-1][:-len('.md')]
+    return f'[[{normalize_name(stem)}]]'
+
+
+def _canonical_wiki_link(match):
+    return f'[[{normalize_name(match.group(1).strip())}]]'
+
+
+def normalize_line(line):
+    """Normalize one line so link-syntax and whitespace differences vanish.
+
+    Relative .md links (as rewritten by convert_links.py) and [[wiki links]]
+    both reduce to [[normalized page name]], ignoring anchors and link text.
+    """
+    line = MD_LINK_RE.sub(_canonical_md_link, line.rstrip())
+    return WIKI_LINK_RE.sub(_canonical_wiki_link, line)
+
+
+# The footer's rule and home link, normalized; both link forms reduce to [[home]]
+FOOTER_BLOCKS = (normalize_line(FOOTER_LINES[0]), normalize_line(FOOTER_LINES[-1]))
+
+
+class Fingerprint:
+    """Digest of normalized content plus per-paragraph (hash, length) chunks."""
+
+    __slots__ = ('digest', 'chunks')
+
+    def __init__(self, digest, chunks):
+        self.digest = digest
+        self.chunks = chunks
+
+    @property
+    def size(self):
+        return sum(length for _, length in self.chunks)
+
+    def to_json(self):
+        return json.dumps([self.digest, self.chunks])
+
+    @classmethod
+    def from_json(cls, text):
+        digest, chunks = json.loads(text)
+        return cls(digest, [tuple(c) for c in chunks])
+
+
+def compute_fingerprint(full_path):
+    """Fingerprint the normalized paragraphs of a file.
+
+    The text first goes through the wiki_transform.py passes sync.py applies,
+    and the 'Back to Home' footer sync.py appends is left out, so a synced
+    page fingerprints like its source.
+    """
+    with open(full_path, 'rb') as f:
+        data = f.read()
+    STATS.file_read(len(data))
+    blocks = []
+    paragraph = []
+    for raw in normalize_page(data.decode('utf-8', errors='replace')).split('\n'):
+        line = normalize_line(raw)
+        if line:
+            paragraph.append(line)
+        elif paragraph:
+            blocks.append('\n'.join(paragraph))
+            paragraph.clear()
+    if paragraph:
+        blocks.append('\n'.join(paragraph))
+
+    if blocks and blocks[-1] == FOOTER_BLOCKS[-1]:
+        blocks.pop()
+        if blocks and blocks[-1] == FOOTER_BLOCKS[0]:
+            blocks.pop()
+
+    total = new_hasher()
+    chunks = []
+    for block in blocks:
+        data = block.encode('utf-8')
+        hasher = new_hasher()
+        hasher.update(data)
+        chunks.append((hasher.hexdigest(), len(data)))
+        total.update(hasher.digest())
+    return Fingerprint(total.hexdigest(), chunks)
+
+
+def similarity(a, b):
+    """Share of normalized bytes the two fingerprints have in common (0..1)."""
+    if a.digest == b.digest:
+        return 1.0
+    size = a.size + b.size
+    if not size:
+        return 1.0
+    ca = Counter(a.chunks)
+    cb = Counter(b.chunks)
+    common = sum(min(n, cb[chunk]) * chunk[1] for chunk, n in ca.items())
+    return 2 * common / size
+
+
+class FingerprintStore:
+    """Memoized fingerprints keyed on raw content digest.
+
+    Fingerprints are looked up in memory, then in the scan cache, and only
+    computed for content that has never been fingerprinted before.
+    """
+
+    def __init__(self, cache=None, workers=DEFAULT_WORKERS):
+        self.cache = cache
+        self.workers = workers
+        self.memo = {}
+        self.computed = 0
+
+    def prefetch(self, files):
+        """Fingerprint every file not known yet, on a thread pool."""
+        todo = {}
+        for f in files:
+            if f.digest in self.memo or f.digest in todo:
+                continue
+            stored = self.cache.load_fingerprint(f.digest) if self.cache else None
+            if stored:
+                self.memo[f.digest] = Fingerprint.from_json(stored)
+            else:
+                todo[f.digest] = f.full_path
+        if not todo:
+            return
+
+        with STATS.stage('fingerprint'), ThreadPoolExecutor(max_workers=self.workers) as pool:
+            STATS.pool_submitted(len(todo), self.workers)
+            for digest, fp in zip(todo, pool.map(compute_fingerprint, todo.values())):
+                self.memo[digest] = fp
+                if self.cache:
+                    self.cache.store_fingerprint(digest, fp.to_json())
+        self.computed += len(todo)
+        if self.cache:
+            self.cache.commit()
+
+    def get(self, corpus_file):
+        if corpus_file.digest not in self.memo:
+            self.prefetch([corpus_file])
+        return self.memo[corpus_file.digest]
+
+
+class StalenessChecker:
+    """Decide the status of a matched source/wiki pair under a staleness mode."""
+
+    def __init__(self, mode, index):
+        if mode not in STALENESS_MODES:
+            raise ValueError(f"Unknown staleness mode: {mode}")
+        self.mode = mode
+        self.index = index
+        self.store = FingerprintStore(index.cache, index.workers) if mode == 'content' else None
+        self.git = GitWorkspace(index.cache) if mode == 'git' else None
+
+    def prepare(self, pairs):
+        """Fingerprint all (source, wiki) pairs up front in one batch."""
+        if self.store:
+            self.store.prefetch([f for pair in pairs for f in pair])
+        elif self.git:
+            # Reported times cover unmatched sources too, so walk history for all
+            self.git.prefetch(self.index.source_files + self.index.wiki_files)
+
+    def mtime(self, corpus_file):
+        """Return the time a file was last changed: its last commit in git mode."""
+        if self.git:
+            return self.git.get(corpus_file).time
+        return corpus_file.mtime
+
+    def check(self, source, wiki):
+        """Return (status, similarity) for a pair; similarity is None in mtime and git mode."""
+        if self.mode == 'mtime':
+            return ('out-of-date' if source.mtime > wiki.mtime else 'up-to-date'), None
+        if self.git:
+            a = self.git.get(source)
+            b = self.git.get(wiki)
+            if a.blob == b.blob:
+                return 'identical', None
+            return ('out-of-date' if a.time > b.time else 'up-to-date'), None
+        a = self.store.get(source)
+        b = self.store.get(wiki)
+        if a.digest == b.digest:
+            return 'identical', 1.0
+        return 'diverged', similarity(a, b)
+
+
+def add_staleness_arguments(parser):
+    """Add the --staleness option to a tool's argument parser."""
+    parser.add_argument('--staleness', choices=STALENESS_MODES, default='mtime',
+                        help="compare pairs by modification time, by normalized "
+                             "content hashes or by git blob SHAs and commit times "
+                             "(default: mtime)")
+    return parser
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Apply the gap report: write each missing or out-of-date page into the wiki.
+
+Each source file is transformed the way pages were migrated by hand:
+relative .md links become [[wiki links]] and the "Back to Home" footer is
+appended. The result is then normalized by the wiki_transform.py passes, so
+running the transform pipeline after a sync leaves synced pages alone and
+the next sync finds them up to date. Out-of-date pages are rewritten in place at their wiki match;
+missing pages are created at the suggested path. Pages are transformed on a
+thread pool and written with an atomic rename.
+
+Runs are idempotent. A page whose current content hash already equals the
+transformed output is left alone, and the output hash is cached per source
+hash and page set, so a warm rerun does not even read unchanged sources.
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from convert_links import FOOTER, LinkConverter, footer_start, page_name
+from corpus_index import atomic_write, build_parser, content_digest, load_corpus, normalize_name
+from final_gap_analysis import GapReport
+from instrumentation import STATS
+from staleness import StalenessChecker, add_staleness_arguments
+from verify_gaps import load_gap_rows, load_matched_pages
+from wiki_transform import normalize_page
+
+
+def add_footer(content):
+    """Append the 'Back to Home' footer unless the page already ends with one."""
+    lines = content.split('\n')
+    if footer_start(lines) < len(lines):
+        return content
+    return content.rstrip('\n') + '\n' + FOOTER
+
+
+def transform(converter, content):
+    """Return the wiki version of a source document."""
+    content, _ = converter.convert(content)
+    return normalize_page(add_footer(content))
+
+
+class SyncJob:
+    """One source file and the wiki page it should produce."""
+
+    __slots__ = ('source', 'target', 'full_path', 'current_digest', 'action', 'output_digest')
+
+    def __init__(self, source, target, full_path, current_digest):
+        self.source = source
+        self.target = target
+        self.full_path = full_path
+        self.current_digest = current_digest
+        self.action = None
+        self.output_digest = None
+
+
+def plan_jobs(index, rows, matched=()):
+    """Turn (source path, wiki match, suggested path) rows into sync jobs.
+
+    matched holds wiki pages some other source is already up to date with;
+    they are not rewritten from a second source.
+    """
+    sources = {s.path: s for s in index.source_files}
+    jobs = {}
+    skipped = []
+    for file, wiki_match, suggested_path in rows:
+        source = sources.get(file)
+        if source is None:
+            skipped.append(file)
+            continue
+        target = wiki_match or suggested_path
+        if target in jobs or target in matched:
+            # Two sources for the same page: the first one (or the up-to-date one) wins
+            skipped.append(file)
+            continue
+        wiki = index.wiki.get(target)
+        jobs[target] = SyncJob(source, target, os.path.join(index.wiki_path, target),
+                               wiki.digest if wiki else None)
+    return list(jobs.values()), skipped
+
+
+def page_index(index, targets):
+    """Map normalized page names to wiki page names, including pages about to be created."""
+    pages = {}
+    for path in list(index.wiki) + targets:
+        pages.setdefault(normalize_name(Path(path).stem), page_name(path))
+    return pages
+
+
+def run_jobs(jobs, converter, pages_key, cache, workers, dry_run=False):
+    """Transform and write every job whose output differs from the current page."""
+    todo = []
+    for job in jobs:
+        cached = cache.load_derived('sync', job.source.digest) if cache else None
+        if cached and cached[0] == pages_key and cached[1] == job.current_digest:
+            job.action = 'unchanged'
+            job.output_digest = job.current_digest
+        else:
+            todo.append(job)
+
+    def work(job):
+        with open(job.source.full_path, 'rb') as f:
+            data = f.read()
+        STATS.file_read(len(data))
+        content = data.decode('utf-8')
+        output = transform(converter, content)
+        job.output_digest = content_digest(output.encode('utf-8'))
+        if job.output_digest == job.current_digest:
+            job.action = 'unchanged'
+            return job
+        job.action = 'updated' if job.current_digest else 'created'
+        if not dry_run:
+            os.makedirs(os.path.dirname(job.full_path), exist_ok=True)
+            atomic_write(job.full_path, output)
+            STATS.count('files_written')
+        return job
+
+    with STATS.stage('sync'), ThreadPoolExecutor(max_workers=workers) as pool:
+        STATS.pool_submitted(len(todo), workers)
+        for job in pool.map(work, todo):
+            if cache and (not dry_run or job.action == 'unchanged'):
+                cache.store_derived('sync', job.source.digest, [pages_key, job.output_digest])
+    if cache:
+        cache.commit()
+    return jobs
+
+
+def main():
+    parser = build_parser('Write missing and out-of-date wiki pages from their sources.')
+    add_staleness_arguments(parser)
+    parser.add_argument('--report', metavar='CSV',
+                        help='gap report to apply (default: compute it from the corpus)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='list what would change without writing any page')
+    args = parser.parse_args()
+
+    index = load_corpus(args)
+    if args.report:
+        try:
+            rows = [(r['file'], r['wiki_match'], r['suggested_path'])
+                    for r in load_gap_rows(args.report)]
+            matched = load_matched_pages(args.report)
+        except FileNotFoundError:
+            print(f"Gap report not found: {args.report}", file=sys.stderr)
+            sys.exit(2)
+    else:
+        report = GapReport(index, StalenessChecker(args.staleness, index))
+        rows = []
+        matched = set()
+        for r in report.stream():
+            if r.is_gap:
+                rows.append((r.file, r.wiki_match, r.suggested_path))
+            elif r.wiki_match:
+                matched.add(r.wiki_match)
+
+    jobs, skipped = plan_jobs(index, rows, matched)
+    targets = sorted(job.target for job in jobs)
+    converter = LinkConverter(page_index(index, targets))
+    pages_key = content_digest('\n'.join(sorted(converter.pages.values())).encode('utf-8'))
+    run_jobs(jobs, converter, pages_key, index.cache, args.workers, args.dry_run)
+
+    verb = 'Would sync' if args.dry_run else 'Synced'
+    changed = [job for job in jobs if job.action != 'unchanged']
+    print(f"{verb} {len(changed)} of {len(jobs)} pages "
+          f"({len(jobs) - len(changed)} already up to date)")
+    for job in changed:
+        print(f"  - {job.action}: {job.source.path} → wiki/{job.target}")
+    for file in skipped:
+        print(f"  - skipped: {file} (source missing or target already claimed)")
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,150 @@
 #!/usr/bin/env python3
+"""Verify that the gaps listed in the final gap report have been filled.
+
+The wiki tree is walked once (through the shared corpus index and its scan
+cache) and every report row is checked against the resulting in-memory path
+table in one batch. A gap only counts as filled when the page exists, is not
+empty and its normalized content hash matches the source file. Out-of-date
+rows are checked at their wiki match, where sync.py rewrites them.
+
+Exit codes: 0 when every gap is filled, 1 when gaps remain, 2 when the gap
+report cannot be read.
+"""
 import csv
+import json
 import os
+import sys
 
-def verify_wiki_gaps():
-    """Verify that all gap files have been addressed."""
-    gaps_filled = []
-    gaps_remaining = []
-    
-    # Read the CSV gap report
-    try:
-        with open('final_wiki_coverage_gap_report.csv', 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['status'] in ['missing', 'out-of-date']:
-                    suggested_path = row['suggested_path']
-                    wiki_path = f"wiki/{suggested_path}"
-                    
-                    if os.path.exists(wiki_path):
-                        gaps_filled.append({
-                            'source': row['file'],
-                            'wiki_path': wiki_path,
-                            'status': row['status']
-                        })
-                    else:
-                        gaps_remaining.append({
-                            'source': row['file'],
-                            'wiki_path': wiki_path,
-                            'status': row['status']
-                        })
-    except FileNotFoundError:
-        print("Gap report CSV not found")
-        return
-    
-    print(f"✅ Gaps filled: {len(gaps_filled)}")
-    for gap in gaps_filled:
+from corpus_index import build_parser, load_corpus
+from final_gap_analysis import CSV_REPORT
+from gap_records import GAP_STATUSES
+from instrumentation import STATS
+from staleness import FingerprintStore, similarity
+
+DEFAULT_REPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), CSV_REPORT)
+
+EXIT_OK = 0
+EXIT_GAPS_REMAINING = 1
+EXIT_NO_REPORT = 2
+
+# Result of checking one row; only 'filled' closes a gap
+RESULTS = ('filled', 'missing', 'empty', 'diverged', 'no-source')
+
+
+def load_gap_rows(report_path):
+    """Return the report rows whose status is a gap."""
+    with open(report_path, 'r', newline='', encoding='utf-8') as f:
+        return [row for row in csv.DictReader(f) if row['status'] in GAP_STATUSES]
+
+
+def load_matched_pages(report_path):
+    """Return the wiki pages that a report row not listed as a gap already matches."""
+    with open(report_path, 'r', newline='', encoding='utf-8') as f:
+        return {row['wiki_match'] for row in csv.DictReader(f)
+                if row['status'] not in GAP_STATUSES and row['wiki_match']}
+
+
+def target_path(row):
+    """Return the wiki page a gap row is filled at: its match if it has one (as sync.py writes)."""
+    return row['wiki_match'] or row['suggested_path']
+
+
+def verify_rows(index, rows, check_content=True):
+    """Check every gap row against the indexed wiki tree in one batch.
+
+    Returns a list of dicts with source, wiki_path, status, result and
+    similarity (None unless the content was compared).
+    """
+    sources = {s.path: s for s in index.source_files}
+    pairs = []
+    for row in rows:
+        pairs.append((row, sources.get(row['file']), index.wiki.get(target_path(row))))
+
+    store = None
+    if check_content:
+        store = FingerprintStore(index.cache, index.workers)
+        store.prefetch([f for _, source, wiki in pairs if source and wiki and wiki.size
+                        for f in (source, wiki)])
+
+    results = []
+    for row, source, wiki in pairs:
+        ratio = None
+        if wiki is None:
+            result = 'missing'
+        elif not wiki.size:
+            result = 'empty'
+        elif not check_content:
+            result = 'filled'
+        elif source is None:
+            result = 'no-source'
+        else:
+            a = store.get(source)
+            b = store.get(wiki)
+            ratio = similarity(a, b)
+            result = 'filled' if a.digest == b.digest else 'diverged'
+        results.append({
+            'source': row['file'],
+            'wiki_path': f"wiki/{target_path(row)}",
+            'status': row['status'],
+            'result': result,
+            'similarity': ratio
+        })
+    return results
+
+
+def print_results(results):
+    filled = [r for r in results if r['result'] == 'filled']
+    remaining = [r for r in results if r['result'] != 'filled']
+
+    print(f"✅ Gaps filled: {len(filled)}")
+    for gap in filled:
         print(f"   {gap['source']} → {gap['wiki_path']}")
-    
-    if gaps_remaining:
-        print(f"\n❌ Gaps remaining: {len(gaps_remaining)}")
-        for gap in gaps_remaining:
-            print(f"   {gap['source']} → {gap['wiki_path']} (missing)")
+
+    if remaining:
+        print(f"\n❌ Gaps remaining: {len(remaining)}")
+        for gap in remaining:
+            detail = gap['result']
+            if gap['similarity'] is not None:
+                detail += f", similarity {gap['similarity']:.3f}"
+            print(f"   {gap['source']} → {gap['wiki_path']} ({detail})")
     else:
         print(f"\n🎉 All gaps have been filled!")
-    
-    return len(gaps_remaining) == 0
+
+
+def verify_wiki_gaps(argv=None):
+    """Verify that all gap files have been addressed; return an exit code."""
+    parser = build_parser('Verify that the gaps in the final gap report have been filled.')
+    parser.add_argument('--report', default=DEFAULT_REPORT,
+                        help=f'gap report CSV to verify (default: {CSV_REPORT} next to this script)')
+    parser.add_argument('--existence-only', action='store_true',
+                        help='count a gap as filled when a non-empty page exists, '
+                             'without comparing content hashes')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        rows = load_gap_rows(args.report)
+    except FileNotFoundError:
+        print("Gap report CSV not found", file=sys.stderr)
+        return EXIT_NO_REPORT
+
+    index = load_corpus(args)
+    with STATS.stage('verify'):
+        results = verify_rows(index, rows, check_content=not args.existence_only)
+    remaining = sum(1 for r in results if r['result'] != 'filled')
+
+    if args.json:
+        counts = {result: 0 for result in RESULTS}
+        for r in results:
+            counts[r['result']] += 1
+        json.dump({'report': args.report, 'gaps': len(results), 'remaining': remaining,
+                   'counts': counts, 'results': results}, sys.stdout, indent=2)
+        print()
+    else:
+        print_results(results)
+
+    return EXIT_GAPS_REMAINING if remaining else EXIT_OK
 
 if __name__ == '__main__':
-    success = verify_wiki_gaps()
-    exit(0 if success else 1)
+    sys.exit(verify_wiki_gaps())
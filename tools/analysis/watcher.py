@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Filesystem change notifications for the corpus tools.
+
+Uses Linux inotify through ctypes when it is available and falls back to
+polling stat snapshots otherwise. Bursts of events (editors writing a temp
+file, renaming it and touching metadata) are debounced into one batch of
+changed paths.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from corpus_index import collect_corpus
+
+DEFAULT_DEBOUNCE = 0.05
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _load_libc():
+    name = ctypes.util.find_library('c')
+    if not name:
+        return None
+    libc = ctypes.CDLL(name, use_errno=True)
+    if not hasattr(libc, 'inotify_init1'):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    """inotify watches on the repository root, docs/ and every wiki/ directory."""
+
+    def __init__(self, repo_root):
+        self.libc = _load_libc()
+        if self.libc is None:
+            raise OSError('inotify is not available')
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.dirs = {}
+        self.wiki_prefix = os.path.join(repo_root, 'wiki', '')
+        self._add(repo_root)
+        self._add(os.path.join(repo_root, 'docs'))
+        self._add_tree(os.path.join(repo_root, 'wiki'))
+
+    def _add(self, path):
+        if not os.path.isdir(path):
+            return
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self.dirs[wd] = path
+
+    def _add_tree(self, path):
+        self._add(path)
+        for root, dirs, files in os.walk(path):
+            for d in dirs:
+                self._add(os.path.join(root, d))
+
+    def _remove_tree(self, path):
+        """Drop the watches on a directory and everything below it; return True if any."""
+        inside = os.path.join(path, '')
+        wds = [wd for wd, d in self.dirs.items() if d == path or d.startswith(inside)]
+        for wd in wds:
+            self.libc.inotify_rm_watch(self.fd, wd)
+            del self.dirs[wd]
+        return bool(wds)
+
+    def read(self, timeout):
+        """Wait up to timeout seconds; return changed paths, or None if a rescan is needed.
+
+        A rescan is needed after a queue overflow and when a watched directory
+        is moved away or deleted, since its files raise no events of their own.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        rescan = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                # The kernel dropped the watch (directory deleted, or removed above)
+                self.dirs.pop(wd, None)
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and path.startswith(self.wiki_prefix):
+                    self._add_tree(path)
+                    # Files moved in with the directory never raise their own events
+                    changed.update(os.path.join(r, f) for r, _, fs in os.walk(path) for f in fs)
+                elif mask & (IN_MOVED_FROM | IN_DELETE) and self._remove_tree(path):
+                    # Keep reading so a rename within the tree still watches the new name
+                    rescan = True
+                continue
+            changed.add(path)
+        return None if rescan else changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher that diffs stat snapshots of the corpus."""
+
+    def __init__(self, repo_root, interval=1.0):
+        self.repo_root = repo_root
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self):
+        return {full_path: (st.st_ino, st.st_size, st.st_mtime_ns)
+                for _, full_path, _, st in collect_corpus(self.repo_root)}
+
+    def read(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        current = self._snapshot()
+        changed = {p for p in current.keys() | self.snapshot.keys()
+                   if current.get(p) != self.snapshot.get(p)}
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(repo_root, poll_interval=1.0, force_polling=False):
+    """Return an inotify watcher, or a polling one if inotify is unavailable."""
+    if not force_polling:
+        try:
+            return InotifyWatcher(repo_root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(repo_root, poll_interval)
+
+
+def watch_changes(repo_root, debounce=DEFAULT_DEBOUNCE, poll_interval=1.0, force_polling=False):
+    """Yield debounced sets of changed paths; None means a full rescan is needed."""
+    watcher = open_watcher(repo_root, poll_interval, force_polling)
+    try:
+        if isinstance(watcher, PollingWatcher):
+            # The poll interval already batches bursts of writes
+            while True:
+                changed = watcher.read(poll_interval)
+                if changed:
+                    yield changed
+
+        while True:
+            changed = watcher.read(None)
+            if changed is not None and not changed:
+                continue
+            # Keep collecting until the burst has been quiet for `debounce` seconds
+            while changed is not None:
+                more = watcher.read(debounce)
+                if more is None:
+                    changed = None
+                elif more:
+                    changed |= more
+                else:
+                    break
+            yield changed
+    finally:
+        watcher.close()
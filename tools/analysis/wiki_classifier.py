@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Weighted keyword classifier choosing the wiki section for a page.
+
+Keyword sets per section (guides/, reference/, ...) and the weight of each
+field (filename, headings, body) are read from wiki_categories.json. All
+keywords of all sections are compiled into one Aho-Corasick automaton, so
+each field is scanned once and the cost stays linear in the text however
+many keywords are configured.
+
+A section scores field weight × keyword weight × hits, with hits per
+keyword and field capped so one repeated word cannot decide alone. The best
+section wins if it reaches min_score; ties go to the section listed first.
+A section with an empty path keeps pages at the wiki root.
+In the filename any substring counts (COMMANDREFERENCE has 'reference'); in
+headings and body a keyword must start a word, so 'api' does not match
+'rapid'. Keyword hits of headings and body are cached per content hash.
+"""
+import hashlib
+import json
+import os
+import sys
+from collections import deque
+
+from instrumentation import STATS
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   'wiki_categories.json')
+FIELDS = ('filename', 'headings', 'body')
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over a list of lowercase keywords."""
+
+    __slots__ = ('keywords', 'goto', 'fail', 'out')
+
+    def __init__(self, keywords):
+        self.keywords = keywords
+        self.goto = [{}]
+        self.out = [[]]
+        for i, keyword in enumerate(keywords):
+            state = 0
+            for ch in keyword:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.out.append([])
+                state = nxt
+            self.out[state].append(i)
+
+        # Breadth-first, so every fail target is finished before it is used
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def count(self, text, word_start=False):
+        """Return {keyword index: hits} for one pass over lowercase text."""
+        goto, fail, out, keywords = self.goto, self.fail, self.out, self.keywords
+        counts = {}
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for i in out[state]:
+                start = pos - len(keywords[i]) + 1
+                if word_start and start and text[start - 1].isalnum():
+                    continue
+                counts[i] = counts.get(i, 0) + 1
+        return counts
+
+
+class Classification:
+    """The chosen section of a page, every section's score and the hits behind it."""
+
+    __slots__ = ('category', 'scores', 'hits')
+
+    def __init__(self, category, scores, hits):
+        self.category = category
+        self.scores = scores
+        self.hits = hits
+
+    def explain(self):
+        """Return a one-line reason, e.g. "developer 60.0: filename 'analysis' x1 (30.0)"."""
+        if not self.hits:
+            return 'no keywords matched'
+        best = self.category if self.category is not None else max(self.scores, key=self.scores.get)
+        reasons = ', '.join(f"{field} '{keyword}' x{count} ({points:g})"
+                            for category, field, keyword, count, points in self.hits
+                            if category == best)
+        if self.category is None:
+            verdict = f'root (best: {best or "root"}, below min score)'
+        else:
+            verdict = self.category or 'root'
+        return f'{verdict} {self.scores[best]:g}: {reasons}'
+
+
+class WikiClassifier:
+    """Scores pages against the configured keyword sets."""
+
+    def __init__(self, config_path=DEFAULT_CONFIG_PATH):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        self.fields = config['fields']
+        self.hit_cap = config.get('hit_cap', 1)
+        self.min_score = config.get('min_score', 0)
+        self.categories = [c['path'] for c in config['categories']]
+        keywords = sorted({k.lower() for c in config['categories'] for k in c['keywords']})
+        self.weights = [[] for _ in keywords]
+        position = {k: i for i, k in enumerate(keywords)}
+        for category in config['categories']:
+            for keyword, weight in category['keywords'].items():
+                self.weights[position[keyword.lower()]].append((category['path'], weight))
+        self.position = position
+        self.automaton = KeywordAutomaton(keywords)
+        # Cached hit counts are only valid for the same keyword list
+        digest = hashlib.blake2b('\n'.join(keywords).encode('utf-8'), digest_size=6).hexdigest()
+        self.hits_kind = f'keyword-hits-{digest}'
+
+    def count_text(self, text):
+        """Return {keyword: hits} of headings or body text, keywords starting a word."""
+        counts = self.automaton.count(text.lower(), word_start=True)
+        return {self.automaton.keywords[i]: n for i, n in counts.items()}
+
+    def count_filename(self, filename):
+        stem = os.path.splitext(os.path.basename(filename))[0].lower()
+        counts = self.automaton.count(stem.replace('_', ' ').replace('-', ' '))
+        return {self.automaton.keywords[i]: n for i, n in counts.items()}
+
+    def classify(self, filename, field_hits=None):
+        """Return the Classification of a page from its filename and cached field hits.
+
+        field_hits maps 'headings' and 'body' to {keyword: hits}.
+        """
+        hits = dict(field_hits or {})
+        hits['filename'] = self.count_filename(filename)
+        scores = {category: 0.0 for category in self.categories}
+        explanation = []
+        for field in FIELDS:
+            for keyword, count in hits.get(field, {}).items():
+                capped = min(count, self.hit_cap)
+                for category, weight in self.weights[self.position[keyword]]:
+                    points = self.fields[field] * weight * capped
+                    scores[category] += points
+                    explanation.append((category, field, keyword, count, points))
+        explanation.sort(key=lambda h: -h[4])
+        best = max(self.categories, key=lambda c: (scores[c], -self.categories.index(c)))
+        category = best if scores[best] and scores[best] >= self.min_score else None
+        return Classification(category, scores, explanation)
+
+    def field_hits(self, page, cache=None):
+        """Return {'headings': ..., 'body': ...} keyword hits of a corpus page, cached by digest."""
+        cached = cache.load_derived(self.hits_kind, page.digest) if cache and page.digest else None
+        if cached is not None:
+            return cached
+        with open(page.full_path, 'rb') as f:
+            data = f.read()
+        STATS.file_read(len(data))
+        STATS.count('pages_classified')
+        hits = {'headings': self.count_text('\n'.join(h[1] for h in page.outline)),
+                'body': self.count_text(data.decode('utf-8', errors='replace'))}
+        if cache and page.digest:
+            cache.store_derived(self.hits_kind, page.digest, hits)
+        return hits
+
+    def classify_page(self, page, cache=None):
+        try:
+            hits = self.field_hits(page, cache)
+        except FileNotFoundError:
+            hits = None
+        return self.classify(page.path, hits)
+
+
+_default = None
+
+
+def default_classifier():
+    """Return the classifier for the default config, loading it on first use."""
+    global _default
+    if _default is None:
+        _default = WikiClassifier()
+    return _default
+
+
+def main():
+    # Imported here because corpus_index imports this module
+    from corpus_index import build_parser, load_corpus, suggest_wiki_path
+
+    parser = build_parser('Explain the wiki section chosen for each source page.')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH,
+                        help='keyword configuration (default: %(default)s)')
+    parser.add_argument('files', nargs='*', help='only explain these source files')
+    args = parser.parse_args()
+    index = load_corpus(args)
+    classifier = WikiClassifier(args.config)
+
+    sources = index.source_files
+    if args.files:
+        sources = [f for f in sources if f.path in args.files]
+        missing = set(args.files) - {f.path for f in sources}
+        for path in sorted(missing):
+            print(f"warning: not a corpus source file: {path}", file=sys.stderr)
+
+    print("# Wiki Section Classification")
+    print()
+    labels = [c or '(root)' for c in classifier.categories]
+    print("| File | Suggested Path | " + " | ".join(labels) + " | Reason |")
+    print("|------|----------------|" + "|".join('-' * (len(c) + 2) for c in labels)
+          + "|--------|")
+    for source in sources:
+        result = classifier.classify_page(source, index.cache)
+        scores = ' | '.join(f'{result.scores[c]:g}' for c in classifier.categories)
+        path = suggest_wiki_path(source.basename, source.type, result)
+        print(f"| {source.path} | {path} | {scores} | {result.explain()} |")
+    if index.cache:
+        index.cache.commit()
+
+if __name__ == "__main__":
+    main()
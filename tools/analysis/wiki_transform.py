@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""Run the wiki maintenance transforms over wiki/ in a single read per page.
+
+Link conversion (as convert_links.py), heading normalization, trailing
+whitespace, list-marker and table-of-contents passes are applied in order to
+each page's text in memory, so a page is read once and written at most once
+with an atomic rename, whichever passes are enabled. The heading, whitespace
+and list passes follow the markdownlint rules enabled in .markdownlint.json
+(MD018, MD019, MD022, MD023, MD009, MD012, MD047, MD004). Fenced code blocks
+and front matter are left alone, and so is the "Back to Home" footer link.
+
+The toc pass only touches pages that ask for a table of contents with a
+<!-- toc --> placeholder or an existing generated region.
+
+Passes are idempotent. A page whose text no pass changes is recorded as
+clean in the scan cache under its content hash, for this set of passes and
+wiki pages, so a rerun does not even open pages that were clean before.
+"""
+import difflib
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from convert_links import LINK_RE, LinkConverter, build_page_index, footer_start
+from corpus_index import atomic_write, build_parser, content_digest, load_corpus
+from headings import FENCE_RE, outline_entries, scan_bytes
+from instrumentation import STATS
+from nav import DEFAULT_DEPTH
+
+TEXT_FENCE_RE = re.compile(FENCE_RE.pattern.decode('ascii'))
+FRONT_MATTER = ('---', '...')
+
+TOC_PLACEHOLDER = '<!-- toc -->'
+TOC_BEGIN = '<!-- BEGIN TOC (tools/analysis/wiki_transform.py) -->'
+TOC_END = '<!-- END TOC -->'
+
+
+def split_line(line):
+    """Return (body, line ending) of a line kept with its ending."""
+    body = line.rstrip('\r\n')
+    return body, line[len(body):]
+
+
+def code_mask(lines):
+    """Return one flag per line, True inside front matter or a fenced code block."""
+    mask = []
+    fence = None
+    # Front matter only counts if it is closed (as in headings.HeadingScanner)
+    front_matter = bool(lines) and lines[0].rstrip() == '---' and \
+        any(line.rstrip() in FRONT_MATTER for line in lines[1:])
+    for i, line in enumerate(lines):
+        if front_matter:
+            mask.append(True)
+            if i and line.rstrip() in FRONT_MATTER:
+                front_matter = False
+            continue
+        match = TEXT_FENCE_RE.match(line)
+        if fence:
+            mask.append(True)
+            # A closing fence uses the same character, at least as long, and nothing else
+            if (match and match.group(1)[:1] == fence[:1]
+                    and len(match.group(1)) >= len(fence)
+                    and not line[match.end():].strip()):
+                fence = None
+        elif match:
+            mask.append(True)
+            fence = match.group(1)
+        else:
+            mask.append(False)
+    return mask
+
+
+def default_ending(lines):
+    return '\r\n' if lines and lines[0].endswith('\r\n') else '\n'
+
+
+class LinkPass:
+    """Rewrite relative .md links as [[wiki links]] (convert_links.py).
+
+    The "Back to Home" footer that sync.py appends keeps its markdown link.
+    """
+
+    name = 'links'
+
+    def __init__(self, wiki_dir):
+        self.converter = LinkConverter(build_page_index(wiki_dir))
+
+    def apply(self, text):
+        lines = text.splitlines(keepends=True)
+        mask = code_mask(lines)
+        footer = footer_start(lines)
+        out = []
+        changes = 0
+        for i, (line, in_code) in enumerate(zip(lines, mask)):
+            if not in_code and i < footer:
+                new_line, _ = self.converter.convert(line)
+                changes += len(LINK_RE.findall(line)) - len(LINK_RE.findall(new_line))
+                line = new_line
+            out.append(line)
+        return ''.join(out), changes
+
+
+ATX_NO_SPACE_RE = re.compile(r'^(#{1,6})([^#\s])')
+ATX_MANY_SPACES_RE = re.compile(r'^(#{1,6})[ \t]{2,}')
+ATX_INDENTED_RE = re.compile(r'^ {1,3}(#{1,6}(?:\s|$))')
+HEADING_LINE_RE = re.compile(r'^#{1,6}(?:\s|$)')
+
+
+class HeadingPass:
+    """Fix ATX heading spacing and surround headings with blank lines."""
+
+    name = 'headings'
+
+    def apply(self, text):
+        lines = text.splitlines(keepends=True)
+        mask = code_mask(lines)
+        ending = default_ending(lines)
+        out = []
+        changes = 0
+        previous_heading = False
+        for line, in_code in zip(lines, mask):
+            if in_code:
+                if previous_heading and out and split_line(line)[0].strip():
+                    out.append(ending)
+                    changes += 1
+                out.append(line)
+                previous_heading = False
+                continue
+            body, end = split_line(line)
+            fixed = ATX_INDENTED_RE.sub(r'\1', body)
+            fixed = ATX_NO_SPACE_RE.sub(r'\1 \2', fixed)
+            fixed = ATX_MANY_SPACES_RE.sub(r'\1 ', fixed)
+            is_heading = bool(HEADING_LINE_RE.match(fixed))
+            if fixed != body:
+                changes += 1
+            if out and fixed.strip() and split_line(out[-1])[0].strip() and \
+                    (is_heading or previous_heading):
+                out.append(end or ending)
+                changes += 1
+            out.append(fixed + end)
+            previous_heading = is_heading
+        return ''.join(out), changes
+
+
+class WhitespacePass:
+    """Strip trailing whitespace, collapse blank lines and end with one newline."""
+
+    name = 'whitespace'
+
+    def apply(self, text):
+        if not text:
+            return text, 0
+        lines = text.splitlines(keepends=True)
+        mask = code_mask(lines)
+        out = []
+        changes = 0
+        previous_blank = False
+        for line, in_code in zip(lines, mask):
+            body, end = split_line(line)
+            if not in_code:
+                stripped = body.rstrip()
+                # Exactly two trailing spaces are a hard line break (MD009 br_spaces)
+                if stripped and body == stripped + '  ':
+                    stripped = body
+                if stripped != body:
+                    changes += 1
+                body = stripped
+                if not body and previous_blank:
+                    changes += 1
+                    continue
+            previous_blank = not in_code and not body
+            out.append(body + end)
+        while len(out) > 1 and not split_line(out[-1])[0]:
+            out.pop()
+            changes += 1
+        if not out[-1].endswith('\n'):
+            out[-1] += default_ending(lines)
+            changes += 1
+        return ''.join(out), changes
+
+
+LIST_ITEM_RE = re.compile(r'^(\s*)([*+-])(\s+)(?=\S)')
+RULE_RE = re.compile(r'^\s*([*_-])(?:\s*\1){2,}\s*$')
+
+
+class ListMarkerPass:
+    """Use the page's first unordered list marker for every list item (MD004)."""
+
+    name = 'lists'
+
+    def apply(self, text):
+        lines = text.splitlines(keepends=True)
+        mask = code_mask(lines)
+        marker = None
+        out = []
+        changes = 0
+        for line, in_code in zip(lines, mask):
+            match = None if in_code or RULE_RE.match(line) else LIST_ITEM_RE.match(line)
+            if match:
+                if marker is None:
+                    marker = match.group(2)
+                elif match.group(2) != marker:
+                    line = f'{match.group(1)}{marker}{line[match.end(2):]}'
+                    changes += 1
+            out.append(line)
+        return ''.join(out), changes
+
+
+class TocPass:
+    """Fill the <!-- toc --> placeholder or generated TOC region from the page headings."""
+
+    name = 'toc'
+
+    def __init__(self, depth=DEFAULT_DEPTH):
+        self.depth = depth
+
+    def render(self, text, ending):
+        outline = scan_bytes(text.encode('utf-8')).outline
+        lines = [TOC_BEGIN, '']
+        for level, heading, slug, _ in outline_entries(outline):
+            if 2 <= level <= self.depth:
+                lines.append(f"{'  ' * (level - 2)}- [{heading}](#{slug})")
+        lines += ['', TOC_END]
+        return ending.join(lines)
+
+    def apply(self, text):
+        start = text.find(TOC_BEGIN)
+        end = text.find(TOC_END, start) if start != -1 else -1
+        if start != -1 and end != -1:
+            region = (start, end + len(TOC_END))
+        else:
+            start = text.find(TOC_PLACEHOLDER)
+            if start == -1:
+                return text, 0
+            region = (start, start + len(TOC_PLACEHOLDER))
+        block = self.render(text, default_ending(text.splitlines(keepends=True)))
+        if text[region[0]:region[1]] == block:
+            return text, 0
+        return text[:region[0]] + block + text[region[1]:], 1
+
+
+PASS_NAMES = ('links', 'headings', 'whitespace', 'lists', 'toc')
+
+
+def build_passes(names, wiki_dir, depth=DEFAULT_DEPTH):
+    """Return pass objects for the given names, in pipeline order."""
+    factories = {
+        'links': lambda: LinkPass(wiki_dir),
+        'headings': HeadingPass,
+        'whitespace': WhitespacePass,
+        'lists': ListMarkerPass,
+        'toc': lambda: TocPass(depth)
+    }
+    return [factories[name]() for name in PASS_NAMES if name in names]
+
+
+def run_passes(passes, text):
+    """Return (new text, {pass name: changes}) after every pass."""
+    changes = {}
+    for transform in passes:
+        text, count = transform.apply(text)
+        if count:
+            changes[transform.name] = count
+    return text, changes
+
+
+# Every pass but links, which depends on the wiki's page set
+_NORMALIZE_PASSES = build_passes(('headings', 'whitespace', 'lists', 'toc'), None)
+
+
+def normalize_page(text):
+    """Return text as the passes other than links leave it."""
+    return run_passes(_NORMALIZE_PASSES, text)[0]
+
+
+def transform_page(passes, page, dry_run=False):
+    """Read one page, run the passes and write it back if it changed.
+
+    Returns (page, old text, new text, changes).
+    """
+    with open(page.full_path, 'rb') as f:
+        data = f.read()
+    STATS.file_read(len(data))
+    content = data.decode('utf-8')
+    new_content, changes = run_passes(passes, content)
+    if not dry_run and new_content != content:
+        atomic_write(page.full_path, new_content)
+        STATS.count('files_written')
+    return page, content, new_content, changes
+
+
+def parse_pass_names(parser, value):
+    names = [n.strip() for n in value.split(',') if n.strip()]
+    unknown = [n for n in names if n not in PASS_NAMES]
+    if unknown:
+        parser.error(f"unknown pass {', '.join(unknown)} (choose from {', '.join(PASS_NAMES)})")
+    return names
+
+
+def main():
+    parser = build_parser('Apply the wiki maintenance transforms in one pass per page.')
+    parser.add_argument('--passes', default=','.join(PASS_NAMES),
+                        help='comma-separated passes to run (default: %(default)s)')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH,
+                        help=f'deepest heading level in a table of contents (default: {DEFAULT_DEPTH})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='print a unified diff instead of rewriting files')
+    args = parser.parse_args()
+    names = parse_pass_names(parser, args.passes)
+
+    index = load_corpus(args)
+    cache = index.cache
+    wiki_dir = os.path.join(args.root, 'wiki')
+    passes = build_passes(names, wiki_dir, args.depth)
+
+    # Link conversion depends on which pages exist, so clean results do too
+    signature = content_digest('\n'.join(
+        [','.join(t.name for t in passes), str(args.depth)] + sorted(index.wiki)).encode('utf-8'))
+    kind = f'transform-clean-{signature}'
+    pages = [p for p in index.wiki_files
+             if not (cache and cache.load_derived(kind, p.digest))]
+    STATS.count('pages_skipped_clean', len(index.wiki_files) - len(pages))
+
+    totals = {t.name: [0, 0] for t in passes}
+    changed = []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        STATS.pool_submitted(len(pages), args.workers)
+        results = pool.map(lambda p: transform_page(passes, p, args.dry_run), pages)
+        for page, content, new_content, changes in STATS.timed_iter('transform', results):
+            for name, count in changes.items():
+                totals[name][0] += 1
+                totals[name][1] += count
+            if new_content == content:
+                if cache:
+                    cache.store_derived(kind, page.digest, True)
+                continue
+            changed.append((page, changes))
+            if args.dry_run:
+                sys.stdout.writelines(difflib.unified_diff(
+                    content.splitlines(keepends=True), new_content.splitlines(keepends=True),
+                    fromfile=f'a/wiki/{page.path}', tofile=f'b/wiki/{page.path}'))
+            elif cache:
+                # Passes are idempotent, so the written text is already clean
+                cache.store_derived(kind, content_digest(new_content.encode('utf-8')), True)
+    if cache:
+        cache.commit()
+
+    out = sys.stderr if args.dry_run else sys.stdout
+    verb = 'would change' if args.dry_run else 'changed'
+    print("# Wiki Transform Report", file=out)
+    print(file=out)
+    print("## Summary", file=out)
+    print(f"- Wiki pages: {len(index.wiki_files)}", file=out)
+    print(f"- Pages read: {len(pages)} ({len(index.wiki_files) - len(pages)} known clean)", file=out)
+    print(f"- Pages {verb}: {len(changed)}", file=out)
+    print(file=out)
+    print("## Passes", file=out)
+    print("| Pass | Pages Changed | Changes |", file=out)
+    print("|------|---------------|---------|", file=out)
+    for name, (files, count) in totals.items():
+        print(f"| {name} | {files} | {count} |", file=out)
+    print(file=out)
+    print("## Changed Pages", file=out)
+    print("| Page | Changes |", file=out)
+    print("|------|---------|", file=out)
+    for page, changes in changed:
+        detail = ', '.join(f'{name} {count}' for name, count in changes.items())
+        print(f"| wiki/{page.path} | {detail} |", file=out)
+
+if __name__ == "__main__":
+    main()